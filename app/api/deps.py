@@ -0,0 +1,81 @@
+"""Shared API dependencies."""
+import secrets
+from datetime import date
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.local_dates import today_in
+from app.services.birthday_calendar import get_birthday_calendar
+from app.services.invalidation import get_invalidation_bus
+from app.services.user_cache import get_user_cache
+from app.services.user_service import UserService
+from app.services.username_filter import get_username_filter
+from app.services.username_search import get_username_prefix_index
+from app.storage.base import UserStore
+from app.storage.memory import memory_user_store
+from app.storage.shared_cache import with_shared_cache
+from app.storage.snapshot import get_snapshot_user_store
+from app.storage.sql import SQLUserStore
+
+
+def get_local_user_store() -> Optional[UserStore]:
+    """Get the process-local user store, if the backend keeps one."""
+    if settings.user_store_backend == "memory":
+        return memory_user_store
+    if settings.user_store_backend == "snapshot":
+        return get_snapshot_user_store()
+    return None
+
+
+async def get_user_store(db: Session = Depends(get_read_db)) -> UserStore:
+    """Get the configured user store backend."""
+    store = get_local_user_store()
+    return store if store is not None else with_shared_cache(SQLUserStore(db))
+
+
+def create_user_service(db: Session, store: UserStore) -> UserService:
+    """Create a user service wired with the optional in-process helpers."""
+    return UserService(
+        db,
+        username_filter=get_username_filter(),
+        store=store,
+        cache=get_user_cache(),
+        invalidation_bus=get_invalidation_bus(),
+        calendar=get_birthday_calendar(),
+        prefix_index=get_username_prefix_index(),
+    )
+
+
+async def get_user_service(
+    db: Session = Depends(get_db),
+    store: UserStore = Depends(get_user_store),
+) -> UserService:
+    """Get the user service for a request.
+
+    Declared async, like get_user_store, because it only assembles objects:
+    sync dependencies would each cost a threadpool round trip per request.
+    """
+    return create_user_service(db, store)
+
+
+async def get_local_today(
+    tz: Optional[str] = Query(default=None, description="IANA time zone, e.g. Europe/Warsaw"),
+    x_time_zone: Optional[str] = Header(default=None),
+) -> date:
+    """Get today's date in the caller's time zone (tz parameter, then X-Time-Zone header, then server)."""
+    try:
+        return today_in(tz or x_time_zone)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def require_debug_token(x_debug_token: Optional[str] = Header(default=None)) -> None:
+    """Guard debug endpoints; they do not exist unless DEBUG_TOKEN is set."""
+    if not settings.debug_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_debug_token is None or not secrets.compare_digest(x_debug_token, settings.debug_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid debug token")
@@ -0,0 +1,36 @@
+"""Birthday listing API endpoints."""
+from datetime import date, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_local_today
+from app.core.database import get_read_db
+from app.core.responses import negotiated_response
+from app.core.threadpool import read_pool
+from app.schemas.birthday import BirthdayList
+from app.services.birthday_calendar import list_birthdays
+
+router = APIRouter()
+
+
+@router.get("/birthdays", response_model=BirthdayList)
+async def get_birthdays(
+    request: Request,
+    day: Literal["today", "tomorrow"] = "today",
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    today: date = Depends(get_local_today),
+    db: Session = Depends(get_read_db),
+):
+    """List users whose birthday is today or tomorrow in the caller's time zone, a page at a time.
+
+    Answers MessagePack on request.
+    """
+    on = today if day == "today" else today + timedelta(days=1)
+    usernames = await read_pool.run(list_birthdays, db, on, cursor, limit)
+    return negotiated_response(request, {
+        "date": on.isoformat(),
+        "usernames": usernames,
+        "next_cursor": usernames[-1] if len(usernames) == limit else None,
+    })
@@ -0,0 +1,67 @@
+"""Debug API endpoints, guarded by the debug token."""
+import asyncio
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from app.api.deps import require_debug_token
+from app.core.config import settings
+from app.core.flight_recorder import flight_recorder
+from app.core.profiler import SamplingProfiler, profile_lock, stored_profiles
+from app.schemas.debug import SlowRequest
+
+router = APIRouter(prefix="/debug", dependencies=[Depends(require_debug_token)])
+
+
+@router.get("/slow-requests", response_model=List[SlowRequest])
+async def list_slow_requests():
+    """List requests recorded by the flight recorder, newest first."""
+    return flight_recorder.entries()
+
+
+@router.delete("/slow-requests", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_requests():
+    """Clear the flight recorder."""
+    flight_recorder.clear()
+
+
+def render_profile(profiler: SamplingProfiler, format: str) -> Response:
+    """Render a finished profile as collapsed stacks or speedscope JSON."""
+    if format == "speedscope":
+        return JSONResponse(
+            profiler.speedscope(),
+            headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'},
+        )
+    return PlainTextResponse(profiler.collapsed())
+
+
+@router.post("/profile")
+async def profile(
+    seconds: float = Query(10, gt=0, le=60),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+):
+    """Sample all busy threads for the given number of seconds."""
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    try:
+        profiler = SamplingProfiler(settings.profiler_sample_interval_ms / 1000)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+    finally:
+        profile_lock.release()
+    return render_profile(profiler, format)
+
+
+@router.get("/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+):
+    """Get the profile of a request sent with the X-Profile header."""
+    profiler = stored_profiles.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return render_profile(profiler, format)
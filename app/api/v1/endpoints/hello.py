@@ -1,75 +1,64 @@
 """Hello API endpoints."""
-import re
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 
-from app.core.database import get_db
+from app.api.deps import get_local_today, get_user_service
+from app.core.idempotency import fingerprint, get_idempotency_store, scoped_key
+from app.core.responses import FastJSONResponse, negotiated_response
+from app.core.threadpool import read_pool, write_pool
+from app.core.validation import UsernamePath
 from app.services.user_service import UserService
-from app.schemas.user import UserCreate, BirthdayMessage
+from app.schemas.user import UserCreate, BirthdayMessage, BirthdayMessages, BirthdayMessagesRequest
 
 router = APIRouter()
 
 
-def validate_username(username: str) -> str:
-    """Validate username format."""
-    if not username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username cannot be empty"
-        )
-    
-    if len(username) > 50:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username cannot be longer than 50 characters"
-        )
-    
-    # Username should contain only alphanumeric characters and underscores
-    if not re.match(r'^[a-zA-Z0-9_]+$', username):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username can only contain alphanumeric characters and underscores"
-        )
-    
-    return username
-
-
 @router.put("/hello/{username}", status_code=status.HTTP_204_NO_CONTENT)
-def put_user(
-    username: str,
+async def put_user(
+    username: UsernamePath,
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(default=None),
+    service: UserService = Depends(get_user_service)
 ):
-    """Create or update user's date of birth."""
-    # Validate username
-    validate_username(username)
+    """Create or update user's date of birth.
     
-    # Create service and handle user creation/update
-    service = UserService(db)
-    try:
-        service.create_or_update_user(username, user_data.dateOfBirth)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+    Retries carrying the same Idempotency-Key get the first response back.
+    """
+    async def save() -> Response:
+        # Handle user creation/update
+        try:
+            # Both values were validated while parsing the request
+            await write_pool.run(service.create_or_update_user, username, user_data.dateOfBirth, False)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    
+    store = get_idempotency_store()
+    if idempotency_key is None or store is None:
+        return await save()
+    return await store.execute(
+        scoped_key(idempotency_key, f"PUT /hello/{username}"),
+        fingerprint(user_data.model_dump_json()),
+        save,
+    )
 
 
 @router.get("/hello/{username}", response_model=BirthdayMessage)
-def get_user_birthday_message(
-    username: str,
-    db: Session = Depends(get_db)
+async def get_user_birthday_message(
+    username: UsernamePath,
+    today: date = Depends(get_local_today),
+    service: UserService = Depends(get_user_service)
 ):
-    """Get birthday message for user."""
-    # Validate username
-    validate_username(username)
-    
-    # Create service and get birthday message
-    service = UserService(db)
+    """Get birthday message for user, as of today in the caller's time zone."""
+    # Get birthday message
     try:
-        message = service.get_birthday_message(username)
-        return BirthdayMessage(message=message)
+        message = await read_pool.run(service.get_birthday_message, username, today)
+        # Returning a response skips re-validating against response_model
+        return FastJSONResponse({"message": message})
     except ValueError as e:
         if "User not found" in str(e):
             raise HTTPException(
@@ -79,4 +68,30 @@ def get_user_birthday_message(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
-        ) 
\ No newline at end of file
+        )
+
+
+@router.delete("/hello/{username}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user(
+    username: UsernamePath,
+    service: UserService = Depends(get_user_service)
+):
+    """Delete a user."""
+    try:
+        await write_pool.run(service.delete_user, username)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+
+@router.post("/birthday-messages", response_model=BirthdayMessages)
+async def get_birthday_messages(
+    request: Request,
+    body: BirthdayMessagesRequest,
+    service: UserService = Depends(get_user_service)
+):
+    """Get birthday messages for up to 1000 users; answers MessagePack on request."""
+    messages = await read_pool.run(service.get_birthday_messages, body.usernames)
+    return negotiated_response(request, {"messages": messages})
@@ -0,0 +1,31 @@
+"""Statistics API endpoints."""
+from collections import Counter
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_read_db
+from app.core.threadpool import read_pool
+from app.schemas.birthday import BirthdayStats, DayCount
+from app.services.birthday_stats import count_upcoming, get_birthday_counts
+
+router = APIRouter()
+
+
+@router.get("/stats/birthdays", response_model=BirthdayStats)
+async def get_birthday_stats(
+    upcoming_days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_read_db),
+):
+    """Get birthdays by month and day, and how many fall in the next upcoming_days days."""
+    counts = await read_pool.run(get_birthday_counts, db)
+    by_month: Counter = Counter()
+    for (month, _), count in counts.items():
+        by_month[month] += count
+    return BirthdayStats(
+        total=sum(counts.values()),
+        by_month=dict(sorted(by_month.items())),
+        by_day=[DayCount(month=month, day=day, count=count) for (month, day), count in sorted(counts.items())],
+        upcoming_days=upcoming_days,
+        upcoming_count=count_upcoming(counts, date.today(), upcoming_days),
+    )
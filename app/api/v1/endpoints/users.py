@@ -0,0 +1,50 @@
+"""User listing API endpoints."""
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_read_db
+from app.core.responses import negotiated_response
+from app.core.threadpool import read_pool
+from app.schemas.user import UsernameSearchResult, UserPage, UserResponse
+from app.services.user_listing import list_users
+from app.services.username_search import find_usernames
+
+router = APIRouter()
+
+
+@router.get("/users", response_model=UserPage)
+async def get_users(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    order: Literal["id", "username"] = "id",
+    updated_since: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    birth_month: Optional[int] = Query(None, ge=1, le=12),
+    db: Session = Depends(get_read_db),
+):
+    """Page through users in id or username order; answers MessagePack on request."""
+    try:
+        users, next_cursor = await read_pool.run(
+            list_users, db, limit, cursor, order, updated_since, updated_before, birth_month
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    page = UserPage(items=[UserResponse.model_validate(user) for user in users], next_cursor=next_cursor)
+    return negotiated_response(request, page.model_dump(mode="json"))
+
+
+@router.get("/users/search", response_model=UsernameSearchResult)
+async def search_users(
+    prefix: str = Query(..., min_length=1, max_length=50, pattern=r"^[a-zA-Z0-9_]+$"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    """Find usernames starting with prefix, in bytewise order."""
+    usernames = await read_pool.run(find_usernames, db, prefix, limit)
+    return UsernameSearchResult(usernames=usernames)
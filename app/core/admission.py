@@ -0,0 +1,163 @@
+"""Admission control and load shedding based on in-flight requests.
+
+Requests are split into reads (GET, HEAD, OPTIONS) and writes. Each class
+has its own concurrency limit; requests over the limit wait in a bounded
+FIFO queue for at most the configured queue time and are then rejected
+with 503 and ``Retry-After`` instead of piling up in uvicorn and the
+threadpool.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+ADMISSION_IN_FLIGHT = Gauge(
+    'admission_requests_in_flight',
+    'Requests admitted and not yet finished',
+    ['request_class', 'route']
+)
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    'admission_queue_wait_seconds',
+    'Time requests waited for admission',
+    ['request_class'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+ADMISSION_SHED = Counter(
+    'admission_requests_shed_total',
+    'Requests rejected by admission control',
+    ['request_class', 'route', 'reason']
+)
+
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class AdmissionGate:
+    """Concurrency limit with a bounded, time-limited FIFO wait queue."""
+
+    def __init__(self, max_concurrency: int, max_queue_length: int, max_queue_time: float):
+        """Initialize the gate."""
+        self.max_concurrency = max_concurrency
+        self.max_queue_length = max_queue_length
+        self.max_queue_time = max_queue_time
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> Optional[str]:
+        """Wait for a slot; return None when admitted or the rejection reason."""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return None
+        if len(self._waiters) >= self.max_queue_length or self.max_queue_time <= 0:
+            return "queue_full"
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        timer = loop.call_later(self.max_queue_time, self._expire, waiter)
+        try:
+            admitted = await waiter
+        except asyncio.CancelledError:
+            # A slot handed over just before cancellation must not leak
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+        return None if admitted else "queue_timeout"
+
+    def release(self) -> None:
+        """Release a slot, handing it straight to the oldest live waiter."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def _expire(self, waiter: asyncio.Future) -> None:
+        """Reject a waiter that ran out of queue time."""
+        if not waiter.done():
+            waiter.set_result(False)
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying separate admission gates to reads and writes."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        read_max_concurrency: int,
+        write_max_concurrency: int,
+        max_queue_length: int,
+        max_queue_time: float,
+        retry_after_seconds: int,
+        exempt_paths: Tuple[str, ...] = ("/health", "/metrics"),
+    ):
+        """Initialize the middleware around app."""
+        self.app = app
+        self.gates: Dict[str, AdmissionGate] = {
+            "read": AdmissionGate(read_max_concurrency, max_queue_length, max_queue_time),
+            "write": AdmissionGate(write_max_concurrency, max_queue_length, max_queue_time),
+        }
+        self.retry_after = str(retry_after_seconds)
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Admit, queue or shed the request."""
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        request_class = "read" if scope["method"] in READ_METHODS else "write"
+        route = route_template(scope)
+        gate = self.gates[request_class]
+        start_time = time.perf_counter()
+        rejection = await gate.acquire()
+        if rejection is not None:
+            ADMISSION_SHED.labels(request_class=request_class, route=route, reason=rejection).inc()
+            await self._reject(send)
+            return
+
+        ADMISSION_QUEUE_WAIT.labels(request_class=request_class).observe(time.perf_counter() - start_time)
+        in_flight = ADMISSION_IN_FLIGHT.labels(request_class=request_class, route=route)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            in_flight.dec()
+            gate.release()
+
+    async def _reject(self, send: Send) -> None:
+        """Send a 503 response asking the client to retry later."""
+        body = json.dumps({"detail": "Service overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def route_template(scope: Scope) -> str:
+    """Return the path template of the route matching scope, e.g. /hello/{username}."""
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
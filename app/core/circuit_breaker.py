@@ -0,0 +1,82 @@
+"""Circuit breaker for optional dependencies.
+
+A breaker counts consecutive failures of calls to a dependency, where a
+call that succeeds but takes longer than ``slow_call_seconds`` also counts
+as a failure. After ``failure_threshold`` of them in a row the breaker
+opens: callers skip the dependency and take their fallback path. After
+``reset_seconds`` it lets a single trial call through (half-open). The
+trial closes the breaker if it succeeds and reopens it if it fails.
+"""
+import threading
+import time
+
+from prometheus_client import Counter, Gauge
+
+CIRCUIT_STATE = Gauge(
+    'circuit_breaker_state',
+    'Circuit breaker state (0 closed, 1 open, 2 half-open)',
+    ['name']
+)
+
+CIRCUIT_OPENED = Counter(
+    'circuit_breaker_opened_total',
+    'Times a circuit breaker opened',
+    ['name']
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float, slow_call_seconds: float):
+        """Initialize a closed breaker."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(name=name).set(0)
+
+    @property
+    def state(self) -> str:
+        """Return the current state."""
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if the caller may use the dependency now."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                # Let exactly one trial call through
+                self._set_state(HALF_OPEN)
+                return True
+            return False
+
+    def record(self, duration: float, failed: bool = False) -> None:
+        """Record the outcome of a call that allow() let through."""
+        failed = failed or duration > self.slow_call_seconds
+        with self._lock:
+            if not failed:
+                self._failures = 0
+                if self._state != CLOSED:
+                    self._set_state(CLOSED)
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+                CIRCUIT_OPENED.labels(name=self.name).inc()
+
+    def _set_state(self, state: str) -> None:
+        """Change state; caller holds the lock."""
+        self._state = state
+        CIRCUIT_STATE.labels(name=self.name).set(_STATE_VALUES[state])
@@ -1,8 +1,8 @@
 """Application configuration management."""
 import os
-from typing import Optional
+from typing import Dict, Optional
 
-from pydantic import field_validator
+from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -26,18 +26,135 @@ class Settings(BaseSettings):
     database_host: str = ""
     database_port: int = 5432
     database_name: str = "birthday_api"
+    # Executions before psycopg 3 (postgresql+psycopg://) prepares a statement server-side
+    database_prepare_threshold: Optional[int] = 5
+    # "default", or "pgbouncer" when connecting through a transaction-mode pooler
+    database_pool_mode: str = "default"
+    pgbouncer_client_pool_size: int = 0
+    # Direct Postgres URL for LISTEN, which does not work through a transaction pooler
+    database_direct_url: str = ""
 
     test_database_url: str = "sqlite:///./test.db"
+
+    # SQLite tuning for single-node deployments
+    sqlite_tuned: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456
+    sqlite_cache_size_kib: int = 65536
+    sqlite_reader_pool_size: int = 4
+    sqlite_checkpoint_interval_seconds: int = 60
     
     # Security
     secret_key: str = "your-secret-key-here"
-    
-    
+
+    # Username filter (fast 404s for unknown usernames)
+    username_filter_enabled: bool = False
+    username_filter_capacity: int = 100000
+    username_filter_error_rate: float = 0.01
+    username_filter_rebuild_interval_seconds: int = 3600
+
+    # User store backend for birthday lookups ("sql", "memory" or "snapshot")
+    user_store_backend: str = "sql"
+    user_store_reload_interval_seconds: int = 3600
+    user_snapshot_path: str = ""
+
+    # Username prefix search: "sql" (range scan on an index) or "memory" (sorted array)
+    username_search_backend: str = "sql"
+    username_search_reload_interval_seconds: int = 3600
+
+    # Per-process user cache and cross-replica invalidation ("", "postgres" or "loopback")
+    user_cache_enabled: bool = False
+    user_cache_max_entries: int = 100000
+    user_cache_ttl_seconds: int = 300
+    cache_invalidation_transport: str = ""
+    cache_invalidation_channel: str = "user_invalidations"
+
+    # Admission control (load shedding on in-flight requests)
+    admission_control_enabled: bool = False
+    admission_read_max_concurrency: int = 64
+    admission_write_max_concurrency: int = 16
+    admission_max_queue_length: int = 128
+    admission_max_queue_time_ms: int = 100
+    admission_retry_after_seconds: int = 1
+
+    # Per-client token buckets on /hello (429 when empty). Clients are keyed
+    # by a listed API key, else by IP; api_key_tiers maps keys to tier names
+    # and tier_multipliers scales both budgets per tier
+    rate_limit_enabled: bool = False
+    rate_limit_read_per_second: float = 20.0
+    rate_limit_read_burst: int = 40
+    rate_limit_write_per_second: float = 2.0
+    rate_limit_write_burst: int = 10
+    rate_limit_max_clients: int = 100000
+    rate_limit_api_key_header: str = "X-API-Key"
+    rate_limit_api_key_tiers: Dict[str, str] = {}
+    rate_limit_tier_multipliers: Dict[str, float] = {}
+    rate_limit_trust_forwarded_for: bool = False
+
+    # Materialized yesterday/today/tomorrow birthday sets, rebuilt at local midnight
+    birthday_calendar_enabled: bool = False
+    # Recount of the birthday_stats counters from users (0 = never)
+    birthday_stats_reconcile_interval_seconds: int = 86400
+
+    # Retention purge of users not updated for this many days (0 = keep forever)
+    user_retention_days: int = 0
+    retention_purge_interval_seconds: int = 3600
+    retention_purge_batch_size: int = 1000
+    retention_purge_pause_ms: int = 100
+
+    # Shared Redis for cross-replica state (optional; needs the redis package)
+    redis_url: str = ""
+    redis_socket_timeout_ms: int = 100
+
+    # Idempotency-Key support on PUT /hello/{username}: "memory" or "redis"
+    idempotency_enabled: bool = False
+    idempotency_backend: str = "memory"
+    idempotency_max_entries: int = 100000
+    idempotency_ttl_seconds: int = 3600
+    idempotency_wait_timeout_ms: int = 5000
+
+    # Shared cache of dates of birth in Redis, in front of the SQL store.
+    # Entries expire at UTC midnight plus up to the jitter; after the failure
+    # threshold of errors or slow calls the cache is skipped for reset seconds
+    shared_cache_enabled: bool = False
+    shared_cache_key_prefix: str = "dob:"
+    shared_cache_ttl_jitter_seconds: int = 900
+    shared_cache_slow_call_ms: int = 25
+    shared_cache_failure_threshold: int = 5
+    shared_cache_reset_seconds: int = 10
+
+    # Worker threads for blocking work; reads and writes get separate pools
+    threadpool_default_size: int = 40
+    threadpool_read_size: int = 32
+    threadpool_write_size: int = 8
+
+    # Request deadlines in milliseconds (0 = none); per-route overrides are
+    # keyed by "METHOD /path/{template}", e.g. {"GET /hello/{username}": 200}
+    request_deadline_ms: int = 0
+    request_deadline_route_ms: Dict[str, int] = {}
+
+    # Slow-request flight recorder and the debug endpoints (disabled without a token)
+    flight_recorder_enabled: bool = False
+    flight_recorder_threshold_ms: int = 250
+    flight_recorder_capacity: int = 256
+    flight_recorder_log_entries: bool = False
+    debug_token: str = ""
+    # Sampling profiler; X-Profile per-request profiling also needs DEBUG=True
+    profiler_sample_interval_ms: int = 5
+
+    # Sampled traffic capture for benchmarks/replay.py; "{pid}" in the path is
+    # replaced by the process id so every worker writes its own file
+    traffic_capture_enabled: bool = False
+    traffic_capture_path: str = ""
+    traffic_capture_sample_rate: float = 0.01
+    traffic_capture_max_buffered: int = 100000
+    traffic_capture_flush_interval_seconds: int = 5
+
     @field_validator("database_url")
     @classmethod
     def validate_database_url(cls, v: str) -> str:
         """Validate database URL format."""
-        if not v.startswith(("postgresql://", "sqlite://")):
+        if not v.startswith(("postgresql://", "postgresql+psycopg2://", "postgresql+psycopg://", "sqlite://")):
             raise ValueError("Database URL must start with postgresql:// or sqlite://")
         return v
 
@@ -49,6 +166,73 @@ class Settings(BaseSettings):
             raise ValueError("Database engine must be 'postgresql' or 'sqlite'")
         return v
 
+    @field_validator("database_pool_mode")
+    @classmethod
+    def validate_database_pool_mode(cls, v: str) -> str:
+        """Validate database pool mode."""
+        if v not in ["default", "pgbouncer"]:
+            raise ValueError("Database pool mode must be 'default' or 'pgbouncer'")
+        return v
+
+    @field_validator("user_store_backend")
+    @classmethod
+    def validate_user_store_backend(cls, v: str) -> str:
+        """Validate user store backend."""
+        if v not in ["sql", "memory", "snapshot"]:
+            raise ValueError("User store backend must be 'sql', 'memory' or 'snapshot'")
+        return v
+
+    @field_validator("username_search_backend")
+    @classmethod
+    def validate_username_search_backend(cls, v: str) -> str:
+        """Validate username search backend."""
+        if v not in ["sql", "memory"]:
+            raise ValueError("Username search backend must be 'sql' or 'memory'")
+        return v
+
+    @field_validator("idempotency_backend")
+    @classmethod
+    def validate_idempotency_backend(cls, v: str) -> str:
+        """Validate idempotency backend."""
+        if v not in ["memory", "redis"]:
+            raise ValueError("Idempotency backend must be 'memory' or 'redis'")
+        return v
+
+    @field_validator("cache_invalidation_transport")
+    @classmethod
+    def validate_cache_invalidation_transport(cls, v: str) -> str:
+        """Validate cache invalidation transport."""
+        if v and v not in ["postgres", "loopback"]:
+            raise ValueError("Cache invalidation transport must be 'postgres' or 'loopback'")
+        return v
+
+    @model_validator(mode="after")
+    def require_invalidation_transport(self) -> "Settings":
+        """Refuse per-process copies of user data that other replicas' writes cannot reach."""
+        if self.cache_invalidation_transport:
+            return self
+        if self.username_filter_enabled:
+            raise ValueError(
+                "USERNAME_FILTER_ENABLED requires CACHE_INVALIDATION_TRANSPORT "
+                "('postgres', or 'loopback' for a single process)"
+            )
+        if self.user_store_backend in ("memory", "snapshot"):
+            raise ValueError(
+                f"USER_STORE_BACKEND={self.user_store_backend} requires CACHE_INVALIDATION_TRANSPORT "
+                "('postgres', or 'loopback' for a single process)"
+            )
+        if self.birthday_calendar_enabled:
+            raise ValueError(
+                "BIRTHDAY_CALENDAR_ENABLED requires CACHE_INVALIDATION_TRANSPORT "
+                "('postgres', or 'loopback' for a single process)"
+            )
+        if self.username_search_backend == "memory":
+            raise ValueError(
+                "USERNAME_SEARCH_BACKEND=memory requires CACHE_INVALIDATION_TRANSPORT "
+                "('postgres', or 'loopback' for a single process)"
+            )
+        return self
+
     @property
     def get_database_url(self) -> str:
         """Get the database URL with proper credentials."""
@@ -1,19 +1,170 @@
 """Database connection and session management."""
-from sqlalchemy import create_engine
+import logging
+from typing import Optional
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
+from app.core import deadline
 from app.core.config import settings
 
-# Create database engine
-engine = create_engine(
-    settings.get_database_url,
-    pool_pre_ping=True,
-    echo=settings.debug,
+logger = logging.getLogger(__name__)
+
+SQLITE_CHECKPOINT_DURATION = Histogram(
+    'sqlite_wal_checkpoint_duration_seconds',
+    'Time spent checkpointing the SQLite write-ahead log'
 )
 
-# Create session factory
+SQLITE_WAL_FRAMES = Gauge(
+    'sqlite_wal_frames',
+    'Frames in the SQLite write-ahead log after the last checkpoint',
+    ['state']
+)
+
+
+def is_sqlite_file(url: str) -> bool:
+    """Check whether url points at an on-disk SQLite database."""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, read_only: bool) -> None:
+    """Tune a new SQLite connection for a small server workload."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def _create_pgbouncer_engine(url: str, psycopg3: bool) -> Engine:
+    """Create an engine that sits behind a transaction-mode pooler like PgBouncer.
+
+    Consecutive transactions may run on different server connections, so
+    nothing may outlive a transaction: no server-side prepared statements
+    and no session-level SET. The pooler keeps server connections warm,
+    which makes a local pool (and pre-ping round trips) unnecessary;
+    PGBOUNCER_CLIENT_POOL_SIZE keeps a few client connections if wanted.
+    """
+    connect_args = {"prepare_threshold": None} if psycopg3 else {}
+    if settings.pgbouncer_client_pool_size > 0:
+        pool_args = {
+            "poolclass": deadline.DeadlineQueuePool,
+            "pool_size": settings.pgbouncer_client_pool_size,
+            "max_overflow": 0,
+        }
+    else:
+        pool_args = {"poolclass": NullPool}
+    return _enforce_deadlines(
+        create_engine(url, pool_pre_ping=False, echo=settings.debug, connect_args=connect_args, **pool_args),
+        postgres=True,
+    )
+
+
+def _enforce_deadlines(db_engine: Engine, postgres: bool) -> Engine:
+    """Bound db_engine's queries by the request deadline, if there is one."""
+    if postgres:
+        @event.listens_for(db_engine, "begin")
+        def set_statement_timeout(conn):
+            time_left = deadline.remaining()
+            if time_left is not None:
+                deadline.check("database")
+                # Transaction-scoped, so it is safe behind a transaction pooler
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(time_left * 1000))}")
+    else:
+        @event.listens_for(db_engine, "connect")
+        def set_progress_handler(dbapi_connection, connection_record):
+            dbapi_connection.set_progress_handler(deadline.sqlite_progress_handler, 1000)
+
+    @event.listens_for(db_engine, "handle_error")
+    def report_deadline(context):
+        # statement_timeout cancellations and SQLite interrupts surface as driver errors
+        deadline.check("database")
+
+    return db_engine
+
+
+def create_database_engine(
+    url: str, read_only: bool = False, tuned: bool = True, pool_mode: Optional[str] = None
+) -> Engine:
+    """Create an engine for url.
+
+    ``pool_mode`` overrides DATABASE_POOL_MODE for Postgres URLs.
+
+    On-disk SQLite databases get WAL mode and the other tuning pragmas when
+    ``tuned`` is set. Writers are limited to a single pooled connection that
+    takes the write lock up front with ``BEGIN IMMEDIATE``, since SQLite only
+    ever has one writer; readers get their own pool.
+    """
+    if not url.startswith("sqlite"):
+        psycopg3 = make_url(url).get_driver_name() == "psycopg"
+        if (pool_mode or settings.database_pool_mode) == "pgbouncer":
+            return _create_pgbouncer_engine(url, psycopg3)
+        connect_args = {}
+        if psycopg3:
+            # psycopg 3 prepares statements server-side once they have run
+            # prepare_threshold times on a connection; psycopg2 cannot
+            connect_args["prepare_threshold"] = settings.database_prepare_threshold
+        return _enforce_deadlines(
+            create_engine(
+                url,
+                poolclass=deadline.DeadlineQueuePool,
+                pool_pre_ping=True,
+                echo=settings.debug,
+                connect_args=connect_args,
+            ),
+            postgres=True,
+        )
+
+    if not (tuned and is_sqlite_file(url)):
+        return _enforce_deadlines(
+            create_engine(url, connect_args={"check_same_thread": False}, echo=settings.debug),
+            postgres=False,
+        )
+
+    pool_size = settings.sqlite_reader_pool_size if read_only else 1
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+        poolclass=deadline.DeadlineQueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        echo=settings.debug,
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # Take transaction control away from pysqlite so BEGIN is ours to emit
+        dbapi_connection.isolation_level = None
+        _apply_sqlite_pragmas(dbapi_connection, read_only)
+
+    @event.listens_for(sqlite_engine, "begin")
+    def on_begin(conn):
+        conn.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+    return _enforce_deadlines(sqlite_engine, postgres=False)
+
+
+# Create database engines; reads get a separate pool only in tuned SQLite mode
+engine = create_database_engine(settings.get_database_url, tuned=settings.sqlite_tuned)
+if settings.sqlite_tuned and is_sqlite_file(settings.get_database_url):
+    read_engine = create_database_engine(settings.get_database_url, read_only=True)
+else:
+    read_engine = engine
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Create base class for models
 Base = declarative_base()
@@ -28,6 +179,34 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Get database session for read-only requests."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def checkpoint_sqlite_wal(sqlite_engine: Optional[Engine] = None) -> None:
+    """Checkpoint the SQLite write-ahead log without blocking readers or writers."""
+    with SQLITE_CHECKPOINT_DURATION.time():
+        # Raw connection in autocommit mode: a checkpoint cannot run inside BEGIN
+        connection = (sqlite_engine or engine).raw_connection()
+        try:
+            cursor = connection.cursor()
+            busy, log_frames, checkpointed_frames = cursor.execute(
+                "PRAGMA wal_checkpoint(PASSIVE)"
+            ).fetchone()
+            cursor.close()
+        finally:
+            connection.close()
+    SQLITE_WAL_FRAMES.labels(state="total").set(log_frames)
+    SQLITE_WAL_FRAMES.labels(state="checkpointed").set(checkpointed_frames)
+    if busy:
+        logger.debug("SQLite WAL checkpoint could not complete, database busy")
+
+
 def get_test_db():
     """Get test database session."""
     test_engine = create_engine(
@@ -39,4 +218,4 @@ def get_test_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
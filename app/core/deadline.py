@@ -0,0 +1,131 @@
+"""Per-request deadlines.
+
+The deadline middleware stores each request's expiry time in a context
+variable. AnyIO copies context into worker threads, so the database layer
+sees the same deadline: Postgres transactions get a matching
+``statement_timeout``, SQLite queries are interrupted by a progress handler,
+and pool checkouts wait no longer than the time left. Anything that runs out
+of time raises DeadlineExceeded, which the app turns into a 504.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import Counter
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.admission import route_template
+
+DEADLINE_EXCEEDED = Counter(
+    'request_deadline_exceeded_total',
+    'Requests that ran out of their deadline',
+    ['route', 'stage']
+)
+
+_expires_at: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time; stage says where it happened."""
+
+    def __init__(self, stage: str):
+        """Initialize with the stage that ran out of time."""
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+
+def remaining() -> Optional[float]:
+    """Return seconds left before the current deadline, or None without one."""
+    expires_at = _expires_at.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+def expired() -> bool:
+    """Return True when the current deadline has passed."""
+    expires_at = _expires_at.get()
+    return expires_at is not None and time.monotonic() >= expires_at
+
+
+def check(stage: str) -> None:
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    if expired():
+        raise DeadlineExceeded(stage)
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[None]:
+    """Run the block under a deadline ``seconds`` from now."""
+    token = _expires_at.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _expires_at.reset(token)
+
+
+def sqlite_progress_handler() -> int:
+    """SQLite progress handler; a non-zero result interrupts the running query."""
+    return 1 if expired() else 0
+
+
+class DeadlineQueuePool(QueuePool):
+    """QueuePool whose checkout never waits past the request deadline."""
+
+    @property
+    def _timeout(self) -> float:
+        """Checkout timeout: the pool timeout capped by the time left."""
+        time_left = remaining()
+        if time_left is None:
+            return self._pool_timeout
+        return max(0.0, min(self._pool_timeout, time_left))
+
+    @_timeout.setter
+    def _timeout(self, value: float) -> None:
+        """Set the pool timeout."""
+        self._pool_timeout = value
+
+    def _do_get(self):
+        """Check out a connection, reporting a timeout caused by the deadline as such."""
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            check("pool_checkout")
+            raise
+
+
+class DeadlineMiddleware:
+    """ASGI middleware giving each request the deadline configured for its route."""
+
+    def __init__(self, app: ASGIApp, default_ms: int, route_ms: Dict[str, int]):
+        """Initialize the middleware.
+
+        ``route_ms`` maps "METHOD /path/{template}" to a budget in milliseconds;
+        other routes get ``default_ms``. A budget of 0 means no deadline.
+        """
+        self.app = app
+        self.default_ms = default_ms
+        self.route_ms = route_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request under its route's deadline."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        budget_ms = self.route_ms.get(f"{scope['method']} {route_template(scope)}", self.default_ms)
+        if budget_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+        with deadline_scope(budget_ms / 1000):
+            await self.app(scope, receive, send)
+
+
+async def deadline_exceeded_handler(request: Request, exception: DeadlineExceeded) -> JSONResponse:
+    """Count the timeout and answer 504."""
+    DEADLINE_EXCEEDED.labels(route=route_template(request.scope), stage=exception.stage).inc()
+    return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
@@ -0,0 +1,177 @@
+"""Flight recorder for slow requests.
+
+Every request gets a small trace in a context variable; engine events add
+SQL statements and their timings to it, and the worker pools add the time
+spent waiting for a thread. When the request finishes under the latency
+threshold the trace is simply dropped, so fast requests pay for a few list
+appends. Slow ones are kept in a bounded ring buffer served by the debug
+endpoint and, optionally, logged.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.admission import route_template
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUESTS = Counter(
+    'slow_requests_recorded_total',
+    'Requests recorded by the flight recorder for exceeding the latency threshold',
+    ['route']
+)
+
+# Statements kept per request; a runaway loop should not fill the buffer
+MAX_STATEMENTS = 50
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("flight_recorder_trace", default=None)
+
+
+class RequestTrace:
+    """Timings collected while one request runs."""
+
+    __slots__ = ("db_time", "queue_wait", "statements", "statement_count")
+
+    def __init__(self):
+        """Initialize an empty trace."""
+        self.db_time = 0.0
+        self.queue_wait = 0.0
+        self.statements: List[Tuple[str, float]] = []
+        self.statement_count = 0
+
+    def add_statement(self, statement: str, duration: float) -> None:
+        """Record one SQL statement."""
+        self.db_time += duration
+        self.statement_count += 1
+        if len(self.statements) < MAX_STATEMENTS:
+            self.statements.append((statement, duration))
+
+
+def record_queue_wait(seconds: float) -> None:
+    """Add worker-pool queue wait to the current request's trace."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.queue_wait += seconds
+
+
+def hash_username(username: str) -> str:
+    """Return a short, stable hash identifying username without exposing it.
+
+    The hash is keyed with SECRET_KEY, so usernames cannot be recovered from
+    it by hashing candidate names.
+    """
+    digest = hmac.new(settings.secret_key.encode("utf-8"), username.encode("utf-8"), hashlib.blake2b).digest()
+    return digest[:8].hex()
+
+
+class FlightRecorder:
+    """Bounded ring buffer of slow request records."""
+
+    def __init__(self, capacity: int, threshold_seconds: float, log_entries: bool = False):
+        """Initialize an empty recorder."""
+        self.threshold_seconds = threshold_seconds
+        self.log_entries = log_entries
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Keep entry, dropping the oldest one when full."""
+        self._entries.append(entry)
+        SLOW_REQUESTS.labels(route=entry["route"]).inc()
+        if self.log_entries:
+            logger.warning("Slow request: %s", json.dumps(entry))
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Return recorded entries, newest first."""
+        return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+class FlightRecorderMiddleware:
+    """ASGI middleware tracing each request and recording the slow ones."""
+
+    def __init__(self, app: ASGIApp, recorder: "FlightRecorder"):
+        """Initialize the middleware around app."""
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Trace the request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            _current_trace.reset(token)
+            if duration >= self.recorder.threshold_seconds:
+                self.recorder.record(self._entry(scope, status_code, duration, trace))
+
+    @staticmethod
+    def _entry(scope: Scope, status_code: int, duration: float, trace: RequestTrace) -> Dict[str, Any]:
+        """Build the record for a slow request."""
+        username = scope.get("path_params", {}).get("username")
+        return {
+            "recorded_at": time.time(),
+            "method": scope["method"],
+            "route": route_template(scope),
+            "status_code": status_code,
+            "username_hash": hash_username(username) if username else None,
+            "total_ms": duration * 1000,
+            "db_ms": trace.db_time * 1000,
+            "queue_wait_ms": trace.queue_wait * 1000,
+            "statement_count": trace.statement_count,
+            "statements": [
+                {"sql": statement, "duration_ms": statement_duration * 1000}
+                for statement, statement_duration in trace.statements
+            ],
+        }
+
+
+def instrument_engine(db_engine: Engine) -> None:
+    """Add db_engine's statements to the trace of the request running them."""
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        if _current_trace.get() is not None:
+            conn.info["flight_recorder_started_at"] = time.perf_counter()
+
+    @event.listens_for(db_engine, "after_cursor_execute")
+    def end_statement(conn, cursor, statement, parameters, context, executemany):
+        trace = _current_trace.get()
+        started_at = conn.info.pop("flight_recorder_started_at", None)
+        if trace is not None and started_at is not None:
+            trace.add_statement(statement, time.perf_counter() - started_at)
+
+
+# Global recorder instance
+flight_recorder = FlightRecorder(
+    capacity=settings.flight_recorder_capacity,
+    threshold_seconds=settings.flight_recorder_threshold_ms / 1000,
+    log_entries=settings.flight_recorder_log_entries,
+)
@@ -0,0 +1,299 @@
+"""Idempotency keys for retried writes.
+
+A client that sends an ``Idempotency-Key`` header gets the same response
+for every retry of a request. Only the first request runs the handler. A
+retry after it completed gets the stored response without touching the
+database. A retry that arrives while the first request is still running
+waits for it instead of running the write again. Keys are kept in a
+bounded in-process LRU with a TTL. An optional Redis backend extends
+deduplication across replicas: a replica that does not hold the key
+locally claims it in Redis, or polls Redis until the owner has stored the
+response.
+
+Server errors (5xx and exceptions) are not stored, so a retry after one of
+them runs the write again.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from prometheus_client import Counter, Gauge
+from starlette.responses import JSONResponse, Response
+
+from app.core.config import settings
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_REQUESTS = Counter(
+    'idempotency_requests_total',
+    'Requests carrying an Idempotency-Key, by outcome (replayed and waited are dedup hits)',
+    ['outcome']
+)
+
+IDEMPOTENCY_ENTRIES = Gauge(
+    'idempotency_entries',
+    'Idempotency keys held in this process'
+)
+
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse(NamedTuple):
+    """Response kept for replay."""
+
+    status_code: int
+    body: bytes
+    media_type: Optional[str]
+
+    def to_response(self) -> Response:
+        """Rebuild the response, marked as a replay."""
+        return Response(
+            self.body, status_code=self.status_code, media_type=self.media_type,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+def fingerprint(payload: str) -> str:
+    """Return a short digest identifying a request payload."""
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def scoped_key(idempotency_key: str, scope: str) -> str:
+    """Validate a client's Idempotency-Key and scope it to one resource, e.g. "PUT /hello/alice"."""
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters",
+        )
+    return f"{scope} {idempotency_key}"
+
+
+def _mismatch() -> HTTPException:
+    """Error for a key reused with a different request."""
+    IDEMPOTENCY_REQUESTS.labels(outcome="mismatch").inc()
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Idempotency-Key was already used with a different request",
+    )
+
+
+def _still_running() -> HTTPException:
+    """Error for a duplicate that gave up waiting on the original."""
+    IDEMPOTENCY_REQUESTS.labels(outcome="wait_timeout").inc()
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress",
+    )
+
+
+class _Entry:
+    """State of one key in this process."""
+
+    __slots__ = ("fingerprint", "expires_at", "response", "done")
+
+    def __init__(self, fingerprint: str, expires_at: float, response: Optional[StoredResponse] = None):
+        """Initialize an in-progress entry, or a completed one when response is given."""
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.response = response
+        self.done = asyncio.Event()
+        if response is not None:
+            self.done.set()
+
+
+class RedisIdempotencyBackend:
+    """Idempotency keys shared between replicas through Redis.
+
+    A key is claimed with SET NX and a short lock TTL, so a replica that
+    dies mid-request frees it. The completed response then replaces the
+    claim with the full TTL.
+    """
+
+    def __init__(self, client: Any, prefix: str = "idempotency:", lock_seconds: float = 30.0,
+                 poll_interval: float = 0.05):
+        """Initialize the backend on an asyncio Redis client."""
+        self.client = client
+        self.prefix = prefix
+        self.lock_seconds = lock_seconds
+        self.poll_interval = poll_interval
+
+    async def claim(self, key: str, request_fingerprint: str, wait_seconds: float) -> Optional[StoredResponse]:
+        """Claim key for this request, or return the response stored for it by another replica."""
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            claimed = await self.client.set(
+                self.prefix + key, json.dumps({"f": request_fingerprint}),
+                nx=True, px=int(self.lock_seconds * 1000),
+            )
+            if claimed:
+                return None
+            raw = await self.client.get(self.prefix + key)
+            if raw is not None:
+                record = json.loads(raw)
+                if record["f"] != request_fingerprint:
+                    raise _mismatch()
+                if "s" in record:
+                    return StoredResponse(record["s"], record["b"].encode("utf-8"), record["m"])
+            if time.monotonic() >= deadline:
+                raise _still_running()
+            await asyncio.sleep(self.poll_interval)
+
+    async def complete(self, key: str, request_fingerprint: str, response: StoredResponse, ttl_seconds: float) -> None:
+        """Store the response for key."""
+        record = {
+            "f": request_fingerprint,
+            "s": response.status_code,
+            "b": response.body.decode("utf-8"),
+            "m": response.media_type,
+        }
+        await self.client.set(self.prefix + key, json.dumps(record), px=int(ttl_seconds * 1000))
+
+    async def release(self, key: str) -> None:
+        """Drop the claim on key after a failed request."""
+        await self.client.delete(self.prefix + key)
+
+
+class IdempotencyStore:
+    """Bounded in-process idempotency store with an optional shared backend."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, wait_seconds: float,
+                 backend: Optional[RedisIdempotencyBackend] = None):
+        """Initialize an empty store."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.backend = backend
+        # Only touched from the event loop, so no lock is needed
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    async def execute(self, key: str, request_fingerprint: str,
+                      handler: Callable[[], Awaitable[Response]]) -> Response:
+        """Run handler once per key and fingerprint, replaying its response to repeats."""
+        while True:
+            entry = self._get(key)
+            if entry is None:
+                break
+            if entry.fingerprint != request_fingerprint:
+                raise _mismatch()
+            if entry.response is not None:
+                IDEMPOTENCY_REQUESTS.labels(outcome="replayed").inc()
+                return entry.response.to_response()
+            try:
+                await asyncio.wait_for(entry.done.wait(), self.wait_seconds)
+            except asyncio.TimeoutError:
+                raise _still_running()
+            if entry.response is not None:
+                IDEMPOTENCY_REQUESTS.labels(outcome="waited").inc()
+                return entry.response.to_response()
+            # The original failed and released the key; try again
+
+        if self.backend is not None:
+            stored = await self._claim_shared(key, request_fingerprint)
+            if stored is not None:
+                self._put(key, _Entry(request_fingerprint, time.monotonic() + self.ttl_seconds, stored))
+                IDEMPOTENCY_REQUESTS.labels(outcome="replayed").inc()
+                return stored.to_response()
+
+        entry = _Entry(request_fingerprint, time.monotonic() + self.ttl_seconds)
+        self._put(key, entry)
+        IDEMPOTENCY_REQUESTS.labels(outcome="executed").inc()
+        try:
+            try:
+                response = await handler()
+            except HTTPException as e:
+                # Client errors are as repeatable as successes
+                response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+        except BaseException:
+            await self._release(key, entry)
+            raise
+        if response.status_code >= 500:
+            await self._release(key, entry)
+            return response
+
+        entry.response = StoredResponse(response.status_code, bytes(response.body), response.media_type)
+        entry.done.set()
+        if self.backend is not None:
+            try:
+                await self.backend.complete(key, request_fingerprint, entry.response, self.ttl_seconds)
+            except Exception:
+                logger.warning("Failed to store idempotent response in the shared backend", exc_info=True)
+        return response
+
+    async def _claim_shared(self, key: str, request_fingerprint: str) -> Optional[StoredResponse]:
+        """Claim key in the shared backend; backend outages degrade to local deduplication."""
+        try:
+            return await self.backend.claim(key, request_fingerprint, self.wait_seconds)
+        except HTTPException:
+            raise
+        except Exception:
+            logger.warning("Idempotency backend unavailable, deduplicating locally only", exc_info=True)
+            IDEMPOTENCY_REQUESTS.labels(outcome="backend_error").inc()
+            return None
+
+    async def _release(self, key: str, entry: _Entry) -> None:
+        """Forget a key whose request failed and wake its waiters."""
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+        entry.done.set()
+        IDEMPOTENCY_ENTRIES.set(len(self._entries))
+        if self.backend is not None:
+            try:
+                await self.backend.release(key)
+            except Exception:
+                logger.warning("Failed to release idempotency key in the shared backend", exc_info=True)
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        """Return the live entry for key, dropping it if expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic() and entry.response is not None:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: str, entry: _Entry) -> None:
+        """Add entry, evicting the least recently used keys beyond max_entries."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        IDEMPOTENCY_ENTRIES.set(len(self._entries))
+
+    def __len__(self) -> int:
+        """Return the number of keys held."""
+        return len(self._entries)
+
+
+def create_idempotency_store() -> IdempotencyStore:
+    """Create the store for the configured backend."""
+    backend = None
+    if settings.idempotency_backend == "redis":
+        backend = RedisIdempotencyBackend(get_async_redis())
+    return IdempotencyStore(
+        max_entries=settings.idempotency_max_entries,
+        ttl_seconds=settings.idempotency_ttl_seconds,
+        wait_seconds=settings.idempotency_wait_timeout_ms / 1000,
+        backend=backend,
+    )
+
+
+# Global store instance, created on first use
+idempotency_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> Optional[IdempotencyStore]:
+    """Get the idempotency store when idempotency keys are enabled."""
+    global idempotency_store
+    if not settings.idempotency_enabled:
+        return None
+    if idempotency_store is None:
+        idempotency_store = create_idempotency_store()
+    return idempotency_store
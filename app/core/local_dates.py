@@ -0,0 +1,65 @@
+"""Current local date per IANA time zone.
+
+Birthday messages depend on the caller's date, not the server's. The
+date in each zone changes once a day, so it is computed once and cached
+together with the moment of that zone's next midnight. After that, a
+request costs a dictionary lookup and a comparison. Only zones that exist
+are cached, so the cache holds at most a few hundred entries whatever
+clients send.
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Longest IANA zone name is under 40 characters
+MAX_ZONE_NAME_LENGTH = 64
+
+
+class LocalDates:
+    """Cache of today's date per time zone, valid until the zone's next midnight."""
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._dates: Dict[str, Tuple[date, float]] = {}
+
+    def today(self, zone_name: str, now: Optional[float] = None) -> date:
+        """Return the current date in zone_name; raises ValueError for an unknown zone."""
+        if now is None:
+            now = time.time()
+        cached = self._dates.get(zone_name)
+        if cached is not None and now < cached[1]:
+            return cached[0]
+
+        zone = self._zone(zone_name)
+        today = datetime.fromtimestamp(now, zone).date()
+        # Where a DST change skips or repeats midnight, fold=0 still resolves
+        # it to the first instant of the new day
+        next_midnight = datetime.combine(today + timedelta(days=1), datetime.min.time(), tzinfo=zone)
+        self._dates[zone_name] = (today, next_midnight.timestamp())
+        return today
+
+    @staticmethod
+    def _zone(zone_name: str) -> ZoneInfo:
+        """Load a zone, mapping every kind of bad name to ValueError."""
+        if not zone_name or len(zone_name) > MAX_ZONE_NAME_LENGTH:
+            raise ValueError("Unknown time zone")
+        try:
+            return ZoneInfo(zone_name)
+        except (ZoneInfoNotFoundError, ValueError, OSError):
+            raise ValueError("Unknown time zone")
+
+    def __len__(self) -> int:
+        """Return the number of cached zones."""
+        return len(self._dates)
+
+
+# Global cache instance
+local_dates = LocalDates()
+
+
+def today_in(zone_name: Optional[str]) -> date:
+    """Return today's date in zone_name, or the server's date when no zone is given."""
+    if zone_name is None:
+        return date.today()
+    return local_dates.today(zone_name)
@@ -0,0 +1,180 @@
+"""Statistical sampling profiler for live processes.
+
+A background thread snapshots every thread's stack with
+``sys._current_frames()`` at a fixed interval and counts identical stacks.
+The output is either the collapsed-stack text read by flamegraph.pl and
+most flame graph viewers, or a speedscope JSON file. Nothing is sampled
+unless a profile is running.
+"""
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from types import CodeType
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Samples whose innermost frame is in one of these modules are idle threads
+# (worker threads waiting for work, the event loop waiting in select)
+IDLE_MODULES = tuple(f"{name}.py" for name in ("threading", "queue", "selectors"))
+
+MAX_STORED_PROFILES = 32
+
+# Only one on-demand profile runs at a time
+profile_lock = threading.Lock()
+
+_request_threads: ContextVar[Optional[Set[int]]] = ContextVar("profiled_request_threads", default=None)
+
+
+class SamplingProfiler:
+    """Samples thread stacks until stopped."""
+
+    def __init__(self, interval: float, thread_ids: Optional[Set[int]] = None):
+        """Initialize the profiler; only thread_ids are sampled when given."""
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks: "Counter[Tuple[str, ...]]" = Counter()
+        self.duration = 0.0
+        self._labels: Dict[CodeType, str] = {}
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.duration = time.perf_counter() - self._started_at
+
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        own_id = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            self.sample(own_id)
+
+    def sample(self, own_id: Optional[int] = None) -> None:
+        """Record the current stack of every sampled thread."""
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                continue
+            if frame.f_code.co_filename.endswith(IDLE_MODULES):
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+
+    def _label(self, code: CodeType) -> str:
+        """Return a frame label such as ``get_user (app/services/user_service.py:42)``."""
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def collapsed(self) -> str:
+        """Return samples in collapsed-stack format, one ``a;b;c count`` line per stack."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self, name: str = "birthday-api") -> Dict[str, Any]:
+        """Return samples as a speedscope sampled profile."""
+        frame_index: Dict[str, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self.stacks.items():
+            indexes = []
+            for label in stack:
+                if label not in frame_index:
+                    function, _, location = label.partition(" (")
+                    file, _, line = location.rstrip(")").rpartition(":")
+                    frame_index[label] = len(frames)
+                    frames.append({"name": function, "file": file, "line": int(line)})
+                indexes.append(frame_index[label])
+            samples.append(indexes)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "birthday-api",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+# Per-request profiles by id, oldest dropped first
+stored_profiles: "OrderedDict[str, SamplingProfiler]" = OrderedDict()
+
+
+def store_profile(profile_id: str, profiler: SamplingProfiler) -> None:
+    """Keep a finished per-request profile for later retrieval."""
+    stored_profiles[profile_id] = profiler
+    while len(stored_profiles) > MAX_STORED_PROFILES:
+        stored_profiles.popitem(last=False)
+
+
+def register_request_thread() -> None:
+    """Add the calling thread to the profile of the current request, if any."""
+    thread_ids = _request_threads.get()
+    if thread_ids is not None:
+        thread_ids.add(threading.get_ident())
+
+
+class RequestProfilingMiddleware:
+    """ASGI middleware profiling requests sent with an ``X-Profile`` header.
+
+    Samples the event loop thread and the worker threads the request runs
+    on, stores the result and returns its id in ``X-Profile-Id``. Other
+    requests running at the same time on those threads show up too, so it
+    is meant for debug deployments, not production traffic.
+    """
+
+    def __init__(self, app: ASGIApp, interval: float):
+        """Initialize the middleware around app."""
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Profile the request if asked to."""
+        if scope["type"] != "http" or not any(name == b"x-profile" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        thread_ids = {threading.get_ident()}
+        profiler = SamplingProfiler(self.interval, thread_ids)
+        token = _request_threads.set(thread_ids)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            _request_threads.reset(token)
+            store_profile(profile_id, profiler)
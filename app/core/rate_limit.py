@@ -0,0 +1,176 @@
+"""Per-client rate limiting with token buckets.
+
+Admission control protects the pod as a whole. It sheds load from every
+client alike, so one misbehaving integration can get everyone else
+rejected. Rate limiting stops that client first: each client gets its own
+token buckets, one for reads and one for writes, and a request that finds
+its bucket empty gets 429 with ``Retry-After``.
+
+Clients are identified by an API key listed in the settings, and
+otherwise by IP address. An unknown API key counts as no key, so clients
+cannot get fresh buckets by inventing keys. Each listed key belongs to a
+tier whose multiplier scales both budgets.
+
+Buckets live in an LRU bounded by ``max_clients``. Evicting a client
+forgets its bucket. The least recently seen client has usually been idle
+long enough to be back at a full bucket anyway.
+"""
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.admission import READ_METHODS
+
+RATE_LIMITED = Counter(
+    'rate_limit_throttled_total',
+    'Requests rejected by per-client rate limiting',
+    ['tier', 'request_class']
+)
+
+RATE_LIMIT_CLIENTS = Gauge(
+    'rate_limit_clients',
+    'Clients with token buckets held in this process'
+)
+
+RATE_LIMIT_EVICTIONS = Counter(
+    'rate_limit_evictions_total',
+    'Client buckets evicted to stay within the client limit'
+)
+
+IP_TIER = "ip"
+
+
+class _Buckets:
+    """Read and write token counts of one client."""
+
+    __slots__ = ("read", "write", "updated_at")
+
+    def __init__(self, read: float, write: float, updated_at: float):
+        """Initialize full buckets."""
+        self.read = read
+        self.write = write
+        self.updated_at = updated_at
+
+
+class TokenBucketLimiter:
+    """LRU-bounded token buckets per client for reads and writes."""
+
+    def __init__(self, read_rate: float, read_burst: float, write_rate: float, write_burst: float,
+                 max_clients: int):
+        """Initialize with per-second refill rates and bucket sizes."""
+        self.budgets: Dict[str, Tuple[float, float]] = {
+            "read": (read_rate, read_burst),
+            "write": (write_rate, write_burst),
+        }
+        self.max_clients = max_clients
+        # Only touched from the event loop, so no lock is needed
+        self._clients: "OrderedDict[str, _Buckets]" = OrderedDict()
+
+    def acquire(self, client: str, request_class: str, multiplier: float = 1.0,
+                now: Optional[float] = None) -> float:
+        """Take a token; return 0 if granted, else seconds until one is available."""
+        if now is None:
+            now = time.monotonic()
+        read_rate, read_burst = self.budgets["read"]
+        write_rate, write_burst = self.budgets["write"]
+        buckets = self._clients.get(client)
+        if buckets is None:
+            buckets = self._clients[client] = _Buckets(read_burst * multiplier, write_burst * multiplier, now)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                RATE_LIMIT_EVICTIONS.inc()
+            RATE_LIMIT_CLIENTS.set(len(self._clients))
+        else:
+            self._clients.move_to_end(client)
+            elapsed = now - buckets.updated_at
+            if elapsed > 0:
+                buckets.read = min(read_burst * multiplier, buckets.read + elapsed * read_rate * multiplier)
+                buckets.write = min(write_burst * multiplier, buckets.write + elapsed * write_rate * multiplier)
+                buckets.updated_at = now
+
+        tokens = getattr(buckets, request_class)
+        if tokens >= 1:
+            setattr(buckets, request_class, tokens - 1)
+            return 0.0
+        rate = self.budgets[request_class][0] * multiplier
+        return (1 - tokens) / rate if rate > 0 else math.inf
+
+    def __len__(self) -> int:
+        """Return the number of clients held."""
+        return len(self._clients)
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-client token buckets to selected paths."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: TokenBucketLimiter,
+        api_key_header: str = "x-api-key",
+        api_key_tiers: Optional[Dict[str, str]] = None,
+        tier_multipliers: Optional[Dict[str, float]] = None,
+        trust_forwarded_for: bool = False,
+        paths: Tuple[str, ...] = ("/hello",),
+    ):
+        """Initialize the middleware around app."""
+        self.app = app
+        self.limiter = limiter
+        self.api_key_header = api_key_header.lower().encode("latin-1")
+        self.api_key_tiers = api_key_tiers or {}
+        self.tier_multipliers = tier_multipliers or {}
+        self.trust_forwarded_for = trust_forwarded_for
+        self.paths = paths
+        # Match whole path segments, so /hello covers /hello/alice but not /hellos
+        self._prefixes = tuple(path.rstrip("/") + "/" for path in paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Pass the request on, or reject it with 429 when its bucket is empty."""
+        if scope["type"] != "http" or not (scope["path"] in self.paths or scope["path"].startswith(self._prefixes)):
+            await self.app(scope, receive, send)
+            return
+
+        client, tier = self.identify(scope)
+        request_class = "read" if scope["method"] in READ_METHODS else "write"
+        retry_after = self.limiter.acquire(client, request_class, self.tier_multipliers.get(tier, 1.0))
+        if retry_after > 0:
+            RATE_LIMITED.labels(tier=tier, request_class=request_class).inc()
+            await self._reject(send, retry_after)
+            return
+        await self.app(scope, receive, send)
+
+    def identify(self, scope: Scope) -> Tuple[str, str]:
+        """Return the (client key, tier) of a request."""
+        forwarded_for = None
+        for name, value in scope["headers"]:
+            if name == self.api_key_header:
+                api_key = value.decode("latin-1")
+                tier = self.api_key_tiers.get(api_key)
+                if tier is not None:
+                    return "key " + api_key, tier
+            elif name == b"x-forwarded-for" and self.trust_forwarded_for:
+                forwarded_for = value.decode("latin-1").split(",")[0].strip()
+        if forwarded_for:
+            return "ip " + forwarded_for, IP_TIER
+        client = scope.get("client")
+        return "ip " + (client[0] if client else "unknown"), IP_TIER
+
+    async def _reject(self, send: Send, retry_after: float) -> None:
+        """Send a 429 response telling the client when to retry."""
+        body = json.dumps({"detail": "Rate limit exceeded, retry later"}).encode()
+        retry_seconds = str(max(1, math.ceil(retry_after))) if math.isfinite(retry_after) else "60"
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", retry_seconds.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
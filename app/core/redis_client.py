@@ -0,0 +1,48 @@
+"""Optional Redis connection for state shared between replicas.
+
+redis-py is an optional dependency; it is only imported when REDIS_URL is
+set and a feature is configured to use it.
+"""
+from typing import Any, Optional
+
+from app.core.config import settings
+
+try:
+    import redis
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - exercised only without redis installed
+    redis = None
+    redis_asyncio = None
+
+_client: Optional[Any] = None
+_async_client: Optional[Any] = None
+
+
+def _require_redis(module: Any) -> None:
+    """Fail clearly when Redis is not configured or not installed."""
+    if not settings.redis_url:
+        raise RuntimeError("REDIS_URL must be set to use a Redis backend")
+    if module is None:
+        raise RuntimeError("The redis package is required for Redis backends")
+
+
+def get_redis() -> Any:
+    """Get the process-wide Redis client for sync code, created on first use."""
+    global _client
+    if _client is None:
+        _require_redis(redis)
+        _client = redis.Redis.from_url(
+            settings.redis_url, socket_timeout=settings.redis_socket_timeout_ms / 1000
+        )
+    return _client
+
+
+def get_async_redis() -> Any:
+    """Get the process-wide asyncio Redis client, created on first use."""
+    global _async_client
+    if _async_client is None:
+        _require_redis(redis_asyncio)
+        _async_client = redis_asyncio.Redis.from_url(
+            settings.redis_url, socket_timeout=settings.redis_socket_timeout_ms / 1000
+        )
+    return _async_client
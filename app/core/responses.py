@@ -0,0 +1,58 @@
+"""Fast response classes and MessagePack content negotiation.
+
+Endpoints on hot paths return these responses directly. FastAPI then skips
+validating the result against ``response_model`` a second time; the model
+is still used for the OpenAPI schema. orjson and msgpack are optional: without
+orjson JSON is encoded by the standard library, and without msgpack clients
+asking for MessagePack get JSON.
+"""
+import json
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without msgpack installed
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is available."""
+
+    def render(self, content: Any) -> bytes:
+        """Encode content as compact JSON."""
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class MsgPackResponse(Response):
+    """MessagePack response."""
+
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        """Encode content as MessagePack."""
+        return msgpack.packb(content, default=str)
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """Return True if the client asked for MessagePack and it can be produced."""
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def negotiated_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """Encode plain content as MessagePack or JSON, following the Accept header."""
+    if accepts_msgpack(request):
+        return MsgPackResponse(content, status_code=status_code, headers={"Vary": "Accept"})
+    return FastJSONResponse(content, status_code=status_code, headers={"Vary": "Accept"})
@@ -0,0 +1,37 @@
+"""Background jobs run from the application lifespan."""
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(job: Callable[[], None], interval_seconds: float) -> None:
+    """Run a blocking job in the threadpool every ``interval_seconds``."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(job)
+        except Exception:
+            logger.exception("Background job %s failed", getattr(job, "__name__", job))
+
+
+def seconds_until_midnight(now: datetime) -> float:
+    """Return seconds from now until the next local midnight."""
+    return (datetime.combine(now.date() + timedelta(days=1), time.min) - now).total_seconds()
+
+
+async def run_at_date_rollover(job: Callable[[], None]) -> None:
+    """Run a blocking job in the threadpool each time the local date changes."""
+    while True:
+        today = date.today()
+        # Sleep in bounded steps so clock adjustments cannot make us miss the rollover
+        while date.today() == today:
+            await asyncio.sleep(min(60.0, seconds_until_midnight(datetime.now()) + 0.01))
+        try:
+            await run_in_threadpool(job)
+        except Exception:
+            logger.exception("Background job %s failed", getattr(job, "__name__", job))
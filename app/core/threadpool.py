@@ -0,0 +1,89 @@
+"""Instrumented worker thread pools for blocking request handling.
+
+Sync work for reads and writes runs in separate AnyIO capacity limiters
+(bulkheads), so a burst of slow writes cannot take every thread away from
+GETs. Each pool reports how long calls waited for a thread and how many of
+its tokens are in use.
+"""
+import time
+from typing import Callable, Optional, TypeVar
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+from prometheus_client import Gauge, Histogram
+
+from app.core import deadline
+from app.core.flight_recorder import record_queue_wait
+from app.core.profiler import register_request_thread
+from app.core.config import settings
+
+T = TypeVar("T")
+
+THREADPOOL_QUEUE_WAIT = Histogram(
+    'threadpool_queue_wait_seconds',
+    'Time calls waited for a worker thread',
+    ['pool'],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+THREADPOOL_TOKENS_IN_USE = Gauge(
+    'threadpool_tokens_in_use',
+    'Worker threads currently borrowed from the pool',
+    ['pool']
+)
+
+THREADPOOL_TOKENS_TOTAL = Gauge(
+    'threadpool_tokens_total',
+    'Worker threads available to the pool',
+    ['pool']
+)
+
+
+class InstrumentedThreadPool:
+    """Named capacity limiter that measures queue wait and token use."""
+
+    def __init__(self, name: str, total_tokens: int):
+        """Initialize the pool; the limiter is created on first use inside the event loop."""
+        self.name = name
+        self.total_tokens = total_tokens
+        self._limiter: Optional[CapacityLimiter] = None
+        self._queue_wait = THREADPOOL_QUEUE_WAIT.labels(pool=name)
+        self._tokens_in_use = THREADPOOL_TOKENS_IN_USE.labels(pool=name)
+        THREADPOOL_TOKENS_TOTAL.labels(pool=name).set(total_tokens)
+
+    @property
+    def limiter(self) -> CapacityLimiter:
+        """Get the capacity limiter, creating it if needed."""
+        if self._limiter is None:
+            self._limiter = CapacityLimiter(self.total_tokens)
+        return self._limiter
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Run func(*args) in a worker thread borrowed from this pool."""
+        limiter = self.limiter
+        submitted_at = time.perf_counter()
+
+        def call() -> T:
+            queue_wait = time.perf_counter() - submitted_at
+            self._queue_wait.observe(queue_wait)
+            record_queue_wait(queue_wait)
+            register_request_thread()
+            # Do not start work for a request that timed out while queued
+            deadline.check("threadpool")
+            self._tokens_in_use.set(limiter.borrowed_tokens)
+            try:
+                return func(*args)
+            finally:
+                self._tokens_in_use.set(limiter.borrowed_tokens - 1)
+
+        return await anyio.to_thread.run_sync(call, limiter=limiter)
+
+
+read_pool = InstrumentedThreadPool("read", settings.threadpool_read_size)
+write_pool = InstrumentedThreadPool("write", settings.threadpool_write_size)
+
+
+def configure_default_threadpool() -> None:
+    """Size AnyIO's default pool, used for sync dependencies and background jobs."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_default_size
+    THREADPOOL_TOKENS_TOTAL.labels(pool="default").set(settings.threadpool_default_size)
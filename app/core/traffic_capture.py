@@ -0,0 +1,191 @@
+"""Sampled capture of production traffic for replay.
+
+The capture middleware records a random sample of requests as fixed-size
+binary records. Each record holds the arrival time, method, route template
+and a hash of the username keyed with SECRET_KEY. Request bodies, query
+strings and usernames are never stored, and the hash keeps hot keys
+recognizable without exposing them.
+
+Records are buffered in memory and appended to the capture file by a
+background flush, so the event loop never writes to disk. When the buffer
+is full, new records are dropped and counted. ``benchmarks/replay.py``
+re-issues a capture against a test instance.
+
+File format: the 8-byte MAGIC, then a stream of records. A route record
+(kind 0) assigns a one-byte id to a route template before that id is
+first used. A request record (kind 1) is 19 bytes. Each process should
+write its own file; use ``{pid}`` in the path.
+"""
+import logging
+import os
+import random
+import struct
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+from prometheus_client import Counter
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.admission import route_template
+from app.core.config import settings
+from app.core.flight_recorder import hash_username
+
+logger = logging.getLogger(__name__)
+
+TRAFFIC_CAPTURED = Counter(
+    'traffic_capture_records_total',
+    'Requests recorded by traffic capture'
+)
+
+TRAFFIC_CAPTURE_DROPPED = Counter(
+    'traffic_capture_dropped_total',
+    'Sampled requests dropped because the capture buffer was full'
+)
+
+MAGIC = b"BDAYCAP1"
+METHODS = ("GET", "PUT", "POST", "DELETE", "PATCH", "HEAD", "OPTIONS")
+ROUTE_RECORD = struct.Struct("<BBB")
+REQUEST_RECORD = struct.Struct("<BdBB8s")
+NO_USERNAME = bytes(8)
+KIND_ROUTE = 0
+KIND_REQUEST = 1
+
+
+class CapturedRequest(NamedTuple):
+    """One request read back from a capture file."""
+
+    timestamp: float
+    method: str
+    route: str
+    username_hash: Optional[str]
+
+
+class TrafficCapture:
+    """Buffers sampled request records and appends them to a capture file."""
+
+    def __init__(self, path: str, sample_rate: float, max_buffered: int = 100000):
+        """Initialize the capture; the file is opened by the first flush."""
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_buffered = max_buffered
+        self._buffer: List[bytes] = []
+        self._buffered_requests = 0
+        self._route_ids: Dict[str, int] = {}
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+
+    def sampled(self) -> bool:
+        """Decide whether to record the next request."""
+        return random.random() < self.sample_rate
+
+    def record(self, timestamp: float, method: str, route: str, username: Optional[str]) -> None:
+        """Buffer one request record."""
+        if method not in METHODS:
+            return
+        with self._lock:
+            if self._buffered_requests >= self.max_buffered:
+                TRAFFIC_CAPTURE_DROPPED.inc()
+                return
+            route_id = self._route_ids.get(route)
+            if route_id is None:
+                if len(self._route_ids) > 255:
+                    return
+                route_id = self._route_ids[route] = len(self._route_ids)
+                encoded = route.encode("utf-8")[:255]
+                self._buffer.append(ROUTE_RECORD.pack(KIND_ROUTE, route_id, len(encoded)) + encoded)
+            username_digest = bytes.fromhex(hash_username(username)) if username else NO_USERNAME
+            self._buffer.append(REQUEST_RECORD.pack(
+                KIND_REQUEST, timestamp, METHODS.index(method), route_id, username_digest
+            ))
+            self._buffered_requests += 1
+        TRAFFIC_CAPTURED.inc()
+
+    def flush(self) -> None:
+        """Append buffered records to the capture file."""
+        with self._lock:
+            chunk, self._buffer = self._buffer, []
+            self._buffered_requests = 0
+        if not chunk:
+            return
+        if self._file is None:
+            self._file = self._open()
+        self._file.write(b"".join(chunk))
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the capture file."""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> BinaryIO:
+        """Open the capture file for appending, writing the header to a new file."""
+        if not self.path:
+            raise RuntimeError("TRAFFIC_CAPTURE_PATH must be set for traffic capture")
+        path = self.path.format(pid=os.getpid())
+        capture_file = open(path, "ab")
+        if capture_file.tell() == 0:
+            capture_file.write(MAGIC)
+        logger.info("Capturing %.2f%% of requests to %s", self.sample_rate * 100, path)
+        return capture_file
+
+
+def read_capture(path: str) -> Iterator[CapturedRequest]:
+    """Read the requests recorded in a capture file, in file order."""
+    with open(path, "rb") as capture_file:
+        data = capture_file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a traffic capture file")
+    routes: Dict[int, str] = {}
+    offset = len(MAGIC)
+    while offset < len(data):
+        kind = data[offset]
+        if kind == KIND_ROUTE:
+            _, route_id, length = ROUTE_RECORD.unpack_from(data, offset)
+            offset += ROUTE_RECORD.size
+            routes[route_id] = data[offset:offset + length].decode("utf-8")
+            offset += length
+        elif kind == KIND_REQUEST:
+            _, timestamp, method_id, route_id, username_digest = REQUEST_RECORD.unpack_from(data, offset)
+            offset += REQUEST_RECORD.size
+            yield CapturedRequest(
+                timestamp,
+                METHODS[method_id],
+                routes[route_id],
+                username_digest.hex() if username_digest != NO_USERNAME else None,
+            )
+        else:
+            raise ValueError(f"Corrupt capture record at byte {offset} of {path}")
+
+
+class TrafficCaptureMiddleware:
+    """ASGI middleware recording a sample of requests to a TrafficCapture."""
+
+    def __init__(self, app: ASGIApp, capture: TrafficCapture):
+        """Initialize the middleware around app."""
+        self.app = app
+        self.capture = capture
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Record the request if it is sampled."""
+        if scope["type"] != "http" or not self.capture.sampled():
+            await self.app(scope, receive, send)
+            return
+        arrived_at = time.time()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Routing has filled in path_params by now
+            self.capture.record(
+                arrived_at, scope["method"], route_template(scope), scope.get("path_params", {}).get("username")
+            )
+
+
+# Global capture instance
+traffic_capture = TrafficCapture(
+    path=settings.traffic_capture_path,
+    sample_rate=settings.traffic_capture_sample_rate,
+    max_buffered=settings.traffic_capture_max_buffered,
+)
@@ -0,0 +1,71 @@
+"""Username and date of birth rules, checked once per request.
+
+``UsernamePath`` and ``Username`` apply the username rule while FastAPI
+parses path parameters and bodies. ``UserCreate`` applies the date of
+birth rule the same way. Handlers pass the values to the service with
+validate=False, so nothing checks them again. The ``User`` model calls
+the same functions by default, for writers that bypass the API such as
+scripts and backfills.
+
+Broken rules raise ``PydanticCustomError``, which is a ValueError.
+``validation_exception_handler`` answers them with 400, the API's status
+for invalid usernames and dates. Malformed input, such as a string that
+is not a date, keeps FastAPI's 422.
+"""
+import re
+from datetime import date
+from typing import Annotated, Optional
+
+from fastapi import Path, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from pydantic import AfterValidator
+from pydantic_core import PydanticCustomError
+from starlette.responses import JSONResponse, Response
+
+from app.core.local_dates import local_dates
+
+USERNAME_MAX_LENGTH = 50
+USERNAME_RE = re.compile(r"[A-Za-z0-9_]{1,%d}" % USERNAME_MAX_LENGTH)
+
+# The first zone to reach a new day (UTC+14): a date of birth is only in the
+# future once it is after today everywhere
+EARLIEST_ZONE = "Pacific/Kiritimati"
+
+DOMAIN_ERROR_TYPES = frozenset(("invalid_username", "future_date_of_birth"))
+
+
+def check_username(username: str) -> str:
+    """Return username if it is valid; raise PydanticCustomError (a ValueError) otherwise."""
+    if USERNAME_RE.fullmatch(username):
+        return username
+    if not username:
+        message = "Username cannot be empty"
+    elif len(username) > USERNAME_MAX_LENGTH:
+        message = f"Username cannot be longer than {USERNAME_MAX_LENGTH} characters"
+    else:
+        message = "Username can only contain alphanumeric characters and underscores"
+    raise PydanticCustomError("invalid_username", message)
+
+
+def check_date_of_birth(date_of_birth: date, today: Optional[date] = None) -> date:
+    """Return date_of_birth unless it is in the future; raise PydanticCustomError otherwise."""
+    if today is None:
+        today = local_dates.today(EARLIEST_ZONE)
+    if date_of_birth > today:
+        raise PydanticCustomError("future_date_of_birth", "Date of birth cannot be in the future")
+    return date_of_birth
+
+
+Username = Annotated[str, AfterValidator(check_username)]
+UsernamePath = Annotated[Username, Path(description="Letters, digits and underscores, at most 50 characters")]
+# Wrapped so pydantic does not pass its ValidationInfo as today
+DateOfBirth = Annotated[date, AfterValidator(lambda date_of_birth: check_date_of_birth(date_of_birth))]
+
+
+async def validation_exception_handler(request: Request, exc: RequestValidationError) -> Response:
+    """Answer broken username and date rules with 400, other validation errors with 422."""
+    for error in exc.errors():
+        if error["type"] in DOMAIN_ERROR_TYPES:
+            return JSONResponse({"detail": error["msg"]}, status_code=400)
+    return await request_validation_exception_handler(request, exc)
@@ -1,11 +1,164 @@
 """Main FastAPI application."""
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import make_asgi_app, Counter, Histogram, Gauge
+from starlette.concurrency import run_in_threadpool
 import time
 
+from app.core.admission import AdmissionControlMiddleware
 from app.core.config import settings
-from app.api.v1.endpoints import hello
+from app.core.database import ReadSessionLocal, SessionLocal, checkpoint_sqlite_wal, engine, is_sqlite_file, read_engine
+from app.core.deadline import DeadlineExceeded, DeadlineMiddleware, deadline_exceeded_handler
+from app.core.flight_recorder import FlightRecorderMiddleware, flight_recorder, instrument_engine
+from app.core.profiler import RequestProfilingMiddleware
+from app.core.rate_limit import RateLimitMiddleware, TokenBucketLimiter
+from app.core.tasks import run_at_date_rollover, run_periodically
+from app.core.threadpool import configure_default_threadpool
+from app.core.traffic_capture import TrafficCaptureMiddleware, traffic_capture
+from app.core.validation import validation_exception_handler
+from app.api.deps import create_user_service, get_local_user_store
+from app.api.v1.endpoints import birthdays, debug, hello, stats, users
+from app.services.birthday_calendar import birthday_calendar, rebuild_birthday_calendar
+from app.services.birthday_stats import reconcile_birthday_stats_job
+from app.services.invalidation import InvalidationBus, create_invalidation_bus
+from app.services.retention import purge_inactive_users, retention_cutoff
+from app.services.user_cache import user_cache
+from app.services.username_filter import rebuild_username_filter, username_filter
+from app.services.username_search import load_username_prefix_index, username_prefix_index
+from app.storage.memory import load_memory_user_store
+from app.storage.shared_cache import with_shared_cache
+from app.storage.snapshot import refresh_snapshot_overlay
+from app.storage.sql import SQLUserStore
+
+
+def refresh_local_user_store(username: str) -> None:
+    """Reload a user changed by another replica into the local store."""
+    db = ReadSessionLocal()
+    try:
+        get_local_user_store().refresh(db, username)
+    finally:
+        db.close()
+
+
+def refresh_birthday_calendar(username: str) -> None:
+    """Reload a user changed by another replica into the birthday calendar."""
+    db = ReadSessionLocal()
+    try:
+        birthday_calendar.refresh(db, username)
+    finally:
+        db.close()
+
+
+def refresh_username_prefix_index(username: str) -> None:
+    """Re-check a username changed by another replica in the prefix index."""
+    db = ReadSessionLocal()
+    try:
+        username_prefix_index.refresh(db, username)
+    finally:
+        db.close()
+
+
+def purge_inactive_users_job() -> None:
+    """Run the retention purge, propagating deletes like request writes do."""
+    db = SessionLocal()
+    try:
+        store = get_local_user_store()
+        service = create_user_service(db, store if store is not None else with_shared_cache(SQLUserStore(db)))
+        purge_inactive_users(
+            service,
+            retention_cutoff(settings.user_retention_days),
+            batch_size=settings.retention_purge_batch_size,
+            pause_seconds=settings.retention_purge_pause_ms / 1000,
+        )
+    finally:
+        db.close()
+
+
+def subscribe_to_invalidations(bus: InvalidationBus) -> None:
+    """Keep this replica's in-process state current with other replicas' writes."""
+    if settings.user_cache_enabled:
+        bus.subscribe(user_cache.evict)
+    if settings.username_filter_enabled:
+        bus.subscribe(username_filter.add)
+    if get_local_user_store() is not None:
+        bus.subscribe(refresh_local_user_store)
+    if settings.birthday_calendar_enabled:
+        bus.subscribe(refresh_birthday_calendar)
+    if settings.username_search_backend == "memory":
+        bus.subscribe(refresh_username_prefix_index)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background jobs."""
+    background_tasks = []
+    configure_default_threadpool()
+
+    if settings.sqlite_tuned and is_sqlite_file(settings.get_database_url):
+        background_tasks.append(asyncio.create_task(run_periodically(
+            checkpoint_sqlite_wal, settings.sqlite_checkpoint_interval_seconds
+        )))
+
+    if settings.username_filter_enabled:
+        await run_in_threadpool(rebuild_username_filter)
+        background_tasks.append(asyncio.create_task(run_periodically(
+            rebuild_username_filter, settings.username_filter_rebuild_interval_seconds
+        )))
+
+    if settings.user_store_backend == "memory":
+        await run_in_threadpool(load_memory_user_store)
+        background_tasks.append(asyncio.create_task(run_periodically(
+            load_memory_user_store, settings.user_store_reload_interval_seconds
+        )))
+    elif settings.user_store_backend == "snapshot":
+        await run_in_threadpool(refresh_snapshot_overlay)
+        background_tasks.append(asyncio.create_task(run_periodically(
+            refresh_snapshot_overlay, settings.user_store_reload_interval_seconds
+        )))
+
+    if settings.username_search_backend == "memory":
+        await run_in_threadpool(load_username_prefix_index)
+        background_tasks.append(asyncio.create_task(run_periodically(
+            load_username_prefix_index, settings.username_search_reload_interval_seconds
+        )))
+
+    if settings.birthday_calendar_enabled:
+        await run_in_threadpool(rebuild_birthday_calendar)
+        background_tasks.append(asyncio.create_task(run_at_date_rollover(rebuild_birthday_calendar)))
+
+    if settings.birthday_stats_reconcile_interval_seconds > 0:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            reconcile_birthday_stats_job, settings.birthday_stats_reconcile_interval_seconds
+        )))
+
+    if settings.user_retention_days > 0:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            purge_inactive_users_job, settings.retention_purge_interval_seconds
+        )))
+
+    if settings.traffic_capture_enabled:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            traffic_capture.flush, settings.traffic_capture_flush_interval_seconds
+        )))
+
+    invalidation_bus = create_invalidation_bus()
+    if invalidation_bus is not None:
+        subscribe_to_invalidations(invalidation_bus)
+        invalidation_bus.start()
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    if invalidation_bus is not None:
+        await run_in_threadpool(invalidation_bus.stop)
+    if settings.traffic_capture_enabled:
+        await run_in_threadpool(traffic_capture.close)
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -14,6 +167,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -25,6 +179,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
 # Add metrics middleware
 @app.middleware("http")
 async def metrics_middleware(request, call_next):
@@ -53,6 +208,60 @@ async def metrics_middleware(request, call_next):
     
     return response
 
+# Add admission control outermost so shed requests cost as little as possible
+if settings.admission_control_enabled:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        read_max_concurrency=settings.admission_read_max_concurrency,
+        write_max_concurrency=settings.admission_write_max_concurrency,
+        max_queue_length=settings.admission_max_queue_length,
+        max_queue_time=settings.admission_max_queue_time_ms / 1000,
+        retry_after_seconds=settings.admission_retry_after_seconds,
+    )
+
+# Add per-client rate limiting outside admission control so throttled
+# clients never take an admission slot
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=TokenBucketLimiter(
+            read_rate=settings.rate_limit_read_per_second,
+            read_burst=settings.rate_limit_read_burst,
+            write_rate=settings.rate_limit_write_per_second,
+            write_burst=settings.rate_limit_write_burst,
+            max_clients=settings.rate_limit_max_clients,
+        ),
+        api_key_header=settings.rate_limit_api_key_header,
+        api_key_tiers=settings.rate_limit_api_key_tiers,
+        tier_multipliers=settings.rate_limit_tier_multipliers,
+        trust_forwarded_for=settings.rate_limit_trust_forwarded_for,
+    )
+
+# Add deadlines outside admission control so queueing counts against the budget
+if settings.request_deadline_ms or settings.request_deadline_route_ms:
+    app.add_middleware(
+        DeadlineMiddleware,
+        default_ms=settings.request_deadline_ms,
+        route_ms=settings.request_deadline_route_ms,
+    )
+app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+app.add_exception_handler(RequestValidationError, validation_exception_handler)
+
+# Add the flight recorder outermost so recorded times include queueing
+if settings.flight_recorder_enabled:
+    instrument_engine(engine)
+    if read_engine is not engine:
+        instrument_engine(read_engine)
+    app.add_middleware(FlightRecorderMiddleware, recorder=flight_recorder)
+
+# Sampled traffic capture, outermost so timestamps are arrival times
+if settings.traffic_capture_enabled:
+    app.add_middleware(TrafficCaptureMiddleware, capture=traffic_capture)
+
+# Per-request profiling with the X-Profile header, debug deployments only
+if settings.debug:
+    app.add_middleware(RequestProfilingMiddleware, interval=settings.profiler_sample_interval_ms / 1000)
+
 # Prometheus metrics
 metrics_app = make_asgi_app()
 app.mount("/metrics", metrics_app)
@@ -78,6 +287,10 @@ ACTIVE_REQUESTS = Gauge(
 
 # Include API routers
 app.include_router(hello.router, tags=["hello"])
+app.include_router(birthdays.router, tags=["birthdays"])
+app.include_router(users.router, tags=["users"])
+app.include_router(stats.router, tags=["stats"])
+app.include_router(debug.router, tags=["debug"])
 
 
 @app.get("/")
@@ -0,0 +1,18 @@
+"""Birthday distribution counter model."""
+from sqlalchemy import Column, Integer, SmallInteger
+
+from app.core.database import Base
+
+
+class BirthdayStat(Base):
+    """Number of users born on a given month and day."""
+
+    __tablename__ = "birthday_stats"
+
+    month = Column(SmallInteger, primary_key=True, autoincrement=False)
+    day = Column(SmallInteger, primary_key=True, autoincrement=False)
+    user_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """String representation of BirthdayStat."""
+        return f"<BirthdayStat(month={self.month}, day={self.day}, user_count={self.user_count})>"
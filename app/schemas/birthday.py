@@ -0,0 +1,27 @@
+"""Pydantic schemas for birthday listings."""
+from datetime import date
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+
+class BirthdayList(BaseModel):
+    """Schema for a page of users celebrating on a day."""
+    date: date
+    usernames: List[str]
+    next_cursor: Optional[str] = None
+
+
+class DayCount(BaseModel):
+    """Schema for the number of users born on a month and day."""
+    month: int
+    day: int
+    count: int
+
+
+class BirthdayStats(BaseModel):
+    """Schema for the birthday distribution."""
+    total: int
+    by_month: Dict[int, int]
+    by_day: List[DayCount]
+    upcoming_days: int
+    upcoming_count: int
@@ -0,0 +1,23 @@
+"""Pydantic schemas for debug endpoints."""
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class SlowStatement(BaseModel):
+    """Schema for a SQL statement run by a slow request."""
+    sql: str
+    duration_ms: float
+
+
+class SlowRequest(BaseModel):
+    """Schema for a request recorded by the flight recorder."""
+    recorded_at: float
+    method: str
+    route: str
+    status_code: int
+    username_hash: Optional[str] = None
+    total_ms: float
+    db_ms: float
+    queue_wait_ms: float
+    statement_count: int
+    statements: List[SlowStatement]
@@ -1,45 +1,52 @@
 """Pydantic schemas for user data validation."""
-from datetime import date
-from typing import Optional
-from pydantic import BaseModel, field_validator
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from app.core.validation import DateOfBirth, Username
 
 
 class UserCreate(BaseModel):
     """Schema for creating a user."""
-    dateOfBirth: date
-    
-    @field_validator('dateOfBirth')
-    @classmethod
-    def validate_date_of_birth(cls, v):
-        """Validate that date of birth is not in the future."""
-        # Allow dates up to today (for testing purposes and edge cases)
-        # In a real application, you might want to be more restrictive
-        return v
+    dateOfBirth: DateOfBirth
 
 
 class UserUpdate(BaseModel):
     """Schema for updating a user."""
-    dateOfBirth: date
-    
-    @field_validator('dateOfBirth')
-    @classmethod
-    def validate_date_of_birth(cls, v):
-        """Validate that date of birth is not in the future."""
-        # Allow dates up to today (for testing purposes and edge cases)
-        # In a real application, you might want to be more restrictive
-        return v
+    dateOfBirth: DateOfBirth
+
+
+class BirthdayMessagesRequest(BaseModel):
+    """Schema for requesting birthday messages for many users."""
+    usernames: List[Username] = Field(..., min_length=1, max_length=1000)
+
+
+class BirthdayMessages(BaseModel):
+    """Schema for birthday messages by username; unknown users map to null."""
+    messages: Dict[str, Optional[str]]
 
 
 class UserResponse(BaseModel):
     """Schema for user response."""
     username: str
     date_of_birth: date
-    created_at: Optional[date] = None
-    updated_at: Optional[date] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     
     model_config = {"from_attributes": True}
 
 
+class UserPage(BaseModel):
+    """Schema for a page of users."""
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+
 class BirthdayMessage(BaseModel):
     """Schema for birthday message response."""
-    message: str 
\ No newline at end of file
+    message: str 
+
+
+class UsernameSearchResult(BaseModel):
+    """Schema for username prefix search results."""
+    usernames: List[str]
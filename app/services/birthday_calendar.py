@@ -0,0 +1,186 @@
+"""Materialized sets of users whose birthday is yesterday, today or tomorrow.
+
+Yesterday and tomorrow are there for callers in time zones whose local date
+differs from the server's. The sets are rebuilt by a scan when the date rolls over and kept current by
+UserService writes in between, so "who has a birthday today?" and the
+"Happy birthday!" check for a known user cost a set lookup instead of a
+query.
+"""
+import bisect
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import and_, extract, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_USERS = Gauge(
+    'birthday_calendar_users',
+    'Users in the materialized birthday sets',
+    ['day']
+)
+
+CALENDAR_REBUILD_DURATION = Histogram(
+    'birthday_calendar_rebuild_duration_seconds',
+    'Time spent rebuilding the birthday sets'
+)
+
+
+def birthdays_on(day: date) -> List[Tuple[int, int]]:
+    """Return the (month, day) pairs celebrated on day.
+
+    Users born on February 29 celebrate on February 28 in non-leap years.
+    """
+    pairs = [(day.month, day.day)]
+    if day.month == 2 and day.day == 28 and (day + timedelta(days=1)).month == 3:
+        pairs.append((2, 29))
+    return pairs
+
+
+def is_birthday(date_of_birth: date, day: date) -> bool:
+    """Return True if someone born on date_of_birth celebrates on day."""
+    return (date_of_birth.month, date_of_birth.day) in birthdays_on(day)
+
+
+def birthday_clause(day: date):
+    """SQL condition matching users celebrating on day."""
+    return or_(*(
+        and_(extract("month", User.date_of_birth) == month, extract("day", User.date_of_birth) == day_of_month)
+        for month, day_of_month in birthdays_on(day)
+    ))
+
+
+class BirthdayCalendar:
+    """Sorted username lists for yesterday's, today's and tomorrow's birthdays."""
+
+    def __init__(self):
+        """Initialize an empty calendar; it is not ready until first rebuild."""
+        self.today: Optional[date] = None
+        self._days: Dict[date, List[str]] = {}
+        self._lock = threading.Lock()
+        self._pending: Optional[List[Tuple[str, Optional[date]]]] = None
+
+    def covers(self, day: date) -> bool:
+        """Return True when day is one of the materialized days."""
+        return day in self._days
+
+    def has_birthday(self, username: str, today: date) -> bool:
+        """Return True if username celebrates today; False when not, or when today is not covered."""
+        usernames = self._days.get(today)
+        if not usernames:
+            return False
+        position = bisect.bisect_left(usernames, username)
+        return position < len(usernames) and usernames[position] == username
+
+    def page(self, day: date, after: Optional[str], limit: int) -> List[str]:
+        """Return up to limit usernames celebrating on day, after the given username."""
+        usernames = self._days.get(day, [])
+        start = bisect.bisect_right(usernames, after) if after is not None else 0
+        return usernames[start:start + limit]
+
+    def on_write(self, username: str, date_of_birth: Optional[date]) -> None:
+        """Move username to the sets matching its new date of birth (None when deleted)."""
+        with self._lock:
+            self._apply(self._days, username, date_of_birth)
+            if self._pending is not None:
+                self._pending.append((username, date_of_birth))
+        self._update_gauges()
+
+    @staticmethod
+    def _apply(days: Dict[date, List[str]], username: str, date_of_birth: Optional[date]) -> None:
+        """Apply a write to days; caller holds the lock."""
+        for day, usernames in days.items():
+            position = bisect.bisect_left(usernames, username)
+            present = position < len(usernames) and usernames[position] == username
+            wanted = date_of_birth is not None and is_birthday(date_of_birth, day)
+            if wanted and not present:
+                usernames.insert(position, username)
+            elif present and not wanted:
+                del usernames[position]
+
+    def refresh(self, db: Session, username: str) -> None:
+        """Reload one user written by another replica."""
+        date_of_birth = db.execute(
+            select(User.date_of_birth).where(User.username == username)
+        ).scalar_one_or_none()
+        self.on_write(username, date_of_birth)
+
+    def rebuild(self, db: Session, today: date) -> None:
+        """Materialize the sets for yesterday, today and tomorrow."""
+        start_time = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        try:
+            days: Dict[date, List[str]] = {
+                today + timedelta(days=offset): [] for offset in (-1, 0, 1)
+            }
+            rows = db.execute(
+                select(User.username, User.date_of_birth).where(or_(*(birthday_clause(day) for day in days)))
+            )
+            for username, date_of_birth in rows:
+                for day, usernames in days.items():
+                    if is_birthday(date_of_birth, day):
+                        usernames.append(username)
+            for usernames in days.values():
+                usernames.sort()
+
+            with self._lock:
+                # Replay writes that raced with the scan before swapping in
+                for username, date_of_birth in self._pending:
+                    self._apply(days, username, date_of_birth)
+                self._days = days
+                self.today = today
+        finally:
+            with self._lock:
+                self._pending = None
+        CALENDAR_REBUILD_DURATION.observe(time.perf_counter() - start_time)
+        self._update_gauges()
+        logger.info(
+            "Birthday calendar for %s: %d yesterday, %d today, %d tomorrow", today, *map(len, days.values())
+        )
+
+    def _update_gauges(self) -> None:
+        """Export the size of each set."""
+        for label, offset in (("yesterday", -1), ("today", 0), ("tomorrow", 1)):
+            day = self.today + timedelta(days=offset) if self.today is not None else None
+            CALENDAR_USERS.labels(day=label).set(len(self._days.get(day, ())))
+
+
+# Global calendar instance
+birthday_calendar = BirthdayCalendar()
+
+
+def get_birthday_calendar() -> Optional[BirthdayCalendar]:
+    """Get the birthday calendar when it is enabled."""
+    if settings.birthday_calendar_enabled:
+        return birthday_calendar
+    return None
+
+
+def rebuild_birthday_calendar() -> None:
+    """Rebuild the global calendar for the current date using a fresh session."""
+    db = ReadSessionLocal()
+    try:
+        birthday_calendar.rebuild(db, date.today())
+    finally:
+        db.close()
+
+
+def list_birthdays(db: Session, day: date, after: Optional[str], limit: int) -> List[str]:
+    """Page through users celebrating on day, from the calendar when it covers day."""
+    calendar = get_birthday_calendar()
+    if calendar is not None and calendar.covers(day):
+        return calendar.page(day, after, limit)
+    query = select(User.username).where(birthday_clause(day))
+    if after is not None:
+        query = query.where(User.username > after)
+    return list(db.execute(query.order_by(User.username).limit(limit)).scalars())
@@ -0,0 +1,155 @@
+"""Incrementally maintained birthday distribution.
+
+UserService adjusts one counter per (month, day) in the same transaction as
+each write, so statistics never need a scan of ``users``. Writes lock
+counters in (month, day) order, so concurrent writes cannot deadlock. A
+periodic reconciliation recounts the table in keyset chunks and repairs any
+drift, locking each counter it repairs.
+"""
+import logging
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from prometheus_client import Gauge
+from sqlalchemy import extract, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.birthday_stat import BirthdayStat
+from app.models.user import User
+from app.services.birthday_calendar import birthdays_on
+
+logger = logging.getLogger(__name__)
+
+STATS_DRIFT = Gauge(
+    'birthday_stats_drift',
+    'Users miscounted by the birthday counters, as found by the last reconciliation'
+)
+
+MonthDay = Tuple[int, int]
+
+
+def _increment(db: Session, month_day: MonthDay, delta: int) -> None:
+    """Add delta to one counter, creating it if needed."""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(BirthdayStat).values(month=month_day[0], day=month_day[1], user_count=delta)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[BirthdayStat.month, BirthdayStat.day],
+        set_={"user_count": BirthdayStat.user_count + statement.excluded.user_count},
+    ))
+
+
+def adjust_birthday_counts(db: Session, old: Optional[date], new: Optional[date]) -> None:
+    """Move a user from old's counter to new's within the caller's transaction.
+
+    Either date may be None for a created or deleted user.
+    """
+    deltas: Dict[MonthDay, int] = {}
+    if old is not None:
+        deltas[(old.month, old.day)] = -1
+    if new is not None:
+        deltas[(new.month, new.day)] = deltas.get((new.month, new.day), 0) + 1
+    # Lock counters in (month, day) order so opposite moves cannot deadlock
+    for month_day, delta in sorted(deltas.items()):
+        if delta:
+            _increment(db, month_day, delta)
+
+
+def remove_birthday_counts(db: Session, dates_of_birth: Iterable[date]) -> None:
+    """Take many deleted users off their counters, one statement per (month, day)."""
+    removed: "Counter[MonthDay]" = Counter((dob.month, dob.day) for dob in dates_of_birth)
+    # Same lock order as adjust_birthday_counts
+    for month_day, count in sorted(removed.items()):
+        _increment(db, month_day, -count)
+
+
+def get_birthday_counts(db: Session) -> Dict[MonthDay, int]:
+    """Load all non-zero counters; at most 366 rows."""
+    rows = db.execute(
+        select(BirthdayStat.month, BirthdayStat.day, BirthdayStat.user_count).where(BirthdayStat.user_count != 0)
+    )
+    return {(month, day): user_count for month, day, user_count in rows}
+
+
+def count_upcoming(counts: Dict[MonthDay, int], today: date, days: int) -> int:
+    """Count users celebrating within ``days`` days starting today."""
+    return sum(
+        counts.get(month_day, 0)
+        for offset in range(days)
+        for month_day in birthdays_on(today + timedelta(days=offset))
+    )
+
+
+def _recount_locked(db: Session, month_day: MonthDay) -> int:
+    """Lock one counter, recount its users, fix the counter and return the drift.
+
+    Writers adjust the counter in the same transaction as the user row, so
+    while the counter is locked every committed write is in the recount and
+    every uncommitted one applies its delta on top of the fixed value.
+    """
+    # Creates the counter if it is missing and locks it until the commit
+    _increment(db, month_day, 0)
+    actual = db.execute(
+        select(BirthdayStat.user_count)
+        .where(BirthdayStat.month == month_day[0], BirthdayStat.day == month_day[1])
+        .with_for_update()
+    ).scalar_one()
+    expected = db.execute(
+        select(func.count()).where(
+            extract("month", User.date_of_birth) == month_day[0],
+            extract("day", User.date_of_birth) == month_day[1],
+        )
+    ).scalar_one()
+    if expected != actual:
+        _increment(db, month_day, expected - actual)
+    db.commit()
+    return abs(expected - actual)
+
+
+def reconcile_birthday_stats(db: Session, chunk_size: int = 10000) -> int:
+    """Recount users in keyset chunks, fix the counters and return the drift found.
+
+    The chunked scan takes no locks, so writes committed while it runs can
+    make a counter look wrong. It only picks the candidates: each one is
+    recounted and fixed in its own transaction with the counter row locked.
+    """
+    counts: "Counter[MonthDay]" = Counter()
+    month = extract("month", User.date_of_birth)
+    day = extract("day", User.date_of_birth)
+    last_id = 0
+    while True:
+        upper_id = db.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).offset(chunk_size - 1).limit(1)
+        ).scalar()
+        chunk = select(month, day, func.count()).where(User.id > last_id)
+        if upper_id is not None:
+            chunk = chunk.where(User.id <= upper_id)
+        for chunk_month, chunk_day, chunk_count in db.execute(chunk.group_by(month, day)):
+            counts[(int(chunk_month), int(chunk_day))] += chunk_count
+        # End the read transaction between chunks so none of them runs long
+        db.commit()
+        if upper_id is None:
+            break
+        last_id = upper_id
+
+    current = get_birthday_counts(db)
+    db.commit()
+    drift = 0
+    for month_day in sorted(set(current) | set(counts)):
+        if counts.get(month_day, 0) != current.get(month_day, 0):
+            drift += _recount_locked(db, month_day)
+    STATS_DRIFT.set(drift)
+    if drift:
+        logger.warning("Birthday counters were off by %d users; repaired", drift)
+    return drift
+
+
+def reconcile_birthday_stats_job() -> None:
+    """Reconcile the birthday counters using a fresh session."""
+    db = SessionLocal()
+    try:
+        reconcile_birthday_stats(db)
+    finally:
+        db.close()
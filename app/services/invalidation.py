@@ -0,0 +1,286 @@
+"""Cross-replica invalidation of per-process user caches.
+
+After UserService commits a write it publishes the changed usernames on the
+bus. Every replica, including the publisher, receives the message and runs
+its subscribers, which evict or refresh their local copies. Production uses
+Postgres LISTEN/NOTIFY; tests and single-process deployments use the
+loopback transport.
+"""
+import json
+import logging
+import select
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+import psycopg2
+from prometheus_client import Counter, Histogram
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_LAG = Histogram(
+    'cache_invalidation_lag_seconds',
+    'Time from publishing an invalidation to evicting it in this replica',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+INVALIDATIONS_PUBLISHED = Counter(
+    'cache_invalidations_published_total',
+    'Invalidation messages published by this replica'
+)
+
+INVALIDATIONS_RECEIVED = Counter(
+    'cache_invalidations_received_total',
+    'Invalidation messages received by this replica',
+    ['origin']
+)
+
+# Postgres NOTIFY payloads are limited to 8000 bytes; 100 usernames of up to
+# 64 characters stay below it
+MAX_USERNAMES_PER_MESSAGE = 100
+
+MessageHandler = Callable[[str], None]
+Subscriber = Callable[[str], None]
+
+
+class InvalidationTransport(ABC):
+    """Delivers invalidation payloads to every replica."""
+
+    @abstractmethod
+    def publish(self, payload: str) -> None:
+        """Send payload to all replicas."""
+
+    @abstractmethod
+    def start(self, handler: MessageHandler) -> None:
+        """Start delivering received payloads to handler."""
+
+    @abstractmethod
+    def stop(self) -> None:
+        """Stop receiving payloads."""
+
+
+class LoopbackHub:
+    """In-process stand-in for the message broker shared by loopback transports."""
+
+    def __init__(self):
+        """Initialize a hub with no transports attached."""
+        self._handlers: List[MessageHandler] = []
+        self._lock = threading.Lock()
+
+    def attach(self, handler: MessageHandler) -> None:
+        """Register a transport's handler."""
+        with self._lock:
+            self._handlers.append(handler)
+
+    def detach(self, handler: MessageHandler) -> None:
+        """Unregister a transport's handler."""
+        with self._lock:
+            if handler in self._handlers:
+                self._handlers.remove(handler)
+
+    def deliver(self, payload: str) -> None:
+        """Deliver payload synchronously to every attached handler."""
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            handler(payload)
+
+
+class LoopbackTransport(InvalidationTransport):
+    """Transport delivering messages within the process through a LoopbackHub."""
+
+    def __init__(self, hub: Optional[LoopbackHub] = None):
+        """Initialize the transport on hub, or on a private hub."""
+        self.hub = hub if hub is not None else LoopbackHub()
+        self._handler: Optional[MessageHandler] = None
+
+    def publish(self, payload: str) -> None:
+        """Deliver payload to every transport on the hub."""
+        self.hub.deliver(payload)
+
+    def start(self, handler: MessageHandler) -> None:
+        """Attach handler to the hub."""
+        self._handler = handler
+        self.hub.attach(handler)
+
+    def stop(self) -> None:
+        """Detach from the hub."""
+        if self._handler is not None:
+            self.hub.detach(self._handler)
+            self._handler = None
+
+
+class PostgresNotifyTransport(InvalidationTransport):
+    """Transport over Postgres LISTEN/NOTIFY.
+
+    Uses two dedicated autocommit connections outside the SQLAlchemy pool:
+    one held in LISTEN by a background thread, one for NOTIFY.
+    """
+
+    def __init__(self, dsn: str, channel: str, reconnect_delay: float = 1.0):
+        """Initialize the transport; connections are opened by start()."""
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._publish_connection = None
+        self._publish_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _connect(self):
+        """Open an autocommit psycopg2 connection."""
+        connection = psycopg2.connect(self.dsn)
+        connection.autocommit = True
+        return connection
+
+    def publish(self, payload: str) -> None:
+        """NOTIFY all listeners, reconnecting once if the connection dropped."""
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publish_connection is None or self._publish_connection.closed:
+                        self._publish_connection = self._connect()
+                    with self._publish_connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    return
+                except Exception:
+                    self._publish_connection = None
+                    if attempt:
+                        raise
+
+    def start(self, handler: MessageHandler) -> None:
+        """Start the LISTEN thread."""
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._listen, args=(handler,), name="invalidation-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the LISTEN thread and close connections."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._publish_lock:
+            if self._publish_connection is not None:
+                self._publish_connection.close()
+                self._publish_connection = None
+
+    def _listen(self, handler: MessageHandler) -> None:
+        """Receive notifications until stopped, reconnecting on errors."""
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        handler(connection.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Invalidation listener failed, reconnecting")
+                self._stopping.wait(self.reconnect_delay)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+class InvalidationBus:
+    """Publishes changed usernames and fans received ones out to subscribers."""
+
+    def __init__(self, transport: InvalidationTransport):
+        """Initialize the bus on transport."""
+        self.transport = transport
+        self.origin = uuid.uuid4().hex
+        self._subscribers: List[Subscriber] = []
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Call subscriber with every username changed by another replica."""
+        self._subscribers.append(subscriber)
+
+    def start(self) -> None:
+        """Start receiving invalidations."""
+        self.transport.start(self._handle)
+
+    def stop(self) -> None:
+        """Stop receiving invalidations."""
+        self.transport.stop()
+
+    def publish(self, *usernames: str) -> None:
+        """Publish changed usernames; failures are logged, not raised.
+
+        The write has already been committed, so a lost invalidation only
+        leaves other replicas stale until their cache TTL expires.
+        """
+        for start in range(0, len(usernames), MAX_USERNAMES_PER_MESSAGE):
+            payload = json.dumps({
+                "origin": self.origin,
+                "published_at": time.time(),
+                "usernames": usernames[start:start + MAX_USERNAMES_PER_MESSAGE],
+            })
+            try:
+                self.transport.publish(payload)
+                INVALIDATIONS_PUBLISHED.inc()
+            except Exception:
+                logger.exception("Failed to publish cache invalidation")
+
+    def _handle(self, payload: str) -> None:
+        """Apply a received invalidation."""
+        try:
+            message = json.loads(payload)
+            usernames = message["usernames"]
+            published_at = message["published_at"]
+            local = message["origin"] == self.origin
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed invalidation payload")
+            return
+
+        INVALIDATIONS_RECEIVED.labels(origin="local" if local else "remote").inc()
+        # The publisher already updated its own state before publishing
+        if not local:
+            for username in usernames:
+                for subscriber in self._subscribers:
+                    try:
+                        subscriber(username)
+                    except Exception:
+                        logger.exception("Invalidation subscriber failed")
+        INVALIDATION_LAG.observe(max(0.0, time.time() - published_at))
+
+
+def libpq_dsn(url: str) -> str:
+    """Turn an SQLAlchemy URL such as postgresql+psycopg://... into one psycopg2 accepts."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+# Global bus instance, created on startup when a transport is configured
+invalidation_bus: Optional[InvalidationBus] = None
+
+
+def create_invalidation_bus() -> Optional[InvalidationBus]:
+    """Create the global invalidation bus for the configured transport."""
+    global invalidation_bus
+    if settings.cache_invalidation_transport == "postgres":
+        transport: InvalidationTransport = PostgresNotifyTransport(
+            libpq_dsn(settings.database_direct_url or settings.get_database_url),
+            settings.cache_invalidation_channel,
+        )
+    elif settings.cache_invalidation_transport == "loopback":
+        transport = LoopbackTransport()
+    else:
+        return None
+    invalidation_bus = InvalidationBus(transport)
+    return invalidation_bus
+
+
+def get_invalidation_bus() -> Optional[InvalidationBus]:
+    """Get the invalidation bus if one is running."""
+    return invalidation_bus
@@ -0,0 +1,119 @@
+"""Per-process cache of birthday lookups."""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Optional, Tuple
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+CACHE_REQUESTS = Counter(
+    'user_cache_requests_total',
+    'User cache lookups by outcome',
+    ['result']
+)
+
+CACHE_EVICTIONS = Counter(
+    'user_cache_evictions_total',
+    'Entries removed from the user cache',
+    ['reason']
+)
+
+
+class UserCache:
+    """Bounded LRU cache of username to date of birth with a TTL.
+
+    Dates of birth do not depend on the current day, so cached entries stay
+    correct until the user is written again; writes evict them here and,
+    through the invalidation bus, in every other replica.
+
+    A reader that loads a value from the database takes a generation first
+    and passes it to ``set``. Every evict stamps the username with a new
+    generation, so a value read before a concurrent write's evict is not
+    cached after it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """Initialize an empty cache."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[date, float]]" = OrderedDict()
+        # Username -> generation of its last evict, oldest first; usernames
+        # pruned from it share _pruned_generation, which only grows
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._last_generation = 0
+        self._pruned_generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[date]:
+        """Get cached date of birth, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                CACHE_REQUESTS.labels(result="miss").inc()
+                return None
+            date_of_birth, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[username]
+                CACHE_EVICTIONS.labels(reason="expired").inc()
+                CACHE_REQUESTS.labels(result="miss").inc()
+                return None
+            self._entries.move_to_end(username)
+        CACHE_REQUESTS.labels(result="hit").inc()
+        return date_of_birth
+
+    def generation(self, username: str) -> int:
+        """Return the generation to pass to set() for a value about to be loaded."""
+        with self._lock:
+            return self._generations.get(username, self._pruned_generation)
+
+    def set(self, username: str, date_of_birth: date, generation: Optional[int] = None) -> None:
+        """Cache user's date of birth, unless it was evicted since generation was taken."""
+        with self._lock:
+            if generation is not None and generation != self._generations.get(username, self._pruned_generation):
+                CACHE_EVICTIONS.labels(reason="stale").inc()
+                return
+            self._entries[username] = (date_of_birth, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.labels(reason="capacity").inc()
+
+    def evict(self, username: str) -> None:
+        """Drop a username from the cache."""
+        with self._lock:
+            if self._entries.pop(username, None) is not None:
+                CACHE_EVICTIONS.labels(reason="invalidated").inc()
+            self._last_generation += 1
+            self._generations[username] = self._last_generation
+            self._generations.move_to_end(username)
+            while len(self._generations) > self.max_entries:
+                self._pruned_generation = self._generations.popitem(last=False)[1]
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._last_generation += 1
+            self._generations.clear()
+            self._pruned_generation = self._last_generation
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self._entries)
+
+
+# Global cache instance
+user_cache = UserCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl_seconds=settings.user_cache_ttl_seconds,
+)
+
+
+def get_user_cache() -> Optional[UserCache]:
+    """Get the user cache when it is enabled."""
+    if settings.user_cache_enabled:
+        return user_cache
+    return None
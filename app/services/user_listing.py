@@ -0,0 +1,65 @@
+"""Keyset-paginated listing of users.
+
+Each page continues from the last key of the previous one with
+``WHERE key > :last ORDER BY key LIMIT :n`` on an indexed column (the
+primary key or the unique username index), so every page costs the same
+however deep the client has paged. Cursors are opaque to clients.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import extract, select
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+ORDER_COLUMNS = {"id": User.id, "username": User.username}
+
+
+def encode_cursor(order: str, key) -> str:
+    """Encode the last key of a page as an opaque cursor."""
+    payload = json.dumps({"o": order, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, order: str):
+    """Decode a cursor for the given order, raising ValueError when it is invalid."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_order, key = payload["o"], payload["k"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_order != order or not isinstance(key, int if order == "id" else str):
+        raise ValueError("Cursor does not match the requested order")
+    return key
+
+
+def list_users(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    order: str = "id",
+    updated_since: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    birth_month: Optional[int] = None,
+) -> Tuple[List[User], Optional[str]]:
+    """Return a page of users and the cursor of the next page, if any."""
+    column = ORDER_COLUMNS[order]
+    query = select(User)
+    if cursor is not None:
+        query = query.where(column > decode_cursor(cursor, order))
+    if updated_since is not None:
+        query = query.where(User.updated_at >= updated_since)
+    if updated_before is not None:
+        query = query.where(User.updated_at < updated_before)
+    if birth_month is not None:
+        query = query.where(extract("month", User.date_of_birth) == birth_month)
+
+    # One extra row tells whether another page exists
+    users = list(db.execute(query.order_by(column).limit(limit + 1)).scalars())
+    if len(users) <= limit:
+        return users, None
+    users = users[:limit]
+    return users, encode_cursor(order, getattr(users[-1], order))
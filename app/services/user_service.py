@@ -1,25 +1,61 @@
 """User service for birthday API business logic."""
 from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.models.user import User
+from app.services.birthday_calendar import BirthdayCalendar
+from app.services.birthday_stats import adjust_birthday_counts, remove_birthday_counts
+from app.services.invalidation import InvalidationBus
+from app.services.user_cache import UserCache
+from app.services.username_filter import UsernameFilter
+from app.services.username_search import UsernamePrefixIndex
+from app.storage.base import UserStore
+from app.storage.sql import SQLUserStore
 
 
 class UserService:
     """Service class for user operations."""
     
-    def __init__(self, db: Session):
+    # Derived columns written along with every create and update while an
+    # online backfill fills in existing rows (see migrations/backfill.py):
+    # column name -> function computing its value from the user
+    DUAL_WRITES: Dict[str, Callable[[User], Any]] = {}
+    
+    def __init__(
+        self,
+        db: Session,
+        username_filter: Optional[UsernameFilter] = None,
+        store: Optional[UserStore] = None,
+        cache: Optional[UserCache] = None,
+        invalidation_bus: Optional[InvalidationBus] = None,
+        calendar: Optional[BirthdayCalendar] = None,
+        prefix_index: Optional[UsernamePrefixIndex] = None,
+    ):
         """Initialize UserService with database session."""
         self.db = db
+        self.username_filter = username_filter
+        self.store = store if store is not None else SQLUserStore(db)
+        self.cache = cache
+        self.invalidation_bus = invalidation_bus
+        self.calendar = calendar
+        self.prefix_index = prefix_index
     
-    def create_user(self, username: str, date_of_birth: date) -> User:
-        """Create a new user."""
+    def create_user(self, username: str, date_of_birth: date, validate: bool = True) -> User:
+        """Create a new user; validate=False skips checks the caller already ran."""
         try:
-            user = User(username=username, date_of_birth=date_of_birth)
+            user = User(username=username, date_of_birth=date_of_birth, validate=validate)
+            self._apply_dual_writes(user)
             self.db.add(user)
+            adjust_birthday_counts(self.db, None, date_of_birth)
             self.db.commit()
             self.db.refresh(user)
+            if self.username_filter is not None:
+                self.username_filter.add(username)
+            if self.prefix_index is not None:
+                self.prefix_index.add(username)
+            self._after_write(username, user.date_of_birth)
             return user
         except IntegrityError:
             self.db.rollback()
@@ -27,17 +63,56 @@ class UserService:
     
     def update_user(self, username: str, date_of_birth: date) -> User:
         """Update an existing user's date of birth."""
-        user = self.get_user(username)
+        # Lock the row so concurrent updates move the birthday counters consistently
+        user = self.db.query(User).filter(User.username == username).with_for_update().first()
+        if not user:
+            raise ValueError("User not found")
+        adjust_birthday_counts(self.db, user.date_of_birth, date_of_birth)
         user.date_of_birth = date_of_birth
         # Force update the timestamp with a delay to ensure it's different
         from datetime import datetime
         import time
         time.sleep(0.01)  # Longer delay to ensure timestamp difference
         user.updated_at = datetime.now()
+        self._apply_dual_writes(user)
         self.db.commit()
         self.db.refresh(user)
+        self._after_write(username, user.date_of_birth)
         return user
     
+    def delete_user(self, username: str) -> None:
+        """Delete a user."""
+        user = self.db.query(User).filter(User.username == username).with_for_update().first()
+        if not user:
+            raise ValueError("User not found")
+        adjust_birthday_counts(self.db, user.date_of_birth, None)
+        self.db.delete(user)
+        self.db.commit()
+        self._after_delete([username])
+    
+    def delete_inactive_users(self, updated_before: datetime, limit: int) -> List[str]:
+        """Delete up to limit users not updated since updated_before; return their usernames.
+        
+        Rows locked by a concurrent write are skipped on Postgres, so a user
+        being updated right now is never purged.
+        """
+        users = (
+            self.db.query(User)
+            .filter(User.updated_at < updated_before)
+            .order_by(User.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not users:
+            return []
+        usernames = [user.username for user in users]
+        remove_birthday_counts(self.db, [user.date_of_birth for user in users])
+        self.db.query(User).filter(User.id.in_([user.id for user in users])).delete(synchronize_session=False)
+        self.db.commit()
+        self._after_delete(usernames)
+        return usernames
+    
     def get_user(self, username: str) -> User:
         """Get user by username."""
         user = self.db.query(User).filter(User.username == username).first()
@@ -45,18 +120,86 @@ class UserService:
             raise ValueError("User not found")
         return user
     
-    def create_or_update_user(self, username: str, date_of_birth: date) -> User:
+    def create_or_update_user(self, username: str, date_of_birth: date, validate: bool = True) -> User:
         """Create a new user or update existing one."""
         try:
-            return self.create_user(username, date_of_birth)
+            return self.create_user(username, date_of_birth, validate)
         except ValueError as e:
             if "User already exists" in str(e):
                 return self.update_user(username, date_of_birth)
             raise
     
-    def calculate_days_until_birthday(self, birth_date: date) -> int:
-        """Calculate days until next birthday."""
-        today = date.today()
+    def _apply_dual_writes(self, user: User) -> None:
+        """Set the derived columns registered in DUAL_WRITES."""
+        for column, compute in self.DUAL_WRITES.items():
+            setattr(user, column, compute(user))
+    
+    def _after_write(self, username: str, date_of_birth: date) -> None:
+        """Propagate a committed write to stores and caches."""
+        self.store.put(username, date_of_birth)
+        if self.cache is not None:
+            self.cache.evict(username)
+        if self.calendar is not None:
+            self.calendar.on_write(username, date_of_birth)
+        if self.invalidation_bus is not None:
+            self.invalidation_bus.publish(username)
+    
+    def _after_delete(self, usernames: List[str]) -> None:
+        """Propagate committed deletes to stores, caches and indexes."""
+        for username in usernames:
+            self.store.delete(username)
+            if self.cache is not None:
+                self.cache.evict(username)
+            if self.username_filter is not None:
+                self.username_filter.remove(username)
+            if self.prefix_index is not None:
+                self.prefix_index.remove(username)
+            if self.calendar is not None:
+                self.calendar.on_write(username, None)
+        if self.invalidation_bus is not None:
+            self.invalidation_bus.publish(*usernames)
+    
+    def get_date_of_birth(self, username: str) -> date:
+        """Get user's date of birth through the cache and store."""
+        generation = None
+        if self.cache is not None:
+            date_of_birth = self.cache.get(username)
+            if date_of_birth is not None:
+                return date_of_birth
+            generation = self.cache.generation(username)
+        
+        date_of_birth = self.store.get_date_of_birth(username)
+        if date_of_birth is None:
+            raise ValueError("User not found")
+        if self.cache is not None:
+            self.cache.set(username, date_of_birth, generation)
+        return date_of_birth
+    
+    def get_dates_of_birth(self, usernames: List[str]) -> Dict[str, date]:
+        """Get dates of birth for many users through the cache and one store lookup."""
+        found: Dict[str, date] = {}
+        missing = []
+        for username in usernames:
+            if self.username_filter is not None and not self.username_filter.might_contain(username):
+                continue
+            date_of_birth = self.cache.get(username) if self.cache is not None else None
+            if date_of_birth is None:
+                missing.append(username)
+            else:
+                found[username] = date_of_birth
+        
+        generations = {username: self.cache.generation(username) for username in missing} if self.cache is not None else {}
+        loaded = self.store.get_dates_of_birth(missing)
+        if self.cache is not None:
+            for username, date_of_birth in loaded.items():
+                self.cache.set(username, date_of_birth, generations[username])
+        found.update(loaded)
+        return found
+    
+    def calculate_days_until_birthday(self, birth_date: date, today: Optional[date] = None) -> int:
+        """Calculate days until next birthday, counting from today (the server's date by default)."""
+        if today is None:
+            today = date.today()
         
         # Calculate this year's birthday
         try:
@@ -84,10 +227,40 @@ class UserService:
         else:
             return (this_year_birthday - today).days
     
-    def get_birthday_message(self, username: str) -> str:
-        """Get birthday message for user."""
-        user = self.get_user(username)
-        days_until_birthday = self.calculate_days_until_birthday(user.date_of_birth)
+    def get_birthday_message(self, username: str, today: Optional[date] = None) -> str:
+        """Get birthday message for user as of today (the server's date by default)."""
+        if today is None:
+            today = date.today()
+        if self.username_filter is not None and not self.username_filter.might_contain(username):
+            raise ValueError("User not found")
+        
+        # Users in today's birthday set need no lookup at all
+        if self.calendar is not None and self.calendar.has_birthday(username, today):
+            return f"Hello, {username}! Happy birthday!"
+        
+        try:
+            date_of_birth = self.get_date_of_birth(username)
+        except ValueError:
+            if self.username_filter is not None:
+                self.username_filter.record_false_positive()
+            raise
+        
+        return self.format_birthday_message(username, date_of_birth, today)
+    
+    def get_birthday_messages(self, usernames: List[str]) -> Dict[str, Optional[str]]:
+        """Get birthday messages for many users; unknown users map to None."""
+        dates_of_birth = self.get_dates_of_birth(usernames)
+        return {
+            username: (
+                self.format_birthday_message(username, dates_of_birth[username])
+                if username in dates_of_birth else None
+            )
+            for username in usernames
+        }
+    
+    def format_birthday_message(self, username: str, date_of_birth: date, today: Optional[date] = None) -> str:
+        """Format the birthday message for a user born on date_of_birth."""
+        days_until_birthday = self.calculate_days_until_birthday(date_of_birth, today)
         
         if days_until_birthday == 0:
             return f"Hello, {username}! Happy birthday!"
@@ -0,0 +1,212 @@
+"""In-memory membership filter of existing usernames.
+
+A counting Bloom filter answers "definitely not a user" without a database
+round trip, so enumeration of random usernames never reaches the ``users``
+table. Counters (instead of bits) make removals possible.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+FILTER_REBUILD_DURATION = Histogram(
+    'username_filter_rebuild_duration_seconds',
+    'Time spent rebuilding the username filter from the users table'
+)
+
+FILTER_ITEMS = Gauge(
+    'username_filter_items',
+    'Number of usernames currently held by the username filter'
+)
+
+FILTER_ESTIMATED_FPR = Gauge(
+    'username_filter_estimated_false_positive_rate',
+    'Theoretical false positive rate of the username filter at its current load'
+)
+
+FILTER_LOOKUPS = Counter(
+    'username_filter_lookups_total',
+    'Username filter lookups by outcome',
+    ['result']
+)
+
+_COUNTER_MAX = 255
+
+
+class CountingBloomFilter:
+    """Counting Bloom filter over strings with saturating 8-bit counters."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """Size the filter for ``capacity`` items at ``error_rate``."""
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("Error rate must be between 0 and 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.count = 0
+        self._counters = bytearray(self.size)
+
+    def _positions(self, item: str) -> List[int]:
+        """Return counter positions for item using double hashing."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        """Add item to the filter."""
+        counters = self._counters
+        for position in self._positions(item):
+            if counters[position] < _COUNTER_MAX:
+                counters[position] += 1
+        self.count += 1
+
+    def remove(self, item: str) -> None:
+        """Remove an item previously added to the filter."""
+        positions = self._positions(item)
+        counters = self._counters
+        if not all(counters[position] for position in positions):
+            return
+        for position in positions:
+            # Saturated counters have lost their exact count and must stay put
+            if counters[position] < _COUNTER_MAX:
+                counters[position] -= 1
+        self.count = max(0, self.count - 1)
+
+    def __contains__(self, item: str) -> bool:
+        """Return False if item is definitely absent, True if it may be present."""
+        counters = self._counters
+        for position in self._positions(item):
+            if not counters[position]:
+                return False
+        return True
+
+    def __len__(self) -> int:
+        """Return the number of items added."""
+        return self.count
+
+    def estimated_false_positive_rate(self) -> float:
+        """Estimate the false positive rate at the current load."""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class UsernameFilter:
+    """Thread-safe, rebuildable username filter."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        """Initialize an empty filter; it is not ready until first rebuild."""
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ready = False
+        self._filter = CountingBloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._pending: Optional[List[Tuple[bool, str]]] = None
+
+    def might_contain(self, username: str) -> bool:
+        """Return False only when username is definitely not a user."""
+        if not self.ready:
+            return True
+        if username in self._filter:
+            FILTER_LOOKUPS.labels(result="passed").inc()
+            return True
+        FILTER_LOOKUPS.labels(result="rejected").inc()
+        return False
+
+    def record_false_positive(self) -> None:
+        """Record a lookup that passed the filter but found no user."""
+        if self.ready:
+            FILTER_LOOKUPS.labels(result="false_positive").inc()
+
+    def add(self, username: str) -> None:
+        """Add a username written by this process."""
+        with self._lock:
+            self._filter.add(username)
+            if self._pending is not None:
+                self._pending.append((True, username))
+        self._update_gauges()
+
+    def remove(self, username: str) -> None:
+        """Remove a deleted username."""
+        with self._lock:
+            self._filter.remove(username)
+            if self._pending is not None:
+                self._pending.append((False, username))
+        self._update_gauges()
+
+    def rebuild(self, db: Session, chunk_size: int = 10000) -> None:
+        """Rebuild the filter from a streaming scan of the users table."""
+        start_time = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        try:
+            total = db.execute(select(func.count(User.id))).scalar() or 0
+            new_filter = CountingBloomFilter(max(self.capacity, 2 * total), self.error_rate)
+            usernames = db.execute(
+                select(User.username).execution_options(yield_per=chunk_size)
+            ).scalars()
+            for username in usernames:
+                new_filter.add(username)
+            with self._lock:
+                # Replay writes that raced with the scan before swapping in
+                for added, username in self._pending:
+                    if added:
+                        new_filter.add(username)
+                    else:
+                        new_filter.remove(username)
+                self._filter = new_filter
+                self.ready = True
+        finally:
+            with self._lock:
+                self._pending = None
+
+        duration = time.perf_counter() - start_time
+        FILTER_REBUILD_DURATION.observe(duration)
+        self._update_gauges()
+        logger.info("Rebuilt username filter with %d users in %.3fs", len(new_filter), duration)
+
+    def _update_gauges(self) -> None:
+        """Export current load of the filter."""
+        FILTER_ITEMS.set(len(self._filter))
+        FILTER_ESTIMATED_FPR.set(self._filter.estimated_false_positive_rate())
+
+
+# Global filter instance
+username_filter = UsernameFilter(
+    capacity=settings.username_filter_capacity,
+    error_rate=settings.username_filter_error_rate,
+)
+
+
+def get_username_filter() -> Optional[UsernameFilter]:
+    """Get the username filter when it is enabled."""
+    if settings.username_filter_enabled:
+        return username_filter
+    return None
+
+
+def rebuild_username_filter() -> None:
+    """Rebuild the global username filter using a fresh session."""
+    db = ReadSessionLocal()
+    try:
+        username_filter.rebuild(db)
+    finally:
+        db.close()
@@ -0,0 +1,144 @@
+"""Username prefix search.
+
+A prefix is turned into the half-open range ``[prefix, prefix')`` where
+``prefix'`` has its last character incremented, which a btree index answers
+with one ordered range scan. On Postgres the comparison uses the "C"
+collation so it matches the ``ix_users_username_c`` index and orders
+bytewise, like SQLite's default BINARY collation and the optional
+in-memory index.
+"""
+import bisect
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from prometheus_client import Gauge
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+INDEX_USERNAMES = Gauge(
+    'username_prefix_index_usernames',
+    'Usernames held by the in-memory prefix index'
+)
+
+
+def prefix_range(prefix: str) -> Tuple[str, str]:
+    """Return the [low, high) range of strings starting with prefix."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def search_usernames(db: Session, prefix: str, limit: int) -> List[str]:
+    """Return up to limit usernames starting with prefix, in bytewise order."""
+    low, high = prefix_range(prefix)
+    column = User.username
+    if db.get_bind().dialect.name == "postgresql":
+        column = column.collate("C")
+    query = select(User.username).where(column >= low, column < high).order_by(column).limit(limit)
+    return list(db.execute(query).scalars())
+
+
+class UsernamePrefixIndex:
+    """Sorted in-memory array of usernames answering prefix queries."""
+
+    def __init__(self):
+        """Initialize an empty index; it is not ready until first load."""
+        self.ready = False
+        self._usernames: List[str] = []
+        self._lock = threading.Lock()
+        self._pending: Optional[List[Tuple[str, bool]]] = None
+
+    def search(self, prefix: str, limit: int) -> List[str]:
+        """Return up to limit usernames starting with prefix."""
+        low, high = prefix_range(prefix)
+        usernames = self._usernames
+        start = bisect.bisect_left(usernames, low)
+        end = min(bisect.bisect_left(usernames, high, lo=start), start + limit)
+        return usernames[start:end]
+
+    def add(self, username: str) -> None:
+        """Add a username if absent."""
+        self._write(username, True)
+
+    def remove(self, username: str) -> None:
+        """Remove a username if present."""
+        self._write(username, False)
+
+    def refresh(self, db: Session, username: str) -> None:
+        """Re-check a username written by another replica."""
+        exists = db.execute(select(User.id).where(User.username == username)).first() is not None
+        self._write(username, exists)
+
+    def load(self, db: Session, chunk_size: int = 10000) -> None:
+        """Load all usernames from the database, replacing current contents."""
+        with self._lock:
+            self._pending = []
+        try:
+            rows = db.execute(select(User.username).execution_options(yield_per=chunk_size))
+            usernames = sorted(rows.scalars())
+            with self._lock:
+                # Replay writes that raced with the scan before swapping in
+                for username, present in self._pending:
+                    self._apply(usernames, username, present)
+                self._usernames = usernames
+                self.ready = True
+        finally:
+            with self._lock:
+                self._pending = None
+        INDEX_USERNAMES.set(len(self._usernames))
+        logger.info("Loaded %d usernames into the prefix index", len(self._usernames))
+
+    def __len__(self) -> int:
+        """Return the number of indexed usernames."""
+        return len(self._usernames)
+
+    def _write(self, username: str, present: bool) -> None:
+        """Apply a write to the index."""
+        with self._lock:
+            self._apply(self._usernames, username, present)
+            if self._pending is not None:
+                self._pending.append((username, present))
+        INDEX_USERNAMES.set(len(self._usernames))
+
+    @staticmethod
+    def _apply(usernames: List[str], username: str, present: bool) -> None:
+        """Insert or delete username in a sorted list; caller holds the lock."""
+        position = bisect.bisect_left(usernames, username)
+        found = position < len(usernames) and usernames[position] == username
+        if present and not found:
+            usernames.insert(position, username)
+        elif found and not present:
+            del usernames[position]
+
+
+# Global in-memory index instance
+username_prefix_index = UsernamePrefixIndex()
+
+
+def get_username_prefix_index() -> Optional[UsernamePrefixIndex]:
+    """Get the in-memory prefix index when that mode is enabled."""
+    if settings.username_search_backend == "memory":
+        return username_prefix_index
+    return None
+
+
+def load_username_prefix_index() -> None:
+    """Load the global prefix index using a fresh session."""
+    db = ReadSessionLocal()
+    try:
+        username_prefix_index.load(db)
+    finally:
+        db.close()
+
+
+def find_usernames(db: Session, prefix: str, limit: int) -> List[str]:
+    """Search by prefix in memory when the index is loaded, otherwise in the database."""
+    index = get_username_prefix_index()
+    if index is not None and index.ready:
+        return index.search(prefix, limit)
+    return search_usernames(db, prefix, limit)
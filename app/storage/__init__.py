@@ -0,0 +1 @@
+"""User storage backends package."""
@@ -0,0 +1,49 @@
+"""Storage abstraction used by UserService for birthday lookups."""
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+
+class UserStore(ABC):
+    """Read path for username to date of birth lookups.
+
+    The SQL database stays the source of truth: UserService commits writes
+    to it first and then passes them on with ``put``/``delete`` so that
+    backends holding their own copy of the data stay current.
+    """
+
+    @abstractmethod
+    def get_date_of_birth(self, username: str) -> Optional[date]:
+        """Get user's date of birth, or None if the user does not exist."""
+
+    def get_dates_of_birth(self, usernames: Iterable[str]) -> Dict[str, date]:
+        """Get dates of birth for the users that exist among usernames."""
+        found = {}
+        for username in usernames:
+            date_of_birth = self.get_date_of_birth(username)
+            if date_of_birth is not None:
+                found[username] = date_of_birth
+        return found
+
+    @abstractmethod
+    def put(self, username: str, date_of_birth: date) -> None:
+        """Record a committed create or update."""
+
+    @abstractmethod
+    def delete(self, username: str) -> None:
+        """Record a committed delete."""
+
+    def refresh(self, db: Session, username: str) -> None:
+        """Reload one user from the database after another replica wrote it."""
+        date_of_birth = db.execute(
+            select(User.date_of_birth).where(User.username == username)
+        ).scalar()
+        if date_of_birth is None:
+            self.delete(username)
+        else:
+            self.put(username, date_of_birth)
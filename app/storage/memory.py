@@ -0,0 +1,227 @@
+"""Compact in-memory user store.
+
+Usernames are interned into a single UTF-8 blob and looked up through an
+open-addressing hash table built from ``array`` buffers; dates of birth are
+kept as packed ``date.toordinal()`` integers. This costs a few dozen bytes
+per user instead of the kilobyte or so taken by a hydrated ``User`` object.
+"""
+import logging
+import threading
+import time
+from array import array
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.database import ReadSessionLocal
+from app.models.user import User
+from app.storage.base import UserStore
+
+logger = logging.getLogger(__name__)
+
+STORE_USERS = Gauge(
+    'user_store_users',
+    'Number of users held by the in-memory user store'
+)
+
+STORE_MEMORY_BYTES = Gauge(
+    'user_store_memory_bytes',
+    'Bytes used by the in-memory user store buffers'
+)
+
+STORE_LOAD_DURATION = Histogram(
+    'user_store_load_duration_seconds',
+    'Time spent loading the in-memory user store from the database'
+)
+
+_EMPTY = -1
+_DELETED = 0
+_MAX_LOAD_FACTOR = 0.7
+
+
+class _Table:
+    """Hash table and packed entry buffers for one generation of the store."""
+
+    def __init__(self, capacity: int = 1024):
+        """Allocate an empty table with at least ``capacity`` slots."""
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.mask = size - 1
+        self.slots = array('i', [_EMPTY]) * size
+        self.hashes = array('q')
+        self.ordinals = array('I')
+        self.offsets = array('I', [0])
+        self.blob = bytearray()
+        self.live = 0
+
+    def find(self, key: bytes, key_hash: int) -> int:
+        """Return the entry index for key, or -1 if absent."""
+        slots = self.slots
+        hashes = self.hashes
+        offsets = self.offsets
+        mask = self.mask
+        position = key_hash & mask
+        while True:
+            entry = slots[position]
+            if entry == _EMPTY:
+                return _EMPTY
+            if hashes[entry] == key_hash and self.blob[offsets[entry]:offsets[entry + 1]] == key:
+                return entry
+            position = (position + 1) & mask
+
+    def insert(self, key: bytes, key_hash: int, ordinal: int) -> None:
+        """Insert a key known to be absent."""
+        entry = len(self.ordinals)
+        # Fill the entry before publishing it in a slot so readers never see half of it
+        self.blob += key
+        self.offsets.append(len(self.blob))
+        self.hashes.append(key_hash)
+        self.ordinals.append(ordinal)
+        self._link(entry, key_hash)
+        self.live += 1
+
+    def _link(self, entry: int, key_hash: int) -> None:
+        """Point the first free slot on key_hash's probe sequence at entry."""
+        position = key_hash & self.mask
+        while self.slots[position] != _EMPTY:
+            position = (position + 1) & self.mask
+        self.slots[position] = entry
+
+    def needs_resize(self) -> bool:
+        """Return True when the next insert would exceed the load factor."""
+        return len(self.ordinals) + 1 > len(self.slots) * _MAX_LOAD_FACTOR
+
+    def resized(self) -> "_Table":
+        """Return a copy with twice the slots and deleted entries dropped."""
+        table = _Table(len(self.slots) * 2)
+        offsets = self.offsets
+        for entry, ordinal in enumerate(self.ordinals):
+            if ordinal != _DELETED:
+                table.insert(bytes(self.blob[offsets[entry]:offsets[entry + 1]]), self.hashes[entry], ordinal)
+        return table
+
+    def nbytes(self) -> int:
+        """Return bytes held by the table buffers."""
+        return sum(
+            len(buffer) * buffer.itemsize
+            for buffer in (self.slots, self.hashes, self.ordinals, self.offsets)
+        ) + len(self.blob)
+
+
+class InMemoryUserStore(UserStore):
+    """User store serving lookups from compact in-process buffers."""
+
+    def __init__(self):
+        """Initialize an empty store; it is not ready until first load."""
+        self.ready = False
+        self._table = _Table()
+        self._lock = threading.Lock()
+        self._pending: Optional[List[Tuple[str, Optional[date]]]] = None
+
+    def get_date_of_birth(self, username: str) -> Optional[date]:
+        """Get user's date of birth without touching the database."""
+        table = self._table
+        entry = table.find(username.encode("utf-8"), hash(username))
+        if entry == _EMPTY:
+            return None
+        ordinal = table.ordinals[entry]
+        if ordinal == _DELETED:
+            return None
+        return date.fromordinal(ordinal)
+
+    def put(self, username: str, date_of_birth: date) -> None:
+        """Insert or update user's date of birth."""
+        with self._lock:
+            self._write(username, date_of_birth)
+            if self._pending is not None:
+                self._pending.append((username, date_of_birth))
+
+    def delete(self, username: str) -> None:
+        """Remove user from the store."""
+        with self._lock:
+            self._write(username, None)
+            if self._pending is not None:
+                self._pending.append((username, None))
+
+    def __len__(self) -> int:
+        """Return the number of users in the store."""
+        return self._table.live
+
+    def nbytes(self) -> int:
+        """Return bytes held by the store buffers."""
+        return self._table.nbytes()
+
+    def load(self, db: Session, chunk_size: int = 10000) -> None:
+        """Load all users from the database, replacing current contents."""
+        start_time = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        try:
+            rows = db.execute(
+                select(User.username, User.date_of_birth).execution_options(yield_per=chunk_size)
+            )
+            table = self._build(rows)
+            with self._lock:
+                # Replay writes that raced with the scan before swapping in
+                self._table = table
+                for username, date_of_birth in self._pending:
+                    self._write(username, date_of_birth)
+                self.ready = True
+        finally:
+            with self._lock:
+                self._pending = None
+
+        duration = time.perf_counter() - start_time
+        STORE_LOAD_DURATION.observe(duration)
+        self._update_gauges()
+        logger.info("Loaded %d users into memory in %.3fs (%d bytes)", len(self), duration, self.nbytes())
+
+    @staticmethod
+    def _build(rows: Iterable[Tuple[str, date]]) -> _Table:
+        """Build a table from (username, date_of_birth) rows."""
+        table = _Table()
+        for username, date_of_birth in rows:
+            if table.needs_resize():
+                table = table.resized()
+            table.insert(username.encode("utf-8"), hash(username), date_of_birth.toordinal())
+        return table
+
+    def _write(self, username: str, date_of_birth: Optional[date]) -> None:
+        """Apply a write to the current table; caller holds the lock."""
+        table = self._table
+        key = username.encode("utf-8")
+        key_hash = hash(username)
+        ordinal = date_of_birth.toordinal() if date_of_birth is not None else _DELETED
+        entry = table.find(key, key_hash)
+        if entry != _EMPTY:
+            if (table.ordinals[entry] == _DELETED) != (ordinal == _DELETED):
+                table.live += 1 if ordinal != _DELETED else -1
+            table.ordinals[entry] = ordinal
+        elif ordinal != _DELETED:
+            if table.needs_resize():
+                table = table.resized()
+                self._table = table
+            table.insert(key, key_hash, ordinal)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        """Export current size of the store."""
+        STORE_USERS.set(self._table.live)
+        STORE_MEMORY_BYTES.set(self._table.nbytes())
+
+
+# Global in-memory store instance
+memory_user_store = InMemoryUserStore()
+
+
+def load_memory_user_store() -> None:
+    """Load the global in-memory store using a fresh session."""
+    db = ReadSessionLocal()
+    try:
+        memory_user_store.load(db)
+    finally:
+        db.close()
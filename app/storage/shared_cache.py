@@ -0,0 +1,223 @@
+"""Shared Redis cache of dates of birth in front of another user store.
+
+With many replicas, each in-process cache only sees its share of the
+traffic, so its hit rate stays low. This tier is one cache shared by all
+replicas. Batch lookups fetch every key with pipelined MGETs in a single
+round trip, and misses are filled with one pipelined write.
+
+Entries expire at the next UTC midnight plus a random jitter, so the
+whole cache does not expire at the same moment. Writes replace the entry
+and deletes leave a tombstone, so the only source of staleness is a
+write that could not reach Redis, and it lasts until that expiry at most.
+Fills use SET NX so that a reader holding an older value never overwrites
+a concurrent write.
+
+Reads go through a circuit breaker: after repeated errors or slow calls,
+lookups go straight to the wrapped store until a trial call succeeds.
+Writes are always attempted, because skipping one would leave a stale
+entry behind. They bypass the breaker entirely: their failures are only
+counted in ``shared_cache_errors_total``, so that a write cannot close an
+open breaker or use up a half-open trial.
+"""
+import logging
+import random
+import time
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy.orm import Session
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.storage.base import UserStore
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_REQUESTS = Counter(
+    'shared_cache_requests_total',
+    'Shared cache lookups per username by result (tombstone: cached deleted user; '
+    'unavailable: breaker open or call failed)',
+    ['result']
+)
+
+SHARED_CACHE_ERRORS = Counter(
+    'shared_cache_errors_total',
+    'Failed shared cache calls by operation',
+    ['operation']
+)
+
+SHARED_CACHE_CALL_DURATION = Histogram(
+    'shared_cache_call_duration_seconds',
+    'Shared cache round trip time',
+    ['operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+TOMBSTONE = b"-"
+MGET_CHUNK_SIZE = 500
+SECONDS_PER_DAY = 86400
+
+_UNAVAILABLE = object()
+
+
+def seconds_until_midnight(now: float) -> int:
+    """Return whole seconds from the epoch time now to the next UTC midnight."""
+    return SECONDS_PER_DAY - int(now) % SECONDS_PER_DAY
+
+
+class SharedCacheUserStore(UserStore):
+    """User store reading through a shared Redis cache."""
+
+    def __init__(self, store: UserStore, client: Any, breaker: CircuitBreaker,
+                 prefix: str = "dob:", ttl_jitter_seconds: int = 900):
+        """Initialize the cache in front of store."""
+        self.store = store
+        self.client = client
+        self.breaker = breaker
+        self.prefix = prefix
+        self.ttl_jitter_seconds = ttl_jitter_seconds
+
+    def get_date_of_birth(self, username: str) -> Optional[date]:
+        """Get user's date of birth from the cache, or from the store on a miss."""
+        raw = self._call("get", lambda: self.client.get(self.prefix + username))
+        if raw is _UNAVAILABLE:
+            SHARED_CACHE_REQUESTS.labels(result="unavailable").inc()
+            return self.store.get_date_of_birth(username)
+        if raw == TOMBSTONE:
+            SHARED_CACHE_REQUESTS.labels(result="tombstone").inc()
+            return None
+        if raw is not None:
+            SHARED_CACHE_REQUESTS.labels(result="hit").inc()
+            return self._decode(raw)
+
+        SHARED_CACHE_REQUESTS.labels(result="miss").inc()
+        date_of_birth = self.store.get_date_of_birth(username)
+        if date_of_birth is not None:
+            self._fill({username: date_of_birth})
+        return date_of_birth
+
+    def get_dates_of_birth(self, usernames: Iterable[str]) -> Dict[str, date]:
+        """Get dates of birth for many users with one cache round trip and one store lookup."""
+        usernames = list(dict.fromkeys(usernames))
+        if not usernames:
+            return {}
+        values = self._call("mget", lambda: self._mget(usernames))
+        if values is _UNAVAILABLE:
+            SHARED_CACHE_REQUESTS.labels(result="unavailable").inc(len(usernames))
+            return self.store.get_dates_of_birth(usernames)
+
+        found: Dict[str, date] = {}
+        missing = []
+        tombstones = 0
+        for username, raw in zip(usernames, values):
+            if raw is None:
+                missing.append(username)
+            elif raw == TOMBSTONE:
+                tombstones += 1
+            else:
+                found[username] = self._decode(raw)
+        SHARED_CACHE_REQUESTS.labels(result="hit").inc(len(found))
+        SHARED_CACHE_REQUESTS.labels(result="tombstone").inc(tombstones)
+        if missing:
+            SHARED_CACHE_REQUESTS.labels(result="miss").inc(len(missing))
+            loaded = self.store.get_dates_of_birth(missing)
+            self._fill(loaded)
+            found.update(loaded)
+        return found
+
+    def put(self, username: str, date_of_birth: date) -> None:
+        """Pass the write on and replace the cached entry."""
+        self.store.put(username, date_of_birth)
+        self._write(username, date_of_birth.isoformat().encode("ascii"))
+
+    def delete(self, username: str) -> None:
+        """Pass the delete on and leave a tombstone in the cache."""
+        self.store.delete(username)
+        self._write(username, TOMBSTONE)
+
+    def refresh(self, db: Session, username: str) -> None:
+        """Refresh the wrapped store; the writing replica already updated the cache."""
+        self.store.refresh(db, username)
+
+    def _mget(self, usernames: List[str]) -> List[Optional[bytes]]:
+        """Fetch keys in MGET chunks pipelined into one round trip."""
+        pipeline = self.client.pipeline(transaction=False)
+        for start in range(0, len(usernames), MGET_CHUNK_SIZE):
+            pipeline.mget([self.prefix + username for username in usernames[start:start + MGET_CHUNK_SIZE]])
+        return [value for chunk in pipeline.execute() for value in chunk]
+
+    def _fill(self, dates_of_birth: Dict[str, date]) -> None:
+        """Cache loaded entries unless a concurrent write got there first."""
+        if not dates_of_birth:
+            return
+
+        def fill() -> None:
+            pipeline = self.client.pipeline(transaction=False)
+            for username, date_of_birth in dates_of_birth.items():
+                pipeline.set(self.prefix + username, date_of_birth.isoformat(), ex=self._ttl(), nx=True)
+            pipeline.execute()
+
+        self._call("fill", fill)
+
+    def _write(self, username: str, value: bytes) -> None:
+        """Replace the cached entry for a committed write, bypassing the breaker."""
+        result = self._call(
+            "write", lambda: self.client.set(self.prefix + username, value, ex=self._ttl()), gated=False
+        )
+        if result is _UNAVAILABLE:
+            logger.warning("Shared cache entry for %s may be stale until it expires", username)
+
+    def _call(self, operation: str, command: Callable[[], Any], gated: bool = True) -> Any:
+        """Run a Redis command; _UNAVAILABLE when skipped or failed.
+
+        Only gated calls go through the breaker and report their outcome to it.
+        """
+        if gated and not self.breaker.allow():
+            return _UNAVAILABLE
+        start_time = time.perf_counter()
+        try:
+            result = command()
+        except Exception:
+            if gated:
+                self.breaker.record(time.perf_counter() - start_time, failed=True)
+            SHARED_CACHE_ERRORS.labels(operation=operation).inc()
+            logger.debug("Shared cache %s failed", operation, exc_info=True)
+            return _UNAVAILABLE
+        duration = time.perf_counter() - start_time
+        if gated:
+            self.breaker.record(duration)
+        SHARED_CACHE_CALL_DURATION.labels(operation=operation).observe(duration)
+        return result
+
+    def _ttl(self) -> int:
+        """Return seconds until this entry's jittered midnight expiry."""
+        return seconds_until_midnight(time.time()) + random.randint(0, self.ttl_jitter_seconds)
+
+    @staticmethod
+    def _decode(raw: bytes) -> date:
+        """Decode a cached date of birth."""
+        return date.fromisoformat(raw.decode("ascii"))
+
+
+# Global breaker, shared by every request in this process
+shared_cache_breaker = CircuitBreaker(
+    "shared_cache",
+    failure_threshold=settings.shared_cache_failure_threshold,
+    reset_seconds=settings.shared_cache_reset_seconds,
+    slow_call_seconds=settings.shared_cache_slow_call_ms / 1000,
+)
+
+
+def with_shared_cache(store: UserStore) -> UserStore:
+    """Put the shared cache in front of store when it is enabled."""
+    if not settings.shared_cache_enabled:
+        return store
+    return SharedCacheUserStore(
+        store,
+        get_redis(),
+        shared_cache_breaker,
+        prefix=settings.shared_cache_key_prefix,
+        ttl_jitter_seconds=settings.shared_cache_ttl_jitter_seconds,
+    )
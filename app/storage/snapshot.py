@@ -0,0 +1,316 @@
+"""Memory-mapped, read-only user snapshot shared across worker processes.
+
+Snapshot file layout (all integers little-endian)::
+
+    header    magic, version, user count, slot count, section offsets,
+              watermark (max ``users.updated_at`` when the snapshot was built)
+    slots     slot_count x uint32, entry index + 1 (0 marks an empty slot)
+    entries   count x (uint64 key hash, uint32 key offset, uint32 key length,
+              uint32 date ordinal), sorted by username
+    keys      UTF-8 usernames concatenated in entry order
+
+Every worker maps the same file, so the kernel keeps one page-cache copy no
+matter how many processes serve from it. Lookups read straight from the
+mapping. Writes made after the snapshot was built live in a small
+per-process overlay that is seeded and refreshed from rows whose
+``updated_at`` is at or past the watermark. When the file is rebuilt,
+the periodic refresh maps the new file and restarts the overlay from the
+new watermark, so the overlay only grows between rebuilds.
+
+Build a snapshot with::
+
+    python -m app.storage.snapshot build /var/lib/birthday-api/users.snap
+"""
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.models.user import User
+from app.storage.base import UserStore
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BDAYSNP1"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sIIIQQQ32s")
+_SLOT = struct.Struct("<I")
+_ENTRY = struct.Struct("<QIII")
+
+
+def key_hash(key: bytes) -> int:
+    """Return the process-independent 64-bit hash used in snapshot files."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def write_snapshot(path: str, rows: Iterable[Tuple[str, date]], watermark: Optional[datetime] = None) -> int:
+    """Write (username, date_of_birth) rows to path, sorted by UTF-8 username.
+
+    The file is written next to path and renamed into place so readers never
+    map a partial snapshot. Returns the number of users written.
+    """
+    sorted_rows = sorted((username.encode("utf-8"), date_of_birth.toordinal()) for username, date_of_birth in rows)
+    hashes = array("Q")
+    offsets = array("I")
+    lengths = array("I")
+    ordinals = array("I")
+    keys = bytearray()
+    previous = None
+    for key, ordinal in sorted_rows:
+        if key == previous:
+            raise ValueError(f"Duplicate username in snapshot rows: {key.decode('utf-8')}")
+        previous = key
+        hashes.append(key_hash(key))
+        offsets.append(len(keys))
+        lengths.append(len(key))
+        ordinals.append(ordinal)
+        keys += key
+    del sorted_rows
+
+    count = len(ordinals)
+    slot_count = 1
+    while slot_count < max(8, count * 2):
+        slot_count <<= 1
+    slots = array("I", [0]) * slot_count
+    mask = slot_count - 1
+    for entry, entry_hash in enumerate(hashes):
+        position = entry_hash & mask
+        while slots[position]:
+            position = (position + 1) & mask
+        slots[position] = entry + 1
+
+    slots_offset = _HEADER.size
+    entries_offset = slots_offset + slot_count * _SLOT.size
+    keys_offset = entries_offset + count * _ENTRY.size
+    watermark_text = watermark.isoformat().encode("ascii") if watermark is not None else b""
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        snapshot_file.write(_HEADER.pack(
+            MAGIC, VERSION, count, slot_count, entries_offset, keys_offset, len(keys), watermark_text
+        ))
+        snapshot_file.write(slots.tobytes())
+        for entry in range(count):
+            snapshot_file.write(_ENTRY.pack(hashes[entry], offsets[entry], lengths[entry], ordinals[entry]))
+        snapshot_file.write(keys)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
+    return count
+
+
+def _file_id(stat: os.stat_result) -> Tuple[int, int, int]:
+    """Identify a file version; a rebuilt snapshot is a new inode with a new mtime."""
+    return stat.st_dev, stat.st_ino, stat.st_mtime_ns
+
+
+class UserSnapshot:
+    """Read-only view of a snapshot file through mmap."""
+
+    def __init__(self, path: str):
+        """Map the snapshot at path and validate its header."""
+        self.path = path
+        with open(path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.file_id = _file_id(os.fstat(snapshot_file.fileno()))
+        self._view = memoryview(self._mmap)
+
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"Snapshot {path} is truncated")
+        magic, version, count, slot_count, entries_offset, keys_offset, keys_length, watermark = (
+            _HEADER.unpack_from(self._mmap, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Snapshot {path} has an unsupported format")
+        if len(self._mmap) != keys_offset + keys_length:
+            raise ValueError(f"Snapshot {path} is truncated")
+
+        self.count = count
+        self._mask = slot_count - 1
+        self._entries_offset = entries_offset
+        self._keys_offset = keys_offset
+        watermark = watermark.rstrip(b"\0")
+        self.watermark = datetime.fromisoformat(watermark.decode("ascii")) if watermark else None
+
+    def get_ordinal(self, username: str) -> Optional[int]:
+        """Return user's date ordinal, or None if absent from the snapshot."""
+        key = username.encode("utf-8")
+        entry_hash = key_hash(key)
+        view = self._view
+        position = entry_hash & self._mask
+        while True:
+            slot = _SLOT.unpack_from(view, _HEADER.size + position * _SLOT.size)[0]
+            if not slot:
+                return None
+            stored_hash, offset, length, ordinal = _ENTRY.unpack_from(
+                view, self._entries_offset + (slot - 1) * _ENTRY.size
+            )
+            if stored_hash == entry_hash and length == len(key):
+                start = self._keys_offset + offset
+                if view[start:start + length] == key:
+                    return ordinal
+            position = (position + 1) & self._mask
+
+    def __len__(self) -> int:
+        """Return the number of users in the snapshot."""
+        return self.count
+
+    def close(self) -> None:
+        """Unmap the snapshot file."""
+        self._view.release()
+        self._mmap.close()
+
+
+class SnapshotUserStore(UserStore):
+    """User store reading a shared snapshot plus a per-process delta overlay."""
+
+    def __init__(self, snapshot: UserSnapshot):
+        """Initialize the store over an opened snapshot."""
+        self.snapshot = snapshot
+        self._overlay: Dict[str, Optional[date]] = {}
+        self._lock = threading.Lock()
+        self._overlay_watermark = snapshot.watermark
+
+    def get_date_of_birth(self, username: str) -> Optional[date]:
+        """Get user's date of birth, preferring writes newer than the snapshot."""
+        overlay = self._overlay
+        if username in overlay:
+            return overlay[username]
+        ordinal = self.snapshot.get_ordinal(username)
+        return date.fromordinal(ordinal) if ordinal is not None else None
+
+    def put(self, username: str, date_of_birth: date) -> None:
+        """Record a write made after the snapshot was built."""
+        with self._lock:
+            self._overlay[username] = date_of_birth
+
+    def delete(self, username: str) -> None:
+        """Record a delete made after the snapshot was built."""
+        with self._lock:
+            self._overlay[username] = None
+
+    def refresh_overlay(self, db: Session) -> int:
+        """Pull rows written since the last refresh into the overlay.
+
+        Deletes done by other processes are not visible in the table and
+        are only picked up by the next snapshot.
+        """
+        query = select(User.username, User.date_of_birth, User.updated_at)
+        if self._overlay_watermark is not None:
+            query = query.where(User.updated_at >= self._overlay_watermark)
+        rows = db.execute(query).all()
+        with self._lock:
+            for username, date_of_birth, updated_at in rows:
+                self._overlay[username] = date_of_birth
+                if updated_at is not None and (
+                    self._overlay_watermark is None or updated_at > self._overlay_watermark
+                ):
+                    self._overlay_watermark = updated_at
+        return len(rows)
+
+    def remap_if_changed(self, db: Session) -> bool:
+        """Map a rebuilt snapshot file and restart the overlay from its watermark.
+
+        Old mappings are not closed, since lookups may still be reading
+        them; they are unmapped once the last reference goes away.
+        """
+        path = self.snapshot.path
+        try:
+            if _file_id(os.stat(path)) == self.snapshot.file_id:
+                return False
+        except FileNotFoundError:
+            logger.warning("Snapshot %s disappeared, keeping the current mapping", path)
+            return False
+        snapshot = UserSnapshot(path)
+
+        # Deletes are invisible in the table, so tombstones for users the new
+        # snapshot still holds are kept, unless the user has been re-created
+        with self._lock:
+            candidates = [username for username, date_of_birth in self._overlay.items() if date_of_birth is None]
+        recreated = set()
+        if candidates:
+            recreated = set(db.execute(select(User.username).where(User.username.in_(candidates))).scalars())
+        with self._lock:
+            self.snapshot = snapshot
+            self._overlay = {
+                username: None
+                for username, date_of_birth in self._overlay.items()
+                if date_of_birth is None and username not in recreated and snapshot.get_ordinal(username) is not None
+            }
+            self._overlay_watermark = snapshot.watermark
+        logger.info("Mapped rebuilt snapshot of %d users from %s", len(snapshot), path)
+        self.refresh_overlay(db)
+        return True
+
+    def overlay_size(self) -> int:
+        """Return the number of usernames in the overlay."""
+        return len(self._overlay)
+
+
+def build_snapshot(db: Session, path: str, chunk_size: int = 10000) -> int:
+    """Write the users table to a snapshot file at path."""
+    watermark = db.execute(select(func.max(User.updated_at))).scalar()
+    rows = db.execute(
+        select(User.username, User.date_of_birth).execution_options(yield_per=chunk_size)
+    )
+    count = write_snapshot(path, rows, watermark)
+    logger.info("Wrote snapshot of %d users to %s", count, path)
+    return count
+
+
+_snapshot_store: Optional[SnapshotUserStore] = None
+
+
+def get_snapshot_user_store() -> SnapshotUserStore:
+    """Get the process-wide snapshot store, mapping the file on first use."""
+    global _snapshot_store
+    if _snapshot_store is None:
+        if not settings.user_snapshot_path:
+            raise RuntimeError("USER_SNAPSHOT_PATH must be set for the snapshot user store")
+        _snapshot_store = SnapshotUserStore(UserSnapshot(settings.user_snapshot_path))
+    return _snapshot_store
+
+
+def refresh_snapshot_overlay() -> None:
+    """Map a rebuilt snapshot, or refresh the overlay, using a fresh session."""
+    db = ReadSessionLocal()
+    try:
+        store = get_snapshot_user_store()
+        if not store.remap_if_changed(db):
+            store.refresh_overlay(db)
+    finally:
+        db.close()
+
+
+def main() -> None:
+    """Command line entry point for building snapshots."""
+    parser = argparse.ArgumentParser(description="Build a memory-mapped user snapshot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Write the users table to a snapshot file")
+    build_parser.add_argument("path", nargs="?", default=settings.user_snapshot_path)
+    args = parser.parse_args()
+
+    if not args.path:
+        parser.error("Snapshot path is required (argument or USER_SNAPSHOT_PATH)")
+    db = ReadSessionLocal()
+    try:
+        count = build_snapshot(db, args.path)
+    finally:
+        db.close()
+    print(f"Wrote {count} users to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
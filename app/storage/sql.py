@@ -0,0 +1,49 @@
+"""SQL-backed user store."""
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.storage.base import UserStore
+
+# Built once at import: a Core select of the single column the GET path needs.
+# Executing it on the session's connection skips ORM query construction and
+# entity hydration; SQLAlchemy's compiled cache then reuses the compiled SQL.
+_users = User.__table__
+DATE_OF_BIRTH_BY_USERNAME = select(_users.c.date_of_birth).where(
+    _users.c.username == bindparam("username")
+)
+DATES_OF_BIRTH_BY_USERNAMES = select(_users.c.username, _users.c.date_of_birth).where(
+    _users.c.username.in_(bindparam("usernames", expanding=True))
+)
+
+
+class SQLUserStore(UserStore):
+    """User store that reads directly from the database."""
+
+    def __init__(self, db: Session):
+        """Initialize SQLUserStore with database session."""
+        self.db = db
+
+    def get_date_of_birth(self, username: str) -> Optional[date]:
+        """Get user's date of birth from the users table."""
+        return self.db.connection().execute(DATE_OF_BIRTH_BY_USERNAME, {"username": username}).scalar()
+
+    def get_dates_of_birth(self, usernames: Iterable[str]) -> Dict[str, date]:
+        """Get dates of birth for many users with one query."""
+        usernames = list(usernames)
+        if not usernames:
+            return {}
+        rows = self.db.connection().execute(DATES_OF_BIRTH_BY_USERNAMES, {"usernames": usernames})
+        return {username: date_of_birth for username, date_of_birth in rows}
+
+    def put(self, username: str, date_of_birth: date) -> None:
+        """Nothing to do, the write is already in the database."""
+
+    def delete(self, username: str) -> None:
+        """Nothing to do, the delete is already in the database."""
+
+    def refresh(self, db: Session, username: str) -> None:
+        """Nothing to do, every lookup reads the database."""
@@ -0,0 +1,63 @@
+"""Benchmark per-request CPU of the GET lookup query.
+
+Compares the ORM entity query the GET path used originally, the ORM column
+query, and the precompiled Core select now used by SQLUserStore, against a
+temporary SQLite database.
+
+Usage: python -m benchmarks.bench_lookup_query [--users N] [--lookups N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.user import User
+from app.services.user_service import UserService
+from app.storage.sql import SQLUserStore
+
+
+def cpu_per_call(lookup, usernames, lookups: int) -> float:
+    """Return CPU microseconds per lookup after a warm-up."""
+    for username in usernames[:500]:
+        lookup(username)
+    start = time.process_time()
+    for i in range(lookups):
+        lookup(usernames[i % len(usernames)])
+    return (time.process_time() - start) / lookups * 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        usernames = [f"user_{i}" for i in range(args.users)]
+        db.execute(insert(User), [{"username": username, "date_of_birth": date(1990, 5, 15)} for username in usernames])
+        db.commit()
+
+        store = SQLUserStore(db)
+        service = UserService(db, store=store)
+        candidates = {
+            "ORM entity (query(User).first())": lambda u: db.query(User).filter(User.username == u).first().date_of_birth,
+            "ORM column (query(User.date_of_birth))": lambda u: db.query(User.date_of_birth).filter(User.username == u).scalar(),
+            "Core select (SQLUserStore)": store.get_date_of_birth,
+            "get_birthday_message (SQLUserStore)": service.get_birthday_message,
+        }
+        for name, lookup in candidates.items():
+            print(f"{name:<42} {cpu_per_call(lookup, usernames, args.lookups):7.1f} us CPU/call")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark response serialization.
+
+Measures per-request CPU of a minimal GET endpoint answering
+``{"message": ...}`` the original way (return a pydantic model that FastAPI
+validates against ``response_model`` and encodes with ``json``) and with
+FastJSONResponse, driving the ASGI app directly so no HTTP client cost is
+included. Also compares JSON and MessagePack encoding of a large batch
+payload.
+
+Usage: python -m benchmarks.bench_serialization [--requests N] [--batch N]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+
+from app.core.responses import FastJSONResponse, MsgPackResponse
+from app.schemas.user import BirthdayMessage
+
+
+def make_app() -> FastAPI:
+    """Create an app with a model-returning and a fast-path endpoint."""
+    app = FastAPI()
+
+    @app.get("/model/{username}", response_model=BirthdayMessage)
+    async def model(username: str):
+        return BirthdayMessage(message=f"Hello, {username}! Your birthday is in 42 days")
+
+    @app.get("/fast/{username}", response_model=BirthdayMessage)
+    async def fast(username: str):
+        return FastJSONResponse({"message": f"Hello, {username}! Your birthday is in 42 days"})
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, requests: int) -> float:
+    """Return CPU microseconds per request sent straight to the ASGI app."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(500):
+        await app(dict(scope), receive, send)
+    start = time.process_time()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.process_time() - start) / requests * 1e6
+
+
+def encode_cost(render, content, rounds: int) -> float:
+    """Return CPU microseconds per encode."""
+    start = time.process_time()
+    for _ in range(rounds):
+        render(content)
+    return (time.process_time() - start) / rounds * 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = make_app()
+    for name, path in (("response_model + json", "/model/alice"), ("FastJSONResponse", "/fast/alice")):
+        print(f"GET {name:<28} {asyncio.run(drive(app, path, args.requests)):7.1f} us CPU/request")
+
+    batch = {"messages": {f"user_{i}": f"Hello, user_{i}! Your birthday is in {i % 366} days" for i in range(args.batch)}}
+    encoders = {
+        "json.dumps": lambda content: json.dumps(content).encode(),
+        "FastJSONResponse": FastJSONResponse(None).render,
+        "MsgPackResponse": MsgPackResponse(None).render,
+    }
+    for name, render in encoders.items():
+        size = len(render(batch))
+        print(f"Batch of {args.batch} via {name:<18} {encode_cost(render, batch, 200):8.1f} us CPU, {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark default SQLite settings against the tuned SQLite mode.
+
+Runs one writer thread creating users (one commit each) alongside reader
+threads doing birthday lookups, and reports throughput and latency for
+both modes.
+
+Usage: python -m benchmarks.bench_sqlite_modes [--seconds N] [--readers N]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_database_engine
+from app.services.user_service import UserService
+from app.storage.sql import SQLUserStore
+
+SEED_USERS = 20000
+
+
+def run_mode(url: str, tuned: bool, seconds: float, readers: int):
+    """Run the mixed workload and return (write latencies, read latencies)."""
+    writer_engine = create_database_engine(url, tuned=tuned)
+    reader_engine = create_database_engine(url, read_only=True, tuned=tuned) if tuned else writer_engine
+    Base.metadata.create_all(bind=writer_engine)
+    WriteSession = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=reader_engine)
+
+    with writer_engine.begin() as connection:
+        connection.exec_driver_sql(
+            "WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+            "INSERT INTO users (username, date_of_birth) SELECT 'seed_' || i, '1990-05-15' FROM n",
+            (SEED_USERS - 1,),
+        )
+
+    stop = threading.Event()
+    write_latencies, read_latencies = [], []
+
+    def writer():
+        db = WriteSession()
+        service = UserService(db)
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            service.create_user(f"user_{i}", date(1990, 5, 15))
+            write_latencies.append(time.perf_counter() - start)
+            i += 1
+        db.close()
+
+    def reader():
+        latencies = []
+        while not stop.is_set():
+            db = ReadSession()
+            service = UserService(db, store=SQLUserStore(db))
+            start = time.perf_counter()
+            service.get_birthday_message(f"seed_{random.randrange(SEED_USERS)}")
+            latencies.append(time.perf_counter() - start)
+            db.close()
+        read_latencies.extend(latencies)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    writer_engine.dispose()
+    reader_engine.dispose()
+    return write_latencies, read_latencies
+
+
+def summarize(name: str, latencies, seconds: float) -> str:
+    """Format throughput and latency percentiles in milliseconds."""
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    return (f"{name:<6} {len(latencies) / seconds:9.0f} ops/s   "
+            f"p50 {statistics.median(latencies) * 1000:7.2f} ms   p99 {p99:7.2f} ms")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    for tuned in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            writes, reads = run_mode(url, tuned, args.seconds, args.readers)
+        print("tuned (WAL, synchronous=NORMAL, mmap, reader pool)" if tuned else "default pragmas")
+        print("  " + summarize("PUT", writes, args.seconds))
+        print("  " + summarize("GET", reads, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
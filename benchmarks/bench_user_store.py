@@ -0,0 +1,113 @@
+"""Benchmark the SQL, in-memory and snapshot user store backends.
+
+Reports memory per user and GET latency (``UserService.get_birthday_message``)
+against a temporary SQLite database.
+
+Usage: python -m benchmarks.bench_user_store [--users N] [--lookups N]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.user import User
+from app.services.user_service import UserService
+from app.storage.memory import InMemoryUserStore
+from app.storage.snapshot import SnapshotUserStore, UserSnapshot, build_snapshot
+from app.storage.sql import SQLUserStore
+
+
+def populate(session_factory, users: int) -> None:
+    """Insert synthetic users in batches."""
+    db = session_factory()
+    start = date(1950, 1, 1).toordinal()
+    batch = []
+    for i in range(users):
+        batch.append({"username": f"user_{i}", "date_of_birth": date.fromordinal(start + i % 25000)})
+        if len(batch) == 10000:
+            db.execute(insert(User), batch)
+            batch = []
+    if batch:
+        db.execute(insert(User), batch)
+    db.commit()
+    db.close()
+
+
+def measure_bytes(load) -> int:
+    """Return bytes retained by the object returned from load."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = load()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def measure_latency(service: UserService, usernames, lookups: int):
+    """Return per-lookup latencies in microseconds."""
+    latencies = []
+    for _ in range(lookups):
+        username = random.choice(usernames)
+        start = time.perf_counter()
+        service.get_birthday_message(username)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def report(name: str, latencies) -> None:
+    """Print latency percentiles."""
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<8} GET p50 {statistics.median(latencies):8.1f} us   p99 {p99:8.1f} us")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        populate(session_factory, args.users)
+        usernames = [f"user_{i}" for i in range(args.users)]
+
+        db = session_factory()
+        orm_bytes = measure_bytes(lambda: db.query(User).all())
+        db.expunge_all()
+
+        store = InMemoryUserStore()
+        store_bytes = measure_bytes(lambda: store.load(db))
+
+        print(f"users: {args.users}")
+        print(f"User objects    {orm_bytes / args.users:8.1f} bytes/user")
+        print(f"in-memory store {store_bytes / args.users:8.1f} bytes/user "
+              f"(buffers {store.nbytes() / args.users:.1f} bytes/user)")
+
+        snapshot_path = os.path.join(directory, "users.snap")
+        build_snapshot(db, snapshot_path)
+        snapshot_store = SnapshotUserStore(UserSnapshot(snapshot_path))
+        print(f"snapshot file   {os.path.getsize(snapshot_path) / args.users:8.1f} bytes/user "
+              f"(shared page cache)")
+
+        report("sql", measure_latency(UserService(db, store=SQLUserStore(db)), usernames, args.lookups))
+        report("memory", measure_latency(UserService(db, store=store), usernames, args.lookups))
+        report("snapshot", measure_latency(UserService(db, store=snapshot_store), usernames, args.lookups))
+        snapshot_store.snapshot.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
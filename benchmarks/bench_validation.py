@@ -0,0 +1,156 @@
+"""Benchmark per-request validation of usernames and dates of birth.
+
+Compares the original pipeline with the single-pass one in
+app/core/validation.py. The original checked the username in the
+endpoint with an uncompiled ``re.match`` and again in the model, and the
+UserCreate date validator was a no-op. The single-pass pipeline checks
+both values while FastAPI parses the request. Three measurements:
+
+- the validation calls alone;
+- a PUT driven straight into the ASGI app with no database, so the
+  numbers include parameter parsing but no HTTP client cost;
+- a batch of 1000 usernames.
+
+Usage: python -m benchmarks.bench_validation [--requests N]
+"""
+import argparse
+import asyncio
+import re
+import time
+from datetime import date
+from typing import List
+
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel, TypeAdapter, field_validator
+
+from app.core.validation import Username, UsernamePath
+from app.schemas.user import BirthdayMessagesRequest, UserCreate
+
+
+def original_validate_username(username: str) -> str:
+    """Endpoint check as originally written."""
+    if not username:
+        raise HTTPException(status_code=400, detail="Username cannot be empty")
+    if len(username) > 50:
+        raise HTTPException(status_code=400, detail="Username cannot be longer than 50 characters")
+    if not re.match(r'^[a-zA-Z0-9_]+$', username):
+        raise HTTPException(status_code=400, detail="Username can only contain alphanumeric characters and underscores")
+    return username
+
+
+def original_model_checks(username: str, date_of_birth: date) -> None:
+    """User model checks as originally written."""
+    if not username:
+        raise ValueError("Username cannot be empty")
+    if len(username) > 64:
+        raise ValueError("Username cannot be longer than 64 characters")
+    if date_of_birth > date.today():
+        raise ValueError("Date of birth cannot be in the future")
+
+
+class OriginalUserCreate(BaseModel):
+    """UserCreate with its original no-op date validator."""
+    dateOfBirth: date
+
+    @field_validator('dateOfBirth')
+    @classmethod
+    def validate_date_of_birth(cls, v):
+        return v
+
+
+class OriginalBatch(BaseModel):
+    """BirthdayMessagesRequest before usernames were typed."""
+    usernames: List[str]
+
+
+def make_app() -> FastAPI:
+    """Create an app with an original and a single-pass PUT endpoint."""
+    app = FastAPI()
+
+    @app.put("/original/{username}", status_code=204)
+    async def original(username: str, user_data: OriginalUserCreate):
+        original_validate_username(username)
+        original_model_checks(username, user_data.dateOfBirth)
+        return Response(status_code=204)
+
+    @app.put("/single-pass/{username}", status_code=204)
+    async def single_pass(username: UsernamePath, user_data: UserCreate):
+        return Response(status_code=204)
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, body: bytes, requests: int) -> float:
+    """Return CPU microseconds per PUT sent straight to the ASGI app."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "PUT",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(500):
+        await app(dict(scope), receive, send)
+    start = time.process_time()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.process_time() - start) / requests * 1e6
+
+
+def cpu_per_call(function, rounds: int) -> float:
+    """Return CPU microseconds per call after a warm-up."""
+    for _ in range(1000):
+        function()
+    start = time.process_time()
+    for _ in range(rounds):
+        function()
+    return (time.process_time() - start) / rounds * 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    username = "john_doe_1990"
+    body = b'{"dateOfBirth": "1990-05-15"}'
+    username_adapter = TypeAdapter(Username)
+
+    def original_calls():
+        user_data = OriginalUserCreate.model_validate_json(body)
+        original_validate_username(username)
+        original_model_checks(username, user_data.dateOfBirth)
+
+    def single_pass_calls():
+        UserCreate.model_validate_json(body)
+        username_adapter.validate_python(username)
+
+    for name, calls in (("original", original_calls), ("single-pass", single_pass_calls)):
+        print(f"Validation calls, {name:<12} {cpu_per_call(calls, args.requests * 5):7.2f} us CPU/request")
+
+    app = make_app()
+    for name in ("original", "single-pass"):
+        cost = asyncio.run(drive(app, f"/{name}/{username}", body, args.requests))
+        print(f"PUT via ASGI, {name:<17} {cost:7.1f} us CPU/request")
+
+    usernames = [f"user_{i}" for i in range(1000)]
+    batch = {"usernames": usernames}
+
+    def original_batch():
+        for item in OriginalBatch.model_validate(batch).usernames:
+            original_validate_username(item)
+
+    for name, parse in (("original", original_batch),
+                        ("single-pass", lambda: BirthdayMessagesRequest.model_validate(batch))):
+        print(f"Batch of 1000, {name:<16} {cpu_per_call(parse, 500):7.1f} us CPU/batch")
+
+
+if __name__ == "__main__":
+    main()
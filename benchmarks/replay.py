@@ -0,0 +1,177 @@
+"""Replay captured production traffic against a test instance.
+
+Reads capture files written by TRAFFIC_CAPTURE_ENABLED (see
+app/core/traffic_capture.py) and re-issues the requests with the original
+spacing, optionally compressed by --speed. Each username hash becomes a
+synthetic username, so key skew and PUT/GET interleaving are kept.
+Routes other than /hello/{username} are replayed only if they take no
+path parameters and no body; the rest are counted as skipped.
+
+Closed loop (default): at most --concurrency requests are in flight.
+When the server falls behind, the schedule slips. Latency is measured from
+the actual send, so it understates what clients would see.
+
+Open loop (--open-loop): every request is sent at its scheduled time,
+however many are still outstanding. Latency is measured from the
+scheduled time, which avoids coordinated omission.
+
+Usage: python -m benchmarks.replay capture-*.bin [--target URL] [--speed N]
+       [--open-loop] [--concurrency N] [--no-seed]
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.traffic_capture import CapturedRequest, read_capture
+
+HELLO_ROUTE = "/hello/{username}"
+
+
+def synthetic_username(username_hash: str) -> str:
+    """Return the replay username standing in for a hashed one."""
+    return f"u{username_hash}"
+
+
+def synthetic_date_of_birth(username_hash: str) -> date:
+    """Return a stable date of birth for a hashed username."""
+    return date(1950, 1, 1) + timedelta(days=int(username_hash, 16) % 20000)
+
+
+def to_http(request: CapturedRequest) -> Optional[Tuple[str, str, Optional[dict]]]:
+    """Return (method, path, json body) for a captured request, or None if it cannot be replayed."""
+    if request.route == HELLO_ROUTE and request.username_hash is not None:
+        path = f"/hello/{synthetic_username(request.username_hash)}"
+        if request.method == "PUT":
+            return "PUT", path, {"dateOfBirth": synthetic_date_of_birth(request.username_hash).isoformat()}
+        return request.method, path, None
+    if "{" not in request.route and request.method in ("GET", "HEAD") and request.route != "unmatched":
+        return request.method, request.route, None
+    return None
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the value at fraction of a sorted list (nearest rank)."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Replay:
+    """Schedules captured requests and collects their latencies."""
+
+    def __init__(self, client: httpx.AsyncClient, speed: float, open_loop: bool, concurrency: int):
+        """Initialize the replay."""
+        self.client = client
+        self.speed = speed
+        self.open_loop = open_loop
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: "Counter[Tuple[str, int]]" = Counter()
+
+    async def run(self, schedule: List[Tuple[float, str, str, str, Optional[dict]]]) -> float:
+        """Replay the schedule of (offset, label, method, path, body); return the wall time taken."""
+        start = time.perf_counter()
+        tasks = []
+        for offset, label, method, path, body in schedule:
+            scheduled_at = start + offset / self.speed
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self.open_loop:
+                await self.semaphore.acquire()
+            tasks.append(asyncio.create_task(self._send(scheduled_at, label, method, path, body)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    async def _send(self, scheduled_at: float, label: str, method: str, path: str, body: Optional[dict]) -> None:
+        """Send one request and record its latency."""
+        started_at = scheduled_at if self.open_loop else time.perf_counter()
+        try:
+            response = await self.client.request(method, path, json=body)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        finally:
+            if not self.open_loop:
+                self.semaphore.release()
+        self.latencies[label].append(time.perf_counter() - started_at)
+        self.statuses[(label, status)] += 1
+
+    def report(self, wall_time: float) -> None:
+        """Print throughput, status codes and the latency distribution per route."""
+        total = sum(len(values) for values in self.latencies.values())
+        print(f"{total} requests in {wall_time:.1f}s ({total / wall_time:.1f} req/s), "
+              f"{'open' if self.open_loop else 'closed'} loop")
+        print(f"{'route':<28} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'max ms':>8}")
+        everything = sorted(latency for values in self.latencies.values() for latency in values)
+        rows = [(label, sorted(values)) for label, values in sorted(self.latencies.items())] + [("all", everything)]
+        for label, values in rows:
+            print(f"{label:<28} {len(values):>7} " + " ".join(
+                f"{percentile(values, fraction) * 1000:>{width}.1f}"
+                for fraction, width in ((0.5, 8), (0.9, 8), (0.99, 8), (0.999, 9), (1.0, 8))
+            ))
+        print("status codes: " + ", ".join(
+            f"{label} {status or 'error'}: {count}" for (label, status), count in sorted(self.statuses.items())
+        ))
+
+
+def build_schedule(paths: List[str]) -> Tuple[List[Tuple[float, str, str, str, Optional[dict]]], Counter]:
+    """Merge capture files into one schedule ordered by arrival time."""
+    captured = sorted((request for path in paths for request in read_capture(path)), key=lambda r: r.timestamp)
+    skipped: Counter = Counter()
+    schedule = []
+    for request in captured:
+        http = to_http(request)
+        if http is None:
+            skipped[f"{request.method} {request.route}"] += 1
+            continue
+        method, path, body = http
+        schedule.append((request.timestamp - captured[0].timestamp, f"{method} {request.route}", method, path, body))
+    return schedule, skipped
+
+
+async def seed(client: httpx.AsyncClient, paths: List[str]) -> int:
+    """Create every replayed user so that reads find them, as they did in production."""
+    hashes = {request.username_hash for path in paths for request in read_capture(path) if request.username_hash}
+    for username_hash in hashes:
+        await client.put(
+            f"/hello/{synthetic_username(username_hash)}",
+            json={"dateOfBirth": synthetic_date_of_birth(username_hash).isoformat()},
+        )
+    return len(hashes)
+
+
+async def replay(args: argparse.Namespace) -> None:
+    """Seed, replay and report."""
+    schedule, skipped = build_schedule(args.captures)
+    limits = httpx.Limits(max_connections=None if args.open_loop else args.concurrency)
+    async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=args.timeout) as client:
+        if not args.no_seed:
+            print(f"Seeded {await seed(client, args.captures)} users")
+        runner = Replay(client, args.speed, args.open_loop, args.concurrency)
+        wall_time = await runner.run(schedule)
+    runner.report(wall_time)
+    if skipped:
+        print("skipped: " + ", ".join(f"{route}: {count}" for route, count in skipped.most_common()))
+
+
+def main() -> None:
+    """Run the replay."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("captures", nargs="+", help="Capture files, merged by timestamp")
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression, e.g. 10 for 10x")
+    parser.add_argument("--open-loop", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=64, help="In-flight limit in closed-loop mode")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--no-seed", action="store_true", help="Do not create the replayed users first")
+    asyncio.run(replay(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
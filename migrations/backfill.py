@@ -0,0 +1,238 @@
+"""Online, resumable backfills for data migrations.
+
+A derived column is added in three steps, so the table is never locked for
+long and the application keeps serving throughout:
+
+1. A schema migration adds the column as nullable. This is a
+   metadata-only change.
+2. New writes fill the column: either a trigger created in the same
+   migration, or a dual-write registered in ``UserService.DUAL_WRITES``
+   and deployed before the backfill runs.
+3. ``ChunkedBackfill`` fills in existing rows in primary-key order. Each
+   chunk is its own short transaction that also records a checkpoint. A
+   throttle keeps the backfill to a fraction of wall time, and an
+   interrupted run resumes after the last committed chunk.
+
+A migration lists its backfills in ``BACKFILLS``. It commits the DDL first,
+so its locks are released, and then runs them on separate connections::
+
+    from migrations.backfill import ChunkedBackfill, skip_inline_backfill
+
+    users = sa.table('users', sa.column('id'), sa.column('date_of_birth'), sa.column('birth_month'))
+    BACKFILLS = [ChunkedBackfill(
+        'users_birth_month', users, users.c.id,
+        values={'birth_month': sa.extract('month', users.c.date_of_birth)},
+        where=users.c.birth_month.is_(None),
+    )]
+
+    def upgrade() -> None:
+        op.add_column('users', sa.Column('birth_month', sa.SmallInteger(), nullable=True))
+        if not skip_inline_backfill():
+            with op.get_context().autocommit_block():
+                for backfill in BACKFILLS:
+                    backfill.run(op.get_bind().engine)
+
+For very large tables, migrate with ``alembic -x backfill=skip upgrade
+head``, then run ``python -m migrations.backfill run <revision>`` as a
+separate step. Follow its progress with ``python -m migrations.backfill
+status``.
+
+Chunk updates must be idempotent. A chunk whose checkpoint write failed
+is run again.
+"""
+import argparse
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+checkpoint_metadata = sa.MetaData()
+
+backfill_checkpoints = sa.Table(
+    'backfill_checkpoints', checkpoint_metadata,
+    sa.Column('name', sa.String(128), primary_key=True),
+    sa.Column('last_key', sa.BigInteger(), nullable=True),
+    sa.Column('rows_updated', sa.BigInteger(), nullable=False, default=0),
+    sa.Column('chunks', sa.Integer(), nullable=False, default=0),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+)
+
+
+class ChunkedBackfill:
+    """Keyset-ordered, checkpointed, throttled UPDATE of one table.
+
+    ``key`` must be an integer column with a unique index, usually the
+    primary key. ``values`` maps column names to SQL expressions evaluated
+    per row. ``where`` optionally narrows the update to rows that still need
+    it, such as rows where the derived column IS NULL. Rows written by
+    dual-writes or triggers are then not rewritten.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        table: sa.TableClause,
+        key: sa.ColumnElement,
+        values: Dict[str, Any],
+        where: Optional[sa.ColumnElement] = None,
+        chunk_size: int = 1000,
+        pause_seconds: float = 0.05,
+        max_duty_cycle: float = 0.5,
+    ):
+        """Initialize the backfill.
+
+        Between chunks it sleeps at least ``pause_seconds``, and long enough
+        that updating takes no more than ``max_duty_cycle`` of wall time.
+        """
+        if not 0 < max_duty_cycle <= 1:
+            raise ValueError("max_duty_cycle must be in (0, 1]")
+        self.name = name
+        self.table = table
+        self.key = key
+        self.values = values
+        self.where = where
+        self.chunk_size = chunk_size
+        self.pause_seconds = pause_seconds
+        self.max_duty_cycle = max_duty_cycle
+
+    def run(self, engine: Engine, max_chunks: Optional[int] = None) -> int:
+        """Backfill until done or for max_chunks chunks; return the rows updated by this run."""
+        checkpoint_metadata.create_all(engine, checkfirst=True)
+        self._ensure_checkpoint(engine)
+        updated = 0
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            start_time = time.perf_counter()
+            with engine.begin() as connection:
+                chunk_rows, done = self._run_chunk(connection)
+            elapsed = time.perf_counter() - start_time
+            updated += chunk_rows
+            chunks += 1
+            if done:
+                logger.info("Backfill %s complete: %d rows in this run", self.name, updated)
+                break
+            time.sleep(self.throttle(elapsed))
+        return updated
+
+    def throttle(self, chunk_seconds: float) -> float:
+        """Return how long to sleep after a chunk that took chunk_seconds."""
+        return max(self.pause_seconds, chunk_seconds * (1 - self.max_duty_cycle) / self.max_duty_cycle)
+
+    def _ensure_checkpoint(self, engine: Engine) -> None:
+        """Create the checkpoint row on the first run."""
+        try:
+            with engine.begin() as connection:
+                connection.execute(backfill_checkpoints.insert().values(name=self.name, rows_updated=0, chunks=0))
+        except IntegrityError:
+            pass
+
+    def _run_chunk(self, connection: Connection):
+        """Update the next chunk and advance the checkpoint; return (rows updated, done)."""
+        # Locking the checkpoint row keeps concurrent runners from doing the same chunk
+        checkpoint = connection.execute(
+            sa.select(backfill_checkpoints.c.last_key, backfill_checkpoints.c.completed_at)
+            .where(backfill_checkpoints.c.name == self.name)
+            .with_for_update()
+        ).one()
+        if checkpoint.completed_at is not None:
+            return 0, True
+
+        in_range = []
+        if checkpoint.last_key is not None:
+            in_range.append(self.key > checkpoint.last_key)
+        upper_key = connection.execute(
+            sa.select(self.key).where(*in_range).order_by(self.key).offset(self.chunk_size - 1).limit(1)
+        ).scalar()
+        if upper_key is not None:
+            in_range.append(self.key <= upper_key)
+
+        update = sa.update(self.table).where(*in_range).values(**self.values)
+        if self.where is not None:
+            update = update.where(self.where)
+        rows = connection.execute(update).rowcount
+
+        done = upper_key is None
+        connection.execute(
+            backfill_checkpoints.update()
+            .where(backfill_checkpoints.c.name == self.name)
+            .values(
+                last_key=upper_key if upper_key is not None else checkpoint.last_key,
+                rows_updated=backfill_checkpoints.c.rows_updated + rows,
+                chunks=backfill_checkpoints.c.chunks + 1,
+                updated_at=sa.func.now(),
+                completed_at=sa.func.now() if done else None,
+            )
+        )
+        return rows, done
+
+
+def reset_checkpoint(engine: Engine, name: str) -> None:
+    """Forget a backfill's progress so the next run starts over."""
+    with engine.begin() as connection:
+        connection.execute(backfill_checkpoints.delete().where(backfill_checkpoints.c.name == name))
+
+
+def include_object(obj: Any, name: Optional[str], type_: str, reflected: bool, compare_to: Any) -> bool:
+    """Alembic include_object hook that hides the checkpoint table from autogenerate.
+
+    Backfills create ``backfill_checkpoints`` on demand and it is not part of
+    the application's metadata, so autogenerate would otherwise drop it.
+    """
+    return not (type_ == "table" and name == backfill_checkpoints.name)
+
+
+def skip_inline_backfill() -> bool:
+    """Return True when a migration should not backfill in line.
+
+    That is the case in offline (--sql) mode and with ``-x backfill=skip``.
+    """
+    from alembic import context
+    return context.is_offline_mode() or context.get_x_argument(as_dictionary=True).get("backfill") == "skip"
+
+
+def main() -> None:
+    """Command line entry point for inspecting and running backfills."""
+    import importlib.util
+    from pathlib import Path
+
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Inspect and run online backfills")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Show the progress of every backfill")
+    reset_parser = subparsers.add_parser("reset", help="Forget a backfill's progress")
+    reset_parser.add_argument("name")
+    run_parser = subparsers.add_parser("run", help="Run the BACKFILLS defined in a migration revision")
+    run_parser.add_argument("revision")
+    run_parser.add_argument("--max-chunks", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    engine = sa.create_engine(settings.database_direct_url or settings.get_database_url)
+    if args.command == "status":
+        checkpoint_metadata.create_all(engine, checkfirst=True)
+        with engine.connect() as connection:
+            for row in connection.execute(sa.select(backfill_checkpoints).order_by(backfill_checkpoints.c.name)):
+                state = f"completed {row.completed_at}" if row.completed_at else f"at key {row.last_key}"
+                print(f"{row.name}: {row.rows_updated} rows in {row.chunks} chunks, {state}")
+    elif args.command == "reset":
+        reset_checkpoint(engine, args.name)
+    else:
+        paths = list((Path(__file__).parent / "versions").glob(f"{args.revision}*.py"))
+        if len(paths) != 1:
+            parser.error(f"Expected one migration matching {args.revision}, found {len(paths)}")
+        spec = importlib.util.spec_from_file_location(paths[0].stem, paths[0])
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for backfill in getattr(module, "BACKFILLS", []):
+            backfill.run(engine, max_chunks=args.max_chunks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Create birthday_stats table
+
+Revision ID: 4c2e8a7d1b90
+Revises: 915079389c7e
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c2e8a7d1b90'
+down_revision = '915079389c7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    birthday_stats = op.create_table('birthday_stats',
+    sa.Column('month', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('day', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('user_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('month', 'day')
+    )
+    # Seed the counters from existing users
+    users = sa.table('users', sa.column('date_of_birth', sa.Date()))
+    month = sa.extract('month', users.c.date_of_birth)
+    day = sa.extract('day', users.c.date_of_birth)
+    op.execute(birthday_stats.insert().from_select(
+        ['month', 'day', 'user_count'],
+        sa.select(month, day, sa.func.count()).group_by(month, day),
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table('birthday_stats')
@@ -0,0 +1,36 @@
+"""Add username prefix search index
+
+Revision ID: 9e1f3b6c2a47
+Revises: 4c2e8a7d1b90
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e1f3b6c2a47'
+down_revision = '4c2e8a7d1b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Bytewise-ordered index for prefix ranges: username COLLATE "C" >= :low
+    # AND < :high ORDER BY ... LIMIT n is one ordered index range scan. SQLite's
+    # default BINARY collation already does this with ix_users_username.
+    # Built concurrently so writes to users are not blocked meanwhile; that
+    # cannot run inside the migration's transaction.
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_users_username_c', 'users', [sa.text('username COLLATE "C"')], unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_users_username_c', table_name='users', postgresql_concurrently=True)
@@ -0,0 +1,56 @@
+"""Tests for birthday listing API endpoints."""
+from datetime import date, timedelta
+
+
+class TestBirthdaysAPI:
+    """Test cases for birthday listing API endpoints."""
+
+    def test_lists_todays_birthdays_paginated(self, client):
+        """Test paging through today's birthdays."""
+        # Arrange
+        today = date.today()
+        for username in ("alice", "bob", "carol"):
+            client.put(f"/hello/{username}", json={"dateOfBirth": today.replace(year=1992).isoformat()})
+
+        # Act
+        first = client.get("/birthdays?limit=2")
+        second = client.get(f"/birthdays?limit=2&cursor={first.json()['next_cursor']}")
+
+        # Assert
+        assert first.status_code == 200
+        assert first.json() == {"date": today.isoformat(), "usernames": ["alice", "bob"], "next_cursor": "bob"}
+        assert second.json()["usernames"] == ["carol"]
+        assert second.json()["next_cursor"] is None
+
+    def test_lists_tomorrows_birthdays(self, client):
+        """Test listing tomorrow's birthdays."""
+        # Arrange
+        tomorrow = date.today() + timedelta(days=1)
+        client.put("/hello/alice", json={"dateOfBirth": tomorrow.replace(year=1992).isoformat()})
+
+        # Act
+        response = client.get("/birthdays?day=tomorrow")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["date"] == tomorrow.isoformat()
+        assert response.json()["usernames"] == ["alice"]
+
+    def test_birthday_stats(self, client):
+        """Test the birthday distribution endpoint."""
+        # Arrange
+        today = date.today()
+        client.put("/hello/alice", json={"dateOfBirth": today.replace(year=1992).isoformat()})
+        client.put("/hello/bob", json={"dateOfBirth": today.replace(year=1992).isoformat()})
+        client.put("/hello/carol", json={"dateOfBirth": (today + timedelta(days=100)).replace(year=1992).isoformat()})
+
+        # Act
+        response = client.get("/stats/birthdays?upcoming_days=30")
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] == 3
+        assert body["upcoming_count"] == 2
+        assert {"month": today.month, "day": today.day, "count": 2} in body["by_day"]
+        assert sum(body["by_month"].values()) == 3
@@ -0,0 +1,98 @@
+"""Tests for debug API endpoints."""
+from app.core.config import settings
+from app.core.flight_recorder import flight_recorder
+from app.core.profiler import SamplingProfiler, store_profile
+
+
+class TestDebugAPI:
+    """Test cases for debug API endpoints."""
+
+    def test_disabled_without_token(self, client):
+        """Test that debug endpoints do not exist unless a token is configured."""
+        # Act
+        response = client.get("/debug/slow-requests", headers={"X-Debug-Token": ""})
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_rejects_wrong_token(self, client, monkeypatch):
+        """Test that a wrong token is rejected."""
+        # Arrange
+        monkeypatch.setattr(settings, "debug_token", "secret")
+
+        # Act
+        response = client.get("/debug/slow-requests", headers={"X-Debug-Token": "guess"})
+
+        # Assert
+        assert response.status_code == 401
+
+    def test_lists_and_clears_slow_requests(self, client, monkeypatch):
+        """Test listing and clearing recorded slow requests."""
+        # Arrange
+        monkeypatch.setattr(settings, "debug_token", "secret")
+        headers = {"X-Debug-Token": "secret"}
+        flight_recorder.record({
+            "recorded_at": 0.0,
+            "method": "GET",
+            "route": "/hello/{username}",
+            "status_code": 200,
+            "username_hash": "00ff",
+            "total_ms": 300.0,
+            "db_ms": 250.0,
+            "queue_wait_ms": 1.0,
+            "statement_count": 1,
+            "statements": [{"sql": "SELECT 1", "duration_ms": 250.0}],
+        })
+
+        # Act
+        listed = client.get("/debug/slow-requests", headers=headers)
+        cleared = client.delete("/debug/slow-requests", headers=headers)
+
+        # Assert
+        assert listed.status_code == 200
+        assert listed.json()[0]["route"] == "/hello/{username}"
+        assert cleared.status_code == 204
+        assert flight_recorder.entries() == []
+
+    def test_profile(self, client, monkeypatch):
+        """Test an on-demand profile in both output formats."""
+        # Arrange
+        monkeypatch.setattr(settings, "debug_token", "secret")
+        headers = {"X-Debug-Token": "secret"}
+
+        # Act
+        collapsed = client.post("/debug/profile?seconds=0.05", headers=headers)
+        speedscope = client.post("/debug/profile?seconds=0.05&format=speedscope", headers=headers)
+
+        # Assert
+        assert collapsed.status_code == 200
+        assert collapsed.headers["content-type"].startswith("text/plain")
+        assert speedscope.status_code == 200
+        assert speedscope.json()["profiles"][0]["type"] == "sampled"
+
+    def test_profile_duration_is_bounded(self, client, monkeypatch):
+        """Test that profiles longer than a minute are refused."""
+        # Arrange
+        monkeypatch.setattr(settings, "debug_token", "secret")
+
+        # Act
+        response = client.post("/debug/profile?seconds=3600", headers={"X-Debug-Token": "secret"})
+
+        # Assert
+        assert response.status_code == 422
+
+    def test_get_request_profile(self, client, monkeypatch):
+        """Test retrieving a stored per-request profile."""
+        # Arrange
+        monkeypatch.setattr(settings, "debug_token", "secret")
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.stacks[("main (app.py:1)", "handler (app.py:10)")] = 3
+        store_profile("abc", profiler)
+
+        # Act
+        found = client.get("/debug/profiles/abc", headers={"X-Debug-Token": "secret"})
+        missing = client.get("/debug/profiles/missing", headers={"X-Debug-Token": "secret"})
+
+        # Assert
+        assert found.text == "main (app.py:1);handler (app.py:10) 3\n"
+        assert missing.status_code == 404
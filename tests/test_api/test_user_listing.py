@@ -0,0 +1,96 @@
+"""Tests for the user listing API endpoint."""
+from datetime import date, datetime, timedelta
+
+from app.models.user import User
+from app.services.user_listing import encode_cursor
+
+
+def add_users(db, count):
+    """Insert users user_00.. with birth months cycling through the year."""
+    for i in range(count):
+        db.add(User(username=f"user_{i:02d}", date_of_birth=date(1990, 1 + i % 12, 1)))
+    db.commit()
+
+
+class TestUserListingAPI:
+    """Test cases for the user listing API endpoint."""
+
+    def test_pages_through_all_users(self, client, test_db):
+        """Test that following cursors visits every user exactly once."""
+        # Arrange
+        add_users(test_db, 25)
+
+        # Act
+        usernames, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 10} if cursor is None else {"limit": 10, "cursor": cursor}
+            body = client.get("/users", params=params).json()
+            usernames += [item["username"] for item in body["items"]]
+            pages += 1
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+
+        # Assert
+        assert usernames == [f"user_{i:02d}" for i in range(25)]
+        assert pages == 3
+
+    def test_username_order_and_month_filter(self, client, test_db):
+        """Test paging by username with a birth month filter."""
+        # Arrange
+        add_users(test_db, 30)
+
+        # Act
+        first = client.get("/users", params={"order": "username", "birth_month": 3, "limit": 2}).json()
+        second = client.get("/users", params={
+            "order": "username", "birth_month": 3, "limit": 2, "cursor": first["next_cursor"],
+        }).json()
+
+        # Assert
+        assert [item["username"] for item in first["items"]] == ["user_02", "user_14"]
+        assert [item["username"] for item in second["items"]] == ["user_26"]
+        assert second["next_cursor"] is None
+        assert first["items"][0]["date_of_birth"] == "1990-03-01"
+
+    def test_updated_at_filter(self, client, test_db):
+        """Test filtering on updated_at."""
+        # Arrange
+        add_users(test_db, 3)
+        test_db.query(User).filter(User.username == "user_01").update(
+            {"updated_at": datetime(2020, 1, 1)}
+        )
+        test_db.commit()
+
+        # Act
+        old = client.get("/users", params={"updated_before": "2021-01-01T00:00:00"}).json()
+        recent = client.get("/users", params={
+            "updated_since": (datetime.now() - timedelta(days=1)).isoformat(),
+        }).json()
+
+        # Assert
+        assert [item["username"] for item in old["items"]] == ["user_01"]
+        assert [item["username"] for item in recent["items"]] == ["user_00", "user_02"]
+
+    def test_invalid_cursor(self, client, test_db):
+        """Test that malformed and mismatched cursors are rejected."""
+        # Act
+        malformed = client.get("/users", params={"cursor": "not-a-cursor"})
+        mismatched = client.get("/users", params={"cursor": encode_cursor("username", "bob")})
+
+        # Assert
+        assert malformed.status_code == 400
+        assert mismatched.status_code == 400
+
+    def test_prefix_search(self, client, test_db):
+        """Test the username prefix search endpoint."""
+        # Arrange
+        add_users(test_db, 15)
+
+        # Act
+        response = client.get("/users/search", params={"prefix": "user_1", "limit": 3})
+        invalid = client.get("/users/search", params={"prefix": "a%"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"usernames": ["user_10", "user_11", "user_12"]}
+        assert invalid.status_code == 422
@@ -1,9 +1,14 @@
 """Tests for user API endpoints."""
+import msgpack
 import pytest
-from datetime import date
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
 from fastapi.testclient import TestClient
 
+from app.core import idempotency
+from app.core.config import settings
 from app.models.user import User
+from app.storage.sql import SQLUserStore
 
 
 class TestUserAPI:
@@ -101,6 +106,38 @@ class TestUserAPI:
         # Since we removed future date validation, this should succeed
         assert response.status_code == 400
     
+    def test_put_user_validation_messages(self, client):
+        """Test that broken username and date rules answer 400 with the rule's message."""
+        # Arrange
+        future_date = date.today().replace(year=date.today().year + 1).isoformat()
+        cases = [
+            ("user-name", "1990-05-15", "Username can only contain alphanumeric characters and underscores"),
+            ("a" * 51, "1990-05-15", "Username cannot be longer than 50 characters"),
+            ("john_doe", future_date, "Date of birth cannot be in the future"),
+        ]
+
+        for username, date_of_birth, message in cases:
+            # Act
+            response = client.put(f"/hello/{username}", json={"dateOfBirth": date_of_birth})
+
+            # Assert
+            assert response.status_code == 400
+            assert response.json() == {"detail": message}
+    
+    def test_put_user_validates_once(self, client, monkeypatch):
+        """Test that the model does not re-check values the API already validated."""
+        # Arrange
+        model_checks = []
+        monkeypatch.setattr("app.models.user.check_username", model_checks.append)
+        monkeypatch.setattr("app.models.user.check_date_of_birth", model_checks.append)
+
+        # Act
+        response = client.put("/hello/john_doe", json={"dateOfBirth": "1990-05-15"})
+
+        # Assert
+        assert response.status_code == 204
+        assert model_checks == []
+    
     def test_put_user_missing_date_field(self, client):
         """Test PUT endpoint with missing dateOfBirth field."""
         # Arrange
@@ -255,4 +292,180 @@ class TestUserAPI:
         user2 = test_db.query(User).filter(User.username == username2).first()
         assert user1 is not None
         assert user2 is not None
-        assert user1.id != user2.id 
\ No newline at end of file
+        assert user1.id != user2.id 
+
+
+class TestTimeZoneAPI:
+    """Test cases for birthday messages in the caller's time zone."""
+
+    def test_message_follows_callers_date(self, client):
+        """Test that callers on either side of the date line get their own date."""
+        # Arrange
+        ahead = datetime.now(ZoneInfo("Pacific/Kiritimati")).date()
+        client.put("/hello/alice", json={"dateOfBirth": ahead.replace(year=1992).isoformat()})
+
+        # Act
+        ahead_response = client.get("/hello/alice?tz=Pacific/Kiritimati")
+        behind_response = client.get("/hello/alice", headers={"X-Time-Zone": "Pacific/Pago_Pago"})
+
+        # Assert
+        assert ahead_response.json()["message"] == "Hello, alice! Happy birthday!"
+        assert behind_response.json()["message"].startswith("Hello, alice! Your birthday is in ")
+
+    def test_unknown_time_zone(self, client):
+        """Test that an unknown time zone is rejected."""
+        # Arrange
+        client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"})
+
+        # Act
+        response = client.get("/hello/alice?tz=Mars/Olympus_Mons")
+
+        # Assert
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Unknown time zone"
+
+
+class TestBirthdayMessagesAPI:
+    """Test cases for the batch birthday message endpoint."""
+
+    def test_batch_messages(self, client):
+        """Test messages for known and unknown users in one request."""
+        # Arrange
+        client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"})
+
+        # Act
+        response = client.post("/birthday-messages", json={"usernames": ["alice", "nobody"]})
+
+        # Assert
+        assert response.status_code == 200
+        messages = response.json()["messages"]
+        assert messages["alice"].startswith("Hello, alice!")
+        assert messages["nobody"] is None
+
+    def test_batch_is_one_store_lookup(self, client, monkeypatch):
+        """Test that a batch reads the store once, however many usernames it has."""
+        # Arrange
+        client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"})
+        calls = []
+        lookup = SQLUserStore.get_dates_of_birth
+
+        def counting_lookup(store, usernames):
+            calls.append(list(usernames))
+            return lookup(store, usernames)
+
+        monkeypatch.setattr(SQLUserStore, "get_dates_of_birth", counting_lookup)
+
+        # Act
+        response = client.post("/birthday-messages", json={"usernames": ["alice", "bob", "carol"]})
+
+        # Assert
+        assert response.status_code == 200
+        assert calls == [["alice", "bob", "carol"]]
+
+    def test_batch_messages_msgpack(self, client):
+        """Test that the batch endpoint answers MessagePack when asked to."""
+        # Arrange
+        client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"})
+
+        # Act
+        response = client.post(
+            "/birthday-messages",
+            json={"usernames": ["alice"]},
+            headers={"Accept": "application/msgpack"},
+        )
+
+        # Assert
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content)["messages"]["alice"].startswith("Hello, alice!")
+
+    def test_batch_rejects_invalid_username(self, client):
+        """Test that every username in the batch is validated."""
+        # Act
+        response = client.post("/birthday-messages", json={"usernames": ["alice", "bad-name"]})
+
+        # Assert
+        assert response.status_code == 400
+
+
+class TestDeleteUserAPI:
+    """Test cases for deleting users."""
+
+    def test_delete_user(self, client):
+        """Test that a deleted user is gone."""
+        # Arrange
+        client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"})
+
+        # Act
+        response = client.delete("/hello/alice")
+
+        # Assert
+        assert response.status_code == 204
+        assert client.get("/hello/alice").status_code == 404
+
+    def test_delete_unknown_user(self, client):
+        """Test deleting a user that does not exist."""
+        # Act
+        response = client.delete("/hello/nobody")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_delete_invalid_username(self, client):
+        """Test deleting with an invalid username."""
+        # Act
+        response = client.delete("/hello/bad-name")
+
+        # Assert
+        assert response.status_code == 400
+
+
+class TestIdempotencyKeyAPI:
+    """Test cases for PUT retries carrying an Idempotency-Key."""
+
+    @pytest.fixture(autouse=True)
+    def enable_idempotency(self, monkeypatch):
+        """Enable idempotency keys with a fresh store."""
+        monkeypatch.setattr(settings, "idempotency_enabled", True)
+        monkeypatch.setattr(idempotency, "idempotency_store", None)
+
+    def test_retry_is_replayed(self, client, test_db):
+        """Test that a retried PUT gets the original response without writing again."""
+        # Arrange
+        headers = {"Idempotency-Key": "retry-1"}
+        first = client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"}, headers=headers)
+        client.put("/hello/alice", json={"dateOfBirth": "1991-01-01"})
+
+        # Act
+        retry = client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"}, headers=headers)
+
+        # Assert
+        assert first.status_code == retry.status_code == 204
+        assert retry.headers["idempotent-replayed"] == "true"
+        user = test_db.query(User).filter(User.username == "alice").first()
+        assert user.date_of_birth == date(1991, 1, 1)
+
+    def test_key_reused_with_different_body(self, client):
+        """Test that reusing a key for a different date is rejected."""
+        # Arrange
+        headers = {"Idempotency-Key": "retry-2"}
+        client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"}, headers=headers)
+
+        # Act
+        response = client.put("/hello/alice", json={"dateOfBirth": "1991-01-01"}, headers=headers)
+
+        # Assert
+        assert response.status_code == 422
+
+    def test_same_key_for_other_user(self, client):
+        """Test that keys are scoped to the username."""
+        # Arrange
+        headers = {"Idempotency-Key": "retry-3"}
+        client.put("/hello/alice", json={"dateOfBirth": "1990-05-15"}, headers=headers)
+
+        # Act
+        response = client.put("/hello/bob", json={"dateOfBirth": "1990-05-15"}, headers=headers)
+
+        # Assert
+        assert response.status_code == 204
+        assert "idempotent-replayed" not in response.headers
+        assert client.get("/hello/bob").status_code == 200
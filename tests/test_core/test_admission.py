@@ -0,0 +1,99 @@
+"""Tests for admission control."""
+import asyncio
+import httpx
+from fastapi import FastAPI
+
+from app.core.admission import AdmissionControlMiddleware, AdmissionGate
+
+
+def make_app(release: asyncio.Event) -> FastAPI:
+    """Create an app whose endpoints block until release is set."""
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        await release.wait()
+        return {"item_id": item_id}
+
+    @app.put("/items/{item_id}")
+    async def write_item(item_id: str):
+        await release.wait()
+        return {"item_id": item_id}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        read_max_concurrency=1,
+        write_max_concurrency=1,
+        max_queue_length=1,
+        max_queue_time=0.05,
+        retry_after_seconds=2,
+    )
+    return app
+
+
+class TestAdmissionGate:
+    """Test cases for AdmissionGate."""
+
+    def test_admits_up_to_limit_then_times_out(self):
+        """Test that requests over the limit wait and are rejected after the queue time."""
+        async def scenario():
+            gate = AdmissionGate(max_concurrency=1, max_queue_length=10, max_queue_time=0.01)
+            first = await gate.acquire()
+            second = await gate.acquire()
+            return first, second, gate.in_flight
+
+        assert asyncio.run(scenario()) == (None, "queue_timeout", 1)
+
+    def test_full_queue_rejects_immediately(self):
+        """Test that a full queue rejects without waiting."""
+        async def scenario():
+            gate = AdmissionGate(max_concurrency=1, max_queue_length=0, max_queue_time=10)
+            await gate.acquire()
+            return await gate.acquire()
+
+        assert asyncio.run(scenario()) == "queue_full"
+
+    def test_release_hands_slot_to_waiter(self):
+        """Test that a released slot goes to the oldest waiter."""
+        async def scenario():
+            gate = AdmissionGate(max_concurrency=1, max_queue_length=10, max_queue_time=10)
+            await gate.acquire()
+            waiter = asyncio.create_task(gate.acquire())
+            await asyncio.sleep(0)
+            gate.release()
+            admitted = await waiter
+            gate.release()
+            return admitted, gate.in_flight
+
+        assert asyncio.run(scenario()) == (None, 0)
+
+
+class TestAdmissionControlMiddleware:
+    """Test cases for AdmissionControlMiddleware."""
+
+    def test_sheds_reads_with_retry_after(self):
+        """Test that overloaded reads get 503 while writes and health checks pass."""
+        async def scenario():
+            release = asyncio.Event()
+            app = make_app(release)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                blocked = asyncio.create_task(client.get("/items/1"))
+                await asyncio.sleep(0.01)
+                shed = await client.get("/items/2")
+                write = asyncio.create_task(client.put("/items/3"))
+                health = await client.get("/health")
+                release.set()
+                return await blocked, shed, await write, health
+
+        blocked, shed, write, health = asyncio.run(scenario())
+
+        assert blocked.status_code == 200
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "2"
+        assert write.status_code == 200
+        assert health.status_code == 200
@@ -0,0 +1,78 @@
+"""Tests for the circuit breaker."""
+from unittest.mock import patch
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def make_breaker():
+    """Create a breaker opening after two failures."""
+    return CircuitBreaker("test", failure_threshold=2, reset_seconds=10, slow_call_seconds=0.05)
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens only after failure_threshold failures in a row."""
+        # Arrange
+        breaker = make_breaker()
+
+        # Act
+        breaker.record(0.001, failed=True)
+        breaker.record(0.001)
+        breaker.record(0.001, failed=True)
+        still_closed = breaker.state
+        breaker.record(0.001, failed=True)
+
+        # Assert
+        assert still_closed == CLOSED
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_slow_calls_count_as_failures(self):
+        """Test that successful but slow calls open the breaker."""
+        # Arrange
+        breaker = make_breaker()
+
+        # Act
+        breaker.record(0.2)
+        breaker.record(0.2)
+
+        # Assert
+        assert breaker.state == OPEN
+
+    def test_half_open_trial(self):
+        """Test that one trial call is let through after the reset time."""
+        # Arrange
+        breaker = make_breaker()
+        with patch("app.core.circuit_breaker.time.monotonic", return_value=100.0):
+            breaker.record(0.001, failed=True)
+            breaker.record(0.001, failed=True)
+
+        # Act
+        with patch("app.core.circuit_breaker.time.monotonic", return_value=110.0):
+            trial = breaker.allow()
+            second = breaker.allow()
+
+        # Assert
+        assert trial and not second
+        assert breaker.state == HALF_OPEN
+
+    def test_trial_outcome(self):
+        """Test that a successful trial closes the breaker and a failed one reopens it."""
+        # Arrange
+        breaker = make_breaker()
+        with patch("app.core.circuit_breaker.time.monotonic", return_value=100.0):
+            breaker.record(0.001, failed=True)
+            breaker.record(0.001, failed=True)
+
+        # Act & Assert
+        with patch("app.core.circuit_breaker.time.monotonic", return_value=110.0):
+            assert breaker.allow()
+            breaker.record(0.001, failed=True)
+            assert breaker.state == OPEN
+            assert not breaker.allow()
+        with patch("app.core.circuit_breaker.time.monotonic", return_value=120.0):
+            assert breaker.allow()
+            breaker.record(0.001)
+            assert breaker.state == CLOSED
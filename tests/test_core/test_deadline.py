@@ -0,0 +1,157 @@
+"""Tests for request deadlines."""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.core import deadline
+from app.core.database import create_database_engine
+from app.core.deadline import DeadlineExceeded, DeadlineMiddleware, deadline_exceeded_handler, deadline_scope
+from app.core.threadpool import InstrumentedThreadPool
+
+SLOW_QUERY = text(
+    "WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter WHERE n < 100000000) "
+    "SELECT count(*) FROM counter"
+)
+
+
+class TestDeadlineScope:
+    """Test cases for the deadline context."""
+
+    def test_no_deadline_by_default(self):
+        """Test that code outside a request has no deadline."""
+        assert deadline.remaining() is None
+        assert not deadline.expired()
+
+    def test_scope_expires(self):
+        """Test that the deadline expires and check raises afterwards."""
+        with deadline_scope(0.01):
+            assert 0 < deadline.remaining() <= 0.01
+            time.sleep(0.02)
+            assert deadline.expired()
+            with pytest.raises(DeadlineExceeded):
+                deadline.check("handler")
+        assert deadline.remaining() is None
+
+
+class TestDatabaseDeadlines:
+    """Test cases for carrying deadlines into the database."""
+
+    def test_sqlite_query_is_interrupted(self, tmp_path):
+        """Test that a long SQLite query is interrupted at the deadline."""
+        # Arrange
+        engine = create_database_engine(f"sqlite:///{tmp_path / 'deadline.db'}", read_only=True)
+        start_time = time.perf_counter()
+
+        # Act
+        with deadline_scope(0.05):
+            with pytest.raises(DeadlineExceeded) as excinfo:
+                with engine.connect() as connection:
+                    connection.execute(SLOW_QUERY)
+
+        # Assert
+        assert excinfo.value.stage == "database"
+        assert time.perf_counter() - start_time < 1
+
+    def test_queries_without_deadline_are_not_interrupted(self, tmp_path):
+        """Test that the progress handler leaves queries without a deadline alone."""
+        # Arrange
+        engine = create_database_engine(f"sqlite:///{tmp_path / 'deadline.db'}", read_only=True)
+
+        # Act
+        with engine.connect() as connection:
+            count = connection.execute(text(
+                "WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter WHERE n < 100000) "
+                "SELECT count(*) FROM counter"
+            )).scalar()
+
+        # Assert
+        assert count == 100000
+
+    def test_pool_checkout_respects_deadline(self, tmp_path):
+        """Test that waiting for a pooled connection stops at the deadline."""
+        # Arrange: the writer pool has a single connection, held here
+        engine = create_database_engine(f"sqlite:///{tmp_path / 'deadline.db'}")
+        held = engine.connect()
+        start_time = time.perf_counter()
+
+        # Act
+        try:
+            with deadline_scope(0.05):
+                with pytest.raises(DeadlineExceeded) as excinfo:
+                    engine.connect()
+        finally:
+            held.close()
+
+        # Assert: well before the 30s pool timeout
+        assert excinfo.value.stage == "pool_checkout"
+        assert time.perf_counter() - start_time < 1
+
+
+class TestDeadlineMiddleware:
+    """Test cases for DeadlineMiddleware."""
+
+    def make_app(self) -> FastAPI:
+        """Create an app with a 1s default budget and a 50ms budget for /slow."""
+        app = FastAPI()
+        pool = InstrumentedThreadPool("deadline-test", 1)
+        blocker = threading.Event()
+
+        @app.get("/slow")
+        async def slow():
+            # The second call waits for the pool's only thread past the deadline
+            first = asyncio.ensure_future(pool.run(blocker.wait, 0.5))
+            await asyncio.sleep(0)
+            try:
+                await pool.run(lambda: None)
+            finally:
+                blocker.set()
+                await first
+            return {}
+
+        @app.get("/fast")
+        async def fast():
+            await pool.run(lambda: None)
+            return {"remaining": deadline.remaining()}
+
+        @app.get("/unbounded")
+        async def unbounded():
+            return {"remaining": deadline.remaining()}
+
+        app.add_middleware(DeadlineMiddleware, default_ms=1000, route_ms={"GET /slow": 50, "GET /unbounded": 0})
+        app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+        return app
+
+    def request(self, app: FastAPI, path: str) -> httpx.Response:
+        """Send one GET request to app."""
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get(path)
+
+        return asyncio.run(scenario())
+
+    def test_fast_request_has_deadline(self):
+        """Test that requests run with the route's budget."""
+        response = self.request(self.make_app(), "/fast")
+
+        assert response.status_code == 200
+        assert 0 < response.json()["remaining"] <= 1
+
+    def test_route_without_budget(self):
+        """Test that a zero per-route budget disables the deadline."""
+        response = self.request(self.make_app(), "/unbounded")
+
+        assert response.status_code == 200
+        assert response.json()["remaining"] is None
+
+    def test_exceeded_deadline_returns_504(self):
+        """Test that a request timing out in the threadpool queue gets 504."""
+        response = self.request(self.make_app(), "/slow")
+
+        assert response.status_code == 504
+        assert response.json() == {"detail": "Request deadline exceeded"}
@@ -0,0 +1,91 @@
+"""Tests for the slow-request flight recorder."""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.core.database import create_database_engine
+from app.core.flight_recorder import FlightRecorder, FlightRecorderMiddleware, hash_username, instrument_engine
+from app.core.threadpool import InstrumentedThreadPool
+
+
+def make_app(recorder: FlightRecorder, db_url: str) -> FastAPI:
+    """Create an app whose endpoint runs two queries in a worker pool."""
+    app = FastAPI()
+    engine = create_database_engine(db_url, read_only=True)
+    instrument_engine(engine)
+    pool = InstrumentedThreadPool("flight-recorder-test", 1)
+
+    def lookup() -> int:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            return connection.execute(text("SELECT 2")).scalar()
+
+    @app.get("/hello/{username}")
+    async def hello(username: str):
+        return {"value": await pool.run(lookup)}
+
+    app.add_middleware(FlightRecorderMiddleware, recorder=recorder)
+    return app
+
+
+def get(app: FastAPI, path: str) -> httpx.Response:
+    """Send one GET request to app."""
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(scenario())
+
+
+class TestFlightRecorder:
+    """Test cases for FlightRecorder."""
+
+    def test_ring_buffer_is_bounded(self):
+        """Test that the oldest entries are dropped when full."""
+        # Arrange
+        recorder = FlightRecorder(capacity=2, threshold_seconds=0)
+
+        # Act
+        for index in range(3):
+            recorder.record({"route": "/", "index": index})
+
+        # Assert
+        assert [entry["index"] for entry in recorder.entries()] == [2, 1]
+
+    def test_records_slow_request(self, tmp_path):
+        """Test that requests over the threshold are recorded with their SQL."""
+        # Arrange
+        recorder = FlightRecorder(capacity=10, threshold_seconds=0)
+        app = make_app(recorder, f"sqlite:///{tmp_path / 'recorder.db'}")
+
+        # Act
+        response = get(app, "/hello/alice")
+
+        # Assert
+        assert response.status_code == 200
+        [entry] = recorder.entries()
+        assert entry["route"] == "/hello/{username}"
+        assert entry["status_code"] == 200
+        assert entry["username_hash"] == hash_username("alice")
+        assert "alice" not in str(entry)
+        # Tuned SQLite readers emit their own BEGIN
+        assert [statement["sql"] for statement in entry["statements"]] == ["BEGIN", "SELECT 1", "SELECT 2"]
+        assert entry["statement_count"] == 3
+        assert 0 < entry["db_ms"] <= entry["total_ms"]
+        assert entry["queue_wait_ms"] > 0
+
+    def test_skips_fast_request(self, tmp_path):
+        """Test that requests under the threshold leave no trace."""
+        # Arrange
+        recorder = FlightRecorder(capacity=10, threshold_seconds=60)
+        app = make_app(recorder, f"sqlite:///{tmp_path / 'recorder.db'}")
+
+        # Act
+        response = get(app, "/hello/alice")
+
+        # Assert
+        assert response.status_code == 200
+        assert recorder.entries() == []
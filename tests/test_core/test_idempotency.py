@@ -0,0 +1,237 @@
+"""Tests for idempotency keys."""
+import asyncio
+
+import pytest
+from fakeredis import FakeServer, aioredis
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from starlette.responses import JSONResponse, Response
+
+from app.core.idempotency import IdempotencyStore, RedisIdempotencyBackend, scoped_key
+
+
+def outcomes(outcome):
+    """Current count of an idempotency outcome."""
+    return REGISTRY.get_sample_value("idempotency_requests_total", {"outcome": outcome}) or 0
+
+
+def make_store(backend=None, wait_seconds=1.0, max_entries=100):
+    """Create a store for tests."""
+    return IdempotencyStore(max_entries=max_entries, ttl_seconds=60, wait_seconds=wait_seconds, backend=backend)
+
+
+class CountingHandler:
+    """Handler counting its calls, optionally blocked until released."""
+
+    def __init__(self, response=None, blocked=False):
+        """Initialize the handler."""
+        self.calls = 0
+        self.response = response or JSONResponse({"ok": True}, status_code=201)
+        self.release = asyncio.Event() if blocked else None
+
+    async def __call__(self):
+        """Handle one request."""
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return self.response
+
+
+class TestIdempotencyStore:
+    """Test cases for IdempotencyStore."""
+
+    def test_repeat_replays_stored_response(self):
+        """Test that a completed request is replayed without running the handler again."""
+        async def scenario():
+            store = make_store()
+            handler = CountingHandler()
+            first = await store.execute("k", "f", handler)
+            second = await store.execute("k", "f", handler)
+            return handler.calls, first, second
+
+        # Arrange
+        replayed = outcomes("replayed")
+
+        # Act
+        calls, first, second = asyncio.run(scenario())
+
+        # Assert
+        assert calls == 1
+        assert (second.status_code, second.body) == (201, first.body)
+        assert second.headers["idempotent-replayed"] == "true"
+        assert outcomes("replayed") == replayed + 1
+
+    def test_duplicate_waits_for_original(self):
+        """Test that a duplicate arriving mid-request waits and gets the original's response."""
+        async def scenario():
+            store = make_store()
+            handler = CountingHandler(blocked=True)
+            original = asyncio.create_task(store.execute("k", "f", handler))
+            await asyncio.sleep(0)
+            duplicate = asyncio.create_task(store.execute("k", "f", handler))
+            await asyncio.sleep(0.01)
+            handler.release.set()
+            return handler.calls, await original, await duplicate
+
+        # Arrange
+        waited = outcomes("waited")
+
+        # Act
+        calls, original, duplicate = asyncio.run(scenario())
+
+        # Assert
+        assert calls == 1
+        assert duplicate.body == original.body
+        assert outcomes("waited") == waited + 1
+
+    def test_wait_times_out_with_conflict(self):
+        """Test that a duplicate gives up with 409 when the original takes too long."""
+        async def scenario():
+            store = make_store(wait_seconds=0.01)
+            handler = CountingHandler(blocked=True)
+            original = asyncio.create_task(store.execute("k", "f", handler))
+            await asyncio.sleep(0)
+            try:
+                await store.execute("k", "f", handler)
+            finally:
+                handler.release.set()
+                await original
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(scenario())
+        assert error.value.status_code == 409
+
+    def test_key_reused_with_different_request(self):
+        """Test that a key reused with another payload is rejected."""
+        async def scenario():
+            store = make_store()
+            await store.execute("k", "f1", CountingHandler())
+            await store.execute("k", "f2", CountingHandler())
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(scenario())
+        assert error.value.status_code == 422
+
+    def test_failures_are_not_stored(self):
+        """Test that exceptions and 5xx responses let a retry run the handler again."""
+        async def scenario():
+            store = make_store()
+
+            async def broken():
+                raise RuntimeError("database down")
+
+            with pytest.raises(RuntimeError):
+                await store.execute("k", "f", broken)
+            await store.execute("k", "f", CountingHandler(Response(status_code=503)))
+            handler = CountingHandler()
+            await store.execute("k", "f", handler)
+            return handler.calls
+
+        # Act & Assert
+        assert asyncio.run(scenario()) == 1
+
+    def test_client_errors_are_stored(self):
+        """Test that an HTTPException from the handler is replayed like a success."""
+        async def scenario():
+            store = make_store()
+            calls = 0
+
+            async def rejected():
+                nonlocal calls
+                calls += 1
+                raise HTTPException(status_code=400, detail="User already exists")
+
+            first = await store.execute("k", "f", rejected)
+            second = await store.execute("k", "f", rejected)
+            return calls, first, second
+
+        # Act
+        calls, first, second = asyncio.run(scenario())
+
+        # Assert
+        assert calls == 1
+        assert first.status_code == second.status_code == 400
+        assert second.body == b'{"detail":"User already exists"}'
+
+    def test_bounded(self):
+        """Test that the store keeps at most max_entries keys."""
+        async def scenario():
+            store = make_store(max_entries=2)
+            for key in ("a", "b", "c"):
+                await store.execute(key, "f", CountingHandler())
+            return len(store)
+
+        # Act & Assert
+        assert asyncio.run(scenario()) == 2
+
+    def test_scoped_key_validation(self):
+        """Test that keys are scoped to a resource and length-checked."""
+        # Act & Assert
+        assert scoped_key("abc", "PUT /hello/alice") == "PUT /hello/alice abc"
+        with pytest.raises(HTTPException):
+            scoped_key("x" * 256, "PUT /hello/alice")
+
+
+class TestRedisIdempotencyBackend:
+    """Test cases for deduplication across replicas."""
+
+    def test_other_replica_replays_response(self):
+        """Test that a second replica replays the first one's response from Redis."""
+        async def scenario():
+            redis = aioredis.FakeRedis(server=FakeServer())
+            first_replica = make_store(RedisIdempotencyBackend(redis))
+            second_replica = make_store(RedisIdempotencyBackend(redis))
+            handler = CountingHandler()
+            await first_replica.execute("k", "f", handler)
+            replay = await second_replica.execute("k", "f", handler)
+            return handler.calls, replay
+
+        # Act
+        calls, replay = asyncio.run(scenario())
+
+        # Assert
+        assert calls == 1
+        assert replay.status_code == 201
+        assert replay.headers["idempotent-replayed"] == "true"
+
+    def test_other_replica_waits_for_claim(self):
+        """Test that a replica polls while another one holds the claim."""
+        async def scenario():
+            redis = aioredis.FakeRedis(server=FakeServer())
+            first_replica = make_store(RedisIdempotencyBackend(redis, poll_interval=0.005))
+            second_replica = make_store(RedisIdempotencyBackend(redis, poll_interval=0.005))
+            handler = CountingHandler(blocked=True)
+            original = asyncio.create_task(first_replica.execute("k", "f", handler))
+            await asyncio.sleep(0.01)
+            duplicate = asyncio.create_task(second_replica.execute("k", "f", handler))
+            await asyncio.sleep(0.02)
+            handler.release.set()
+            return handler.calls, await original, await duplicate
+
+        # Act
+        calls, original, duplicate = asyncio.run(scenario())
+
+        # Assert
+        assert calls == 1
+        assert duplicate.body == original.body
+
+    def test_failed_request_releases_claim(self):
+        """Test that a failed request frees the key for a retry on another replica."""
+        async def scenario():
+            redis = aioredis.FakeRedis(server=FakeServer())
+            first_replica = make_store(RedisIdempotencyBackend(redis))
+            second_replica = make_store(RedisIdempotencyBackend(redis))
+
+            async def broken():
+                raise RuntimeError("database down")
+
+            with pytest.raises(RuntimeError):
+                await first_replica.execute("k", "f", broken)
+            handler = CountingHandler()
+            await second_replica.execute("k", "f", handler)
+            return handler.calls
+
+        # Act & Assert
+        assert asyncio.run(scenario()) == 1
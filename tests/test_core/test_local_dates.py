@@ -0,0 +1,59 @@
+"""Tests for per-zone local dates."""
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.core.local_dates import LocalDates
+
+
+def timestamp(zone_name, *args):
+    """Unix time of a wall-clock time in zone_name."""
+    return datetime(*args, tzinfo=ZoneInfo(zone_name)).timestamp()
+
+
+class TestLocalDates:
+    """Test cases for LocalDates."""
+
+    def test_dates_differ_by_zone(self):
+        """Test that the same instant has different dates across the date line."""
+        # Arrange
+        dates = LocalDates()
+        now = timestamp("UTC", 2024, 3, 10, 12, 0)
+
+        # Act & Assert
+        assert dates.today("Pacific/Kiritimati", now) == date(2024, 3, 11)
+        assert dates.today("UTC", now) == date(2024, 3, 10)
+        assert dates.today("Pacific/Pago_Pago", now) == date(2024, 3, 10)
+        assert LocalDates().today("Pacific/Pago_Pago", timestamp("UTC", 2024, 3, 10, 10, 0)) == date(2024, 3, 9)
+
+    def test_cached_until_local_midnight(self):
+        """Test that a zone's date is reused until its next midnight and then recomputed."""
+        # Arrange
+        dates = LocalDates()
+        dates.today("Europe/Warsaw", timestamp("Europe/Warsaw", 2024, 3, 30, 8, 0))
+
+        # Act & Assert
+        assert dates.today("Europe/Warsaw", timestamp("Europe/Warsaw", 2024, 3, 30, 23, 59, 59)) == date(2024, 3, 30)
+        assert dates.today("Europe/Warsaw", timestamp("Europe/Warsaw", 2024, 3, 31, 0, 0)) == date(2024, 3, 31)
+        assert len(dates) == 1
+
+    def test_midnight_skipped_by_dst(self):
+        """Test a zone whose clocks jump from 00:00 to 01:00."""
+        # Arrange
+        dates = LocalDates()
+        dates.today("America/Santiago", timestamp("America/Santiago", 2023, 9, 2, 23, 30))
+
+        # Act & Assert
+        assert dates.today("America/Santiago", timestamp("America/Santiago", 2023, 9, 3, 1, 0)) == date(2023, 9, 3)
+
+    @pytest.mark.parametrize("zone_name", ["", "Mars/Olympus_Mons", "../etc/passwd", "x" * 100])
+    def test_unknown_zone(self, zone_name):
+        """Test that bad zone names raise ValueError and are not cached."""
+        # Arrange
+        dates = LocalDates()
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="Unknown time zone"):
+            dates.today(zone_name)
+        assert len(dates) == 0
@@ -0,0 +1,101 @@
+"""Tests for the sampling profiler."""
+import asyncio
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.profiler import RequestProfilingMiddleware, SamplingProfiler, stored_profiles
+from app.core.threadpool import InstrumentedThreadPool
+
+
+def busy_loop(seconds: float) -> None:
+    """Burn CPU for the given time."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestSamplingProfiler:
+    """Test cases for SamplingProfiler."""
+
+    def profile_busy_thread(self) -> SamplingProfiler:
+        """Profile a thread spinning in busy_loop."""
+        worker = threading.Thread(target=busy_loop, args=(0.2,))
+        profiler = SamplingProfiler(interval=0.002)
+        worker.start()
+        profiler.start()
+        worker.join()
+        profiler.stop()
+        return profiler
+
+    def test_collapsed_stacks(self):
+        """Test that the busy function dominates the collapsed output."""
+        # Act
+        collapsed = self.profile_busy_thread().collapsed()
+
+        # Assert
+        top_stack, count = collapsed.splitlines()[0].rsplit(" ", 1)
+        assert top_stack.split(";")[-1].startswith("busy_loop (")
+        assert int(count) > 10
+
+    def test_speedscope(self):
+        """Test that speedscope output references valid frames."""
+        # Act
+        document = self.profile_busy_thread().speedscope()
+
+        # Assert
+        frames = document["shared"]["frames"]
+        [profile] = document["profiles"]
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"])
+        assert all(0 <= index < len(frames) for sample in profile["samples"] for index in sample)
+        assert "busy_loop" in {frame["name"] for frame in frames}
+
+    def test_thread_filter(self):
+        """Test that only the given threads are sampled."""
+        # Arrange
+        worker = threading.Thread(target=busy_loop, args=(0.1,))
+        profiler = SamplingProfiler(interval=0.002, thread_ids={threading.get_ident()})
+
+        # Act
+        worker.start()
+        profiler.start()
+        worker.join()
+        profiler.stop()
+
+        # Assert
+        assert "busy_loop" not in profiler.collapsed()
+
+
+class TestRequestProfilingMiddleware:
+    """Test cases for RequestProfilingMiddleware."""
+
+    def test_profiles_request_with_header(self):
+        """Test that X-Profile requests are profiled, including their worker threads."""
+        # Arrange
+        app = FastAPI()
+        pool = InstrumentedThreadPool("profiler-test", 1)
+
+        @app.get("/work")
+        async def work():
+            await pool.run(busy_loop, 0.1)
+            return {}
+
+        app.add_middleware(RequestProfilingMiddleware, interval=0.002)
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                plain = await client.get("/work")
+                profiled = await client.get("/work", headers={"X-Profile": "1"})
+                return plain, profiled
+
+        # Act
+        plain, profiled = asyncio.run(scenario())
+
+        # Assert
+        assert "x-profile-id" not in plain.headers
+        profiler = stored_profiles[profiled.headers["x-profile-id"]]
+        assert "busy_loop" in profiler.collapsed()
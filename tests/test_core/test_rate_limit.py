@@ -0,0 +1,173 @@
+"""Tests for per-client rate limiting."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.rate_limit import RateLimitMiddleware, TokenBucketLimiter
+
+
+def make_limiter(max_clients=100):
+    """Create a limiter with two reads and one write per client burst."""
+    return TokenBucketLimiter(read_rate=1, read_burst=2, write_rate=0.5, write_burst=1, max_clients=max_clients)
+
+
+def make_app() -> FastAPI:
+    """Create an app with rate limiting on /hello."""
+    app = FastAPI()
+
+    @app.get("/hello/{username}")
+    async def read(username: str):
+        return {"username": username}
+
+    @app.put("/hello/{username}")
+    async def write(username: str):
+        return {"username": username}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/hellos")
+    async def hellos():
+        return []
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=make_limiter(),
+        api_key_tiers={"partner-key": "partner"},
+        tier_multipliers={"partner": 3},
+    )
+    return app
+
+
+def throttled(tier, request_class):
+    """Current throttled count for a tier and request class."""
+    return REGISTRY.get_sample_value(
+        "rate_limit_throttled_total", {"tier": tier, "request_class": request_class}
+    ) or 0
+
+
+class TestTokenBucketLimiter:
+    """Test cases for TokenBucketLimiter."""
+
+    def test_burst_then_refill(self):
+        """Test that a client gets its burst, then tokens at the refill rate."""
+        # Arrange
+        limiter = make_limiter()
+
+        # Act
+        burst = [limiter.acquire("a", "read", now=0.0) for _ in range(3)]
+        refilled = limiter.acquire("a", "read", now=1.0)
+
+        # Assert
+        assert burst[:2] == [0.0, 0.0]
+        assert burst[2] == 1.0
+        assert refilled == 0.0
+
+    def test_read_and_write_budgets_are_separate(self):
+        """Test that exhausting writes leaves reads available."""
+        # Arrange
+        limiter = make_limiter()
+        limiter.acquire("a", "write", now=0.0)
+
+        # Act & Assert
+        assert limiter.acquire("a", "write", now=0.0) == 2.0
+        assert limiter.acquire("a", "read", now=0.0) == 0.0
+
+    def test_clients_are_independent(self):
+        """Test that one client's exhausted bucket does not limit another."""
+        # Arrange
+        limiter = make_limiter()
+        limiter.acquire("a", "write", now=0.0)
+
+        # Act & Assert
+        assert limiter.acquire("b", "write", now=0.0) == 0.0
+
+    def test_multiplier_scales_budget(self):
+        """Test that a tier multiplier scales the burst."""
+        # Arrange
+        limiter = make_limiter()
+
+        # Act
+        results = [limiter.acquire("a", "write", multiplier=3, now=0.0) for _ in range(4)]
+
+        # Assert
+        assert results[:3] == [0.0, 0.0, 0.0]
+        assert results[3] > 0
+
+    def test_evicts_least_recently_seen(self):
+        """Test that the limiter holds at most max_clients, dropping the idlest."""
+        # Arrange
+        limiter = make_limiter(max_clients=2)
+        limiter.acquire("a", "write", now=0.0)
+        limiter.acquire("b", "write", now=0.0)
+
+        # Act
+        limiter.acquire("a", "read", now=0.0)
+        limiter.acquire("c", "write", now=0.0)
+
+        # Assert
+        assert len(limiter) == 2
+        assert limiter.acquire("a", "write", now=0.0) > 0
+        assert limiter.acquire("b", "write", now=0.0) == 0.0
+
+
+class TestRateLimitMiddleware:
+    """Test cases for RateLimitMiddleware."""
+
+    def test_throttles_with_retry_after(self):
+        """Test that a client over its budget gets 429 with Retry-After."""
+        # Arrange
+        client = TestClient(make_app())
+        before = throttled("ip", "write")
+
+        # Act
+        first = client.put("/hello/alice")
+        second = client.put("/hello/alice")
+
+        # Assert
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert second.headers["retry-after"] == "2"
+        assert throttled("ip", "write") == before + 1
+
+    def test_only_limits_selected_paths(self):
+        """Test that paths outside /hello, including ones merely starting with it, are not limited."""
+        # Arrange
+        client = TestClient(make_app())
+
+        # Act
+        statuses = [client.get("/health").status_code for _ in range(5)]
+        lookalike_statuses = [client.get("/hellos").status_code for _ in range(5)]
+
+        # Assert
+        assert statuses == [200] * 5
+        assert lookalike_statuses == [200] * 5
+
+    def test_api_key_tier(self):
+        """Test that a listed API key gets its own, scaled budget."""
+        # Arrange
+        client = TestClient(make_app())
+        client.put("/hello/alice")
+        before = throttled("partner", "write")
+
+        # Act
+        statuses = [
+            client.put("/hello/alice", headers={"X-API-Key": "partner-key"}).status_code for _ in range(4)
+        ]
+
+        # Assert
+        assert statuses == [200, 200, 200, 429]
+        assert throttled("partner", "write") == before + 1
+
+    def test_unknown_api_key_is_keyed_by_ip(self):
+        """Test that made-up API keys do not get fresh buckets."""
+        # Arrange
+        client = TestClient(make_app())
+        client.put("/hello/alice", headers={"X-API-Key": "made-up-1"})
+
+        # Act
+        response = client.put("/hello/alice", headers={"X-API-Key": "made-up-2"})
+
+        # Assert
+        assert response.status_code == 429
@@ -0,0 +1,37 @@
+"""Tests for fast responses and content negotiation."""
+from datetime import date
+
+import msgpack
+from starlette.requests import Request
+
+from app.core.responses import FastJSONResponse, MsgPackResponse, negotiated_response
+
+
+def make_request(accept: str) -> Request:
+    """Create a request with the given Accept header."""
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"accept", accept.encode())]})
+
+
+class TestResponses:
+    """Test cases for response classes."""
+
+    def test_fast_json(self):
+        """Test compact JSON encoding including dates and integer keys."""
+        response = FastJSONResponse({"message": "Hello", "date": date(1990, 5, 15), "by_month": {1: 2}})
+
+        assert response.body == b'{"message":"Hello","date":"1990-05-15","by_month":{"1":2}}'
+        assert response.media_type == "application/json"
+
+    def test_negotiates_msgpack(self):
+        """Test that MessagePack is used when the client accepts it."""
+        response = negotiated_response(make_request("application/x-msgpack"), {"usernames": ["alice"]})
+
+        assert isinstance(response, MsgPackResponse)
+        assert msgpack.unpackb(response.body) == {"usernames": ["alice"]}
+        assert response.headers["vary"] == "Accept"
+
+    def test_defaults_to_json(self):
+        """Test that other clients get JSON."""
+        response = negotiated_response(make_request("*/*"), {"usernames": ["alice"]})
+
+        assert isinstance(response, FastJSONResponse)
@@ -0,0 +1,52 @@
+"""Tests for instrumented thread pools."""
+import asyncio
+import threading
+from prometheus_client import REGISTRY
+
+from app.core.threadpool import InstrumentedThreadPool
+
+
+def queue_wait_count(pool: str) -> float:
+    """Return the number of queue wait observations for pool."""
+    return REGISTRY.get_sample_value("threadpool_queue_wait_seconds_count", {"pool": pool}) or 0
+
+
+class TestInstrumentedThreadPool:
+    """Test cases for InstrumentedThreadPool."""
+
+    def test_run_returns_result_and_records_wait(self):
+        """Test that calls run in a worker thread and record queue wait."""
+        # Arrange
+        pool = InstrumentedThreadPool("test_result", 2)
+        before = queue_wait_count("test_result")
+
+        # Act
+        result = asyncio.run(pool.run(lambda a, b: (a + b, threading.current_thread().name), 1, 2))
+
+        # Assert
+        assert result[0] == 3
+        assert result[1] != threading.main_thread().name
+        assert queue_wait_count("test_result") == before + 1
+
+    def test_saturated_pool_does_not_block_other_pool(self):
+        """Test that a full write pool leaves the read pool usable."""
+        # Arrange
+        write_pool = InstrumentedThreadPool("test_write", 1)
+        read_pool = InstrumentedThreadPool("test_read", 1)
+        release = threading.Event()
+
+        async def scenario():
+            slow_writes = [asyncio.create_task(write_pool.run(release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            read_result = await asyncio.wait_for(read_pool.run(lambda: "read"), timeout=1)
+            blocked = write_pool.limiter.borrowed_tokens
+            release.set()
+            await asyncio.gather(*slow_writes)
+            return read_result, blocked
+
+        # Act
+        read_result, blocked = asyncio.run(scenario())
+
+        # Assert
+        assert read_result == "read"
+        assert blocked == 1
@@ -0,0 +1,121 @@
+"""Tests for traffic capture."""
+import hashlib
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.flight_recorder import hash_username
+from app.core.traffic_capture import (
+    CapturedRequest, REQUEST_RECORD, TrafficCapture, TrafficCaptureMiddleware, read_capture,
+)
+
+
+class TestTrafficCapture:
+    """Test cases for TrafficCapture."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that flushed records read back in order with hashed usernames."""
+        # Arrange
+        path = str(tmp_path / "capture-{pid}.bin")
+        capture = TrafficCapture(path, sample_rate=1.0)
+
+        # Act
+        capture.record(100.0, "PUT", "/hello/{username}", "alice")
+        capture.record(100.5, "GET", "/hello/{username}", "alice")
+        capture.flush()
+        capture.record(101.0, "GET", "/birthdays", None)
+        capture.close()
+
+        # Assert
+        [written] = tmp_path.iterdir()
+        assert list(read_capture(str(written))) == [
+            CapturedRequest(100.0, "PUT", "/hello/{username}", hash_username("alice")),
+            CapturedRequest(100.5, "GET", "/hello/{username}", hash_username("alice")),
+            CapturedRequest(101.0, "GET", "/birthdays", None),
+        ]
+        assert "alice" not in written.read_bytes().decode("latin-1")
+
+    def test_username_hash_is_keyed(self, monkeypatch):
+        """Test that username hashes depend on SECRET_KEY."""
+        # Arrange
+        monkeypatch.setattr(settings, "secret_key", "first-key")
+        first = hash_username("alice")
+
+        # Act
+        monkeypatch.setattr(settings, "secret_key", "second-key")
+        second = hash_username("alice")
+
+        # Assert
+        assert first != second
+        assert len(first) == len(second) == 16
+        assert hashlib.blake2b(b"alice", digest_size=8).hexdigest() not in (first, second)
+
+    def test_records_are_compact(self, tmp_path):
+        """Test that a request costs one fixed-size record once its route is known."""
+        # Arrange
+        capture = TrafficCapture(str(tmp_path / "capture.bin"), sample_rate=1.0)
+        capture.record(100.0, "GET", "/hello/{username}", "alice")
+        capture.flush()
+        size = (tmp_path / "capture.bin").stat().st_size
+
+        # Act
+        capture.record(101.0, "GET", "/hello/{username}", "bob")
+        capture.close()
+
+        # Assert
+        assert (tmp_path / "capture.bin").stat().st_size - size == REQUEST_RECORD.size == 19
+
+    def test_full_buffer_drops_records(self, tmp_path):
+        """Test that records beyond max_buffered are dropped until the next flush."""
+        # Arrange
+        capture = TrafficCapture(str(tmp_path / "capture.bin"), sample_rate=1.0, max_buffered=2)
+
+        # Act
+        for i in range(5):
+            capture.record(100.0 + i, "GET", "/hello/{username}", f"user_{i}")
+        capture.close()
+
+        # Assert
+        assert [request.timestamp for request in read_capture(str(tmp_path / "capture.bin"))] == [100.0, 101.0]
+
+    def test_middleware_records_route_and_username(self, tmp_path):
+        """Test that the middleware records the route template and username of sampled requests."""
+        # Arrange
+        app = FastAPI()
+
+        @app.get("/hello/{username}")
+        async def hello(username: str):
+            return {"message": username}
+
+        capture = TrafficCapture(str(tmp_path / "capture.bin"), sample_rate=1.0)
+        app.add_middleware(TrafficCaptureMiddleware, capture=capture)
+
+        # Act
+        TestClient(app).get("/hello/alice")
+        capture.close()
+
+        # Assert
+        [request] = read_capture(str(tmp_path / "capture.bin"))
+        assert (request.method, request.route, request.username_hash) == (
+            "GET", "/hello/{username}", hash_username("alice")
+        )
+
+    def test_unsampled_requests_not_recorded(self, tmp_path):
+        """Test that a zero sample rate records nothing."""
+        # Arrange
+        app = FastAPI()
+
+        @app.get("/health")
+        async def health():
+            return {}
+
+        capture = TrafficCapture(str(tmp_path / "capture.bin"), sample_rate=0.0)
+        app.add_middleware(TrafficCaptureMiddleware, capture=capture)
+
+        # Act
+        TestClient(app).get("/health")
+        capture.close()
+
+        # Assert
+        assert not (tmp_path / "capture.bin").exists()
@@ -0,0 +1,69 @@
+"""Tests for the shared username and date of birth rules."""
+from datetime import date
+from typing import List
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from app.core.validation import Username, check_date_of_birth, check_username
+from app.schemas.user import UserCreate
+
+
+class TestCheckUsername:
+    """Test cases for check_username."""
+
+    def test_accepts_valid_usernames(self):
+        """Test that letters, digits and underscores up to 50 characters pass."""
+        # Act & Assert
+        for username in ["alice", "User_123", "a" * 50]:
+            assert check_username(username) == username
+
+    def test_rejects_with_specific_messages(self):
+        """Test that each broken rule has its own ValueError message."""
+        # Arrange
+        cases = {
+            "": "Username cannot be empty",
+            "a" * 51: "Username cannot be longer than 50 characters",
+            "user-name": "Username can only contain alphanumeric characters and underscores",
+            "zoë": "Username can only contain alphanumeric characters and underscores",
+        }
+
+        for username, message in cases.items():
+            # Act & Assert
+            with pytest.raises(ValueError) as error:
+                check_username(username)
+            assert str(error.value) == message
+
+    def test_applies_in_models(self):
+        """Test that the Username type checks values while parsing."""
+        # Arrange
+        class Batch(BaseModel):
+            usernames: List[Username]
+
+        # Act & Assert
+        assert Batch(usernames=["alice"]).usernames == ["alice"]
+        with pytest.raises(ValidationError) as error:
+            Batch(usernames=["alice", "bad name"])
+        assert error.value.errors()[0]["type"] == "invalid_username"
+
+
+class TestCheckDateOfBirth:
+    """Test cases for check_date_of_birth."""
+
+    def test_rejects_future_dates(self):
+        """Test that only dates after today are rejected."""
+        # Act & Assert
+        assert check_date_of_birth(date(2020, 5, 15), today=date(2020, 5, 15)) == date(2020, 5, 15)
+        with pytest.raises(ValueError):
+            check_date_of_birth(date(2020, 5, 16), today=date(2020, 5, 15))
+
+    def test_user_create_checks_date(self):
+        """Test that UserCreate rejects a future date of birth while parsing."""
+        # Arrange
+        future = date.today().replace(year=date.today().year + 1).isoformat()
+
+        # Act & Assert
+        assert UserCreate.model_validate_json('{"dateOfBirth": "1990-05-15"}').dateOfBirth == date(1990, 5, 15)
+        with pytest.raises(ValidationError) as error:
+            UserCreate.model_validate_json('{"dateOfBirth": "%s"}' % future)
+        assert error.value.errors()[0]["type"] == "future_date_of_birth"
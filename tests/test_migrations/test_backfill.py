@@ -0,0 +1,142 @@
+"""Tests for the online backfill helper."""
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+import sqlalchemy as sa
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+
+from app.models.user import User
+from app.services.user_service import UserService
+from migrations.backfill import (
+    ChunkedBackfill, backfill_checkpoints, checkpoint_metadata, include_object, reset_checkpoint
+)
+
+metadata = sa.MetaData()
+items = sa.Table(
+    'backfill_test_items', metadata,
+    sa.Column('id', sa.Integer(), primary_key=True),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('doubled', sa.Integer(), nullable=True),
+)
+
+
+@pytest.fixture
+def items_engine(test_engine):
+    """Engine with 10 items to backfill, one of them already written by a dual-write."""
+    metadata.create_all(test_engine)
+    with test_engine.begin() as connection:
+        connection.execute(items.insert(), [{'id': i, 'value': i} for i in range(1, 11)])
+        connection.execute(items.update().where(items.c.id == 4).values(doubled=-1))
+    yield test_engine
+    metadata.drop_all(test_engine)
+    checkpoint_metadata.drop_all(test_engine)
+
+
+def make_backfill(chunk_size=3):
+    """Backfill of items.doubled."""
+    return ChunkedBackfill(
+        'items_doubled', items, items.c.id,
+        values={'doubled': items.c.value * 2},
+        where=items.c.doubled.is_(None),
+        chunk_size=chunk_size,
+        pause_seconds=0,
+    )
+
+
+def doubled(engine):
+    """Return the doubled column by id."""
+    with engine.connect() as connection:
+        return dict(connection.execute(sa.select(items.c.id, items.c.doubled)).all())
+
+
+class TestChunkedBackfill:
+    """Test cases for ChunkedBackfill."""
+
+    def test_backfills_in_chunks(self, items_engine):
+        """Test that every pending row is filled and rows already written are kept."""
+        # Act
+        updated = make_backfill().run(items_engine)
+
+        # Assert
+        assert updated == 9
+        assert doubled(items_engine) == {i: -1 if i == 4 else 2 * i for i in range(1, 11)}
+        with items_engine.connect() as connection:
+            checkpoint = connection.execute(sa.select(backfill_checkpoints)).one()
+        assert checkpoint.chunks == 4
+        assert checkpoint.rows_updated == 9
+        assert checkpoint.completed_at is not None
+
+    def test_resumes_from_checkpoint(self, items_engine):
+        """Test that an interrupted backfill continues after its last chunk."""
+        # Arrange
+        make_backfill().run(items_engine, max_chunks=2)
+        with items_engine.begin() as connection:
+            # Rows before the checkpoint are not revisited
+            connection.execute(items.update().where(items.c.id == 1).values(doubled=None))
+
+        # Act
+        updated = make_backfill().run(items_engine)
+
+        # Assert
+        assert updated == 4
+        assert doubled(items_engine)[1] is None
+        assert make_backfill().run(items_engine) == 0
+
+    def test_reset_starts_over(self, items_engine):
+        """Test that a reset backfill revisits every row."""
+        # Arrange
+        make_backfill().run(items_engine)
+        with items_engine.begin() as connection:
+            connection.execute(items.update().where(items.c.id == 1).values(doubled=None))
+
+        # Act
+        reset_checkpoint(items_engine, 'items_doubled')
+        updated = make_backfill().run(items_engine)
+
+        # Assert
+        assert updated == 1
+        assert doubled(items_engine)[1] == 2
+
+    def test_throttle(self):
+        """Test that slow chunks are followed by proportionally long pauses."""
+        # Arrange
+        backfill = ChunkedBackfill('t', items, items.c.id, values={}, pause_seconds=0.05, max_duty_cycle=0.25)
+
+        # Act & Assert
+        assert backfill.throttle(0.001) == 0.05
+        assert backfill.throttle(1.0) == pytest.approx(3.0)
+
+    def test_autogenerate_ignores_checkpoints(self, items_engine):
+        """Test that autogenerate does not try to drop the checkpoint table."""
+        # Arrange
+        make_backfill().run(items_engine)
+
+        # Act
+        with items_engine.connect() as connection:
+            context = MigrationContext.configure(connection, opts={"include_object": include_object})
+            diff = compare_metadata(context, metadata)
+
+        # Assert
+        assert diff == []
+
+
+class TestDualWrites:
+    """Test cases for UserService dual-writes."""
+
+    def test_creates_and_updates_write_derived_columns(self, test_db):
+        """Test that registered derived columns are set on every write."""
+        # Arrange
+        service = UserService(test_db)
+        marker = datetime(2001, 1, 1)
+
+        # Act
+        with patch.dict(UserService.DUAL_WRITES, {'created_at': lambda user: marker}):
+            service.create_user('alice', date(1990, 5, 15))
+            test_db.query(User).filter(User.username == 'alice').update({User.created_at: None})
+            test_db.commit()
+            service.update_user('alice', date(1990, 6, 1))
+
+        # Assert
+        assert test_db.query(User.created_at).filter(User.username == 'alice').scalar() == marker
@@ -0,0 +1,132 @@
+"""Tests for the birthday calendar."""
+from datetime import date, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings, settings
+from app.models.user import User
+from app.services.birthday_calendar import BirthdayCalendar, birthdays_on, list_birthdays
+from app.services.user_service import UserService
+
+
+def add_users(db, users):
+    """Insert (username, date_of_birth) pairs."""
+    for username, date_of_birth in users:
+        db.add(User(username=username, date_of_birth=date_of_birth))
+    db.commit()
+
+
+class TestBirthdaysOn:
+    """Test cases for birthdays_on."""
+
+    def test_regular_day(self):
+        """Test that a regular day matches only itself."""
+        assert birthdays_on(date(2023, 5, 15)) == [(5, 15)]
+
+    def test_feb_28_in_non_leap_year_includes_feb_29(self):
+        """Test that February 29 birthdays are celebrated on February 28 in non-leap years."""
+        assert birthdays_on(date(2023, 2, 28)) == [(2, 28), (2, 29)]
+        assert birthdays_on(date(2024, 2, 28)) == [(2, 28)]
+        assert birthdays_on(date(2024, 2, 29)) == [(2, 29)]
+
+
+class TestBirthdayCalendar:
+    """Test cases for BirthdayCalendar."""
+
+    def test_rebuild(self, test_db):
+        """Test that rebuild materializes yesterday's, today's and tomorrow's sets."""
+        # Arrange
+        add_users(test_db, [
+            ("carol", date(1990, 2, 28)),
+            ("alice", date(1992, 2, 29)),
+            ("bob", date(1985, 3, 1)),
+            ("dave", date(1980, 7, 4)),
+        ])
+        calendar = BirthdayCalendar()
+
+        # Act
+        calendar.rebuild(test_db, date(2023, 2, 28))
+
+        # Assert
+        assert calendar.page(date(2023, 2, 28), None, 10) == ["alice", "carol"]
+        assert calendar.page(date(2023, 3, 1), None, 10) == ["bob"]
+        assert calendar.covers(date(2023, 2, 27))
+        assert calendar.has_birthday("alice", date(2023, 2, 28))
+        assert not calendar.has_birthday("dave", date(2023, 2, 28))
+        assert not calendar.covers(date(2023, 3, 2))
+
+    def test_pagination(self, test_db):
+        """Test paging through a set with a cursor."""
+        # Arrange
+        today = date(2023, 5, 15)
+        add_users(test_db, [(f"user_{i:02d}", date(1990, 5, 15)) for i in range(5)])
+        calendar = BirthdayCalendar()
+        calendar.rebuild(test_db, today)
+
+        # Act
+        first = calendar.page(today, None, 2)
+        second = calendar.page(today, first[-1], 2)
+        last = calendar.page(today, second[-1], 2)
+
+        # Assert
+        assert first + second + last == [f"user_{i:02d}" for i in range(5)]
+
+    def test_on_write_moves_user(self, test_db):
+        """Test that writes move users between sets."""
+        # Arrange
+        today = date(2023, 5, 15)
+        calendar = BirthdayCalendar()
+        calendar.rebuild(test_db, today)
+
+        # Act & Assert
+        calendar.on_write("alice", date(1990, 5, 15))
+        assert calendar.has_birthday("alice", today)
+        calendar.on_write("alice", date(1990, 5, 16))
+        assert not calendar.has_birthday("alice", today)
+        assert calendar.page(today + timedelta(days=1), None, 10) == ["alice"]
+        calendar.on_write("alice", None)
+        assert calendar.page(today + timedelta(days=1), None, 10) == []
+
+    def test_service_short_circuits_birthday_message(self, test_db):
+        """Test that users in today's set get the birthday message without a lookup."""
+        # Arrange
+        calendar = BirthdayCalendar()
+        calendar.rebuild(test_db, date.today())
+        service = UserService(test_db, calendar=calendar)
+        service.create_or_update_user("alice", date.today().replace(year=1992))
+        test_db.query(User).delete()
+        test_db.commit()
+
+        # Act
+        message = service.get_birthday_message("alice")
+
+        # Assert: answered from the calendar although the row is gone
+        assert message == "Hello, alice! Happy birthday!"
+
+    def test_list_birthdays_falls_back_to_query(self, test_db, monkeypatch):
+        """Test that days the calendar does not cover are served by a query."""
+        # Arrange
+        monkeypatch.setattr(settings, "birthday_calendar_enabled", False)
+        add_users(test_db, [("alice", date(1992, 2, 29)), ("bob", date(1990, 2, 28)), ("carol", date(1990, 3, 1))])
+
+        # Act
+        first = list_birthdays(test_db, date(2023, 2, 28), None, 1)
+        rest = list_birthdays(test_db, date(2023, 2, 28), first[-1], 10)
+
+        # Assert
+        assert first == ["alice"]
+        assert rest == ["bob"]
+
+
+class TestBirthdayCalendarSettings:
+    """Test cases for the birthday calendar settings."""
+
+    def test_requires_invalidation_transport(self):
+        """Test that the calendar cannot be enabled without a way to learn other replicas' writes."""
+        # Act & Assert
+        with pytest.raises(ValidationError):
+            Settings(_env_file=None, birthday_calendar_enabled=True, cache_invalidation_transport="")
+        assert Settings(
+            _env_file=None, birthday_calendar_enabled=True, cache_invalidation_transport="loopback"
+        ).birthday_calendar_enabled
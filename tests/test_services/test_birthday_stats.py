@@ -0,0 +1,110 @@
+"""Tests for the birthday distribution counters."""
+from datetime import date
+from unittest.mock import patch
+
+from app.models.birthday_stat import BirthdayStat
+from app.models.user import User
+from app.services.birthday_stats import (
+    adjust_birthday_counts, count_upcoming, get_birthday_counts, reconcile_birthday_stats, remove_birthday_counts,
+)
+from app.services.user_service import UserService
+
+
+class TestBirthdayStats:
+    """Test cases for the birthday counters."""
+
+    def test_counts_follow_writes(self, test_db):
+        """Test that creating and moving users updates the counters."""
+        # Arrange
+        service = UserService(test_db)
+
+        # Act
+        service.create_or_update_user("alice", date(1990, 5, 15))
+        service.create_or_update_user("bob", date(1985, 5, 15))
+        service.create_or_update_user("carol", date(1992, 2, 29))
+        service.create_or_update_user("alice", date(1990, 12, 24))
+        service.create_or_update_user("bob", date(1986, 5, 15))
+
+        # Assert
+        assert get_birthday_counts(test_db) == {(5, 15): 1, (12, 24): 1, (2, 29): 1}
+
+    def test_failed_create_leaves_counts_alone(self, test_db):
+        """Test that the counter change rolls back with a rejected insert."""
+        # Arrange
+        service = UserService(test_db)
+        service.create_user("alice", date(1990, 5, 15))
+
+        # Act
+        try:
+            service.create_user("alice", date(1990, 6, 1))
+        except ValueError:
+            pass
+
+        # Assert
+        assert get_birthday_counts(test_db) == {(5, 15): 1}
+
+    def test_counters_locked_in_month_day_order(self, test_db):
+        """Test that writes touch counters in (month, day) order, whatever the data order."""
+        # Arrange
+        calls = []
+
+        # Act
+        with patch("app.services.birthday_stats._increment",
+                   side_effect=lambda db, month_day, delta: calls.append((month_day, delta))):
+            adjust_birthday_counts(test_db, date(1990, 2, 1), date(1990, 1, 1))
+            adjust_birthday_counts(test_db, date(1990, 1, 1), date(1990, 2, 1))
+            remove_birthday_counts(test_db, [date(1990, 12, 24), date(1991, 3, 5), date(1992, 12, 24)])
+
+        # Assert
+        assert calls == [
+            ((1, 1), 1), ((2, 1), -1),
+            ((1, 1), -1), ((2, 1), 1),
+            ((3, 5), -1), ((12, 24), -2),
+        ]
+
+    def test_count_upcoming(self):
+        """Test counting upcoming birthdays, including February 29 on February 28."""
+        # Arrange
+        counts = {(2, 28): 1, (2, 29): 2, (3, 1): 4, (3, 5): 8}
+
+        # Act & Assert
+        assert count_upcoming(counts, date(2023, 2, 28), 1) == 3
+        assert count_upcoming(counts, date(2023, 2, 28), 2) == 7
+        assert count_upcoming(counts, date(2024, 2, 28), 2) == 3
+        # 2023-03-02 through 2024-02-29: a leap year, so February 29 has its own day
+        assert count_upcoming(counts, date(2023, 3, 2), 365) == 11
+
+    def test_reconcile_repairs_drift(self, test_db):
+        """Test that reconciliation recounts users in chunks and fixes counters."""
+        # Arrange
+        for i in range(25):
+            test_db.add(User(username=f"user_{i}", date_of_birth=date(1990, 1 + i % 3, 1)))
+        test_db.add(BirthdayStat(month=7, day=4, user_count=3))
+        test_db.commit()
+
+        # Act
+        drift = reconcile_birthday_stats(test_db, chunk_size=10)
+
+        # Assert
+        assert drift == 28
+        assert get_birthday_counts(test_db) == {(1, 1): 9, (2, 1): 8, (3, 1): 8}
+        assert reconcile_birthday_stats(test_db, chunk_size=10) == 0
+
+    def test_reconcile_keeps_write_committed_after_scan(self, test_db):
+        """Test that a write landing after the unlocked scan is not undone."""
+        # Arrange
+        service = UserService(test_db)
+        service.create_user("john_doe", date(1990, 1, 1))
+        real_get_birthday_counts = get_birthday_counts
+
+        def write_then_get_counts(db):
+            service.create_user("jane_doe", date(1991, 1, 1))
+            return real_get_birthday_counts(db)
+
+        # Act
+        with patch("app.services.birthday_stats.get_birthday_counts", side_effect=write_then_get_counts):
+            drift = reconcile_birthday_stats(test_db, chunk_size=10)
+
+        # Assert
+        assert drift == 0
+        assert get_birthday_counts(test_db) == {(1, 1): 2}
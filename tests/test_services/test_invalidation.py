@@ -0,0 +1,187 @@
+"""Tests for the user cache and cross-replica invalidation."""
+import pytest
+from datetime import date
+from unittest.mock import patch
+from prometheus_client import REGISTRY
+
+from app.services.invalidation import InvalidationBus, LoopbackHub, LoopbackTransport, libpq_dsn
+from app.services.user_cache import UserCache
+from app.services.user_service import UserService
+
+
+@pytest.fixture
+def hub():
+    """Loopback hub shared by simulated replicas."""
+    return LoopbackHub()
+
+
+def make_bus(hub):
+    """Create and start a bus attached to hub."""
+    bus = InvalidationBus(LoopbackTransport(hub))
+    bus.start()
+    return bus
+
+
+class TestUserCache:
+    """Test cases for UserCache."""
+
+    def test_set_get_and_evict(self):
+        """Test caching and evicting a user."""
+        # Arrange
+        cache = UserCache(max_entries=10, ttl_seconds=60)
+
+        # Act
+        cache.set("john_doe", date(1990, 5, 15))
+
+        # Assert
+        assert cache.get("john_doe") == date(1990, 5, 15)
+        cache.evict("john_doe")
+        assert cache.get("john_doe") is None
+
+    def test_least_recently_used_entry_dropped(self):
+        """Test that the cache stays within max_entries."""
+        # Arrange
+        cache = UserCache(max_entries=2, ttl_seconds=60)
+        cache.set("first", date(1990, 1, 1))
+        cache.set("second", date(1990, 1, 2))
+        cache.get("first")
+
+        # Act
+        cache.set("third", date(1990, 1, 3))
+
+        # Assert
+        assert len(cache) == 2
+        assert cache.get("second") is None
+        assert cache.get("first") == date(1990, 1, 1)
+
+    def test_expired_entry_is_a_miss(self):
+        """Test that entries expire after the TTL."""
+        # Arrange
+        cache = UserCache(max_entries=10, ttl_seconds=60)
+        with patch("app.services.user_cache.time.monotonic", return_value=1000.0):
+            cache.set("john_doe", date(1990, 5, 15))
+
+        # Act & Assert
+        with patch("app.services.user_cache.time.monotonic", return_value=1061.0):
+            assert cache.get("john_doe") is None
+
+    def test_fill_after_evict_is_dropped(self):
+        """Test that a value loaded before a concurrent evict is not cached."""
+        # Arrange
+        cache = UserCache(max_entries=10, ttl_seconds=60)
+        generation = cache.generation("john_doe")
+        cache.evict("john_doe")
+
+        # Act
+        cache.set("john_doe", date(1990, 5, 15), generation)
+
+        # Assert
+        assert cache.get("john_doe") is None
+        cache.set("john_doe", date(1991, 6, 16), cache.generation("john_doe"))
+        assert cache.get("john_doe") == date(1991, 6, 16)
+
+    def test_fill_after_pruned_evict_is_dropped(self):
+        """Test that pruning old generations never lets a stale fill through."""
+        # Arrange
+        cache = UserCache(max_entries=2, ttl_seconds=60)
+        generation = cache.generation("john_doe")
+        for username in ("john_doe", "first", "second"):
+            cache.evict(username)
+
+        # Act
+        cache.set("john_doe", date(1990, 5, 15), generation)
+
+        # Assert
+        assert cache.get("john_doe") is None
+
+
+class TestInvalidationBus:
+    """Test cases for InvalidationBus."""
+
+    def test_libpq_dsn_drops_driver(self):
+        """Test that SQLAlchemy driver names are stripped for psycopg2."""
+        # Act & Assert
+        assert libpq_dsn("postgresql+psycopg://user:secret@db:5432/app") == "postgresql://user:secret@db:5432/app"
+        assert libpq_dsn("postgresql://user@db/app") == "postgresql://user@db/app"
+
+    def test_remote_replicas_receive_invalidations(self, hub):
+        """Test that subscribers run in other replicas but not in the publisher."""
+        # Arrange
+        publisher, replica = make_bus(hub), make_bus(hub)
+        published_here, received_there = [], []
+        publisher.subscribe(published_here.append)
+        replica.subscribe(received_there.append)
+        lag_samples = REGISTRY.get_sample_value("cache_invalidation_lag_seconds_count")
+
+        # Act
+        publisher.publish("john_doe", "jane_doe")
+
+        # Assert
+        assert received_there == ["john_doe", "jane_doe"]
+        assert published_here == []
+        # Lag is observed by both replicas
+        assert REGISTRY.get_sample_value("cache_invalidation_lag_seconds_count") == lag_samples + 2
+
+    def test_stopped_bus_receives_nothing(self, hub):
+        """Test that a stopped bus is detached from the transport."""
+        # Arrange
+        publisher, replica = make_bus(hub), make_bus(hub)
+        received = []
+        replica.subscribe(received.append)
+
+        # Act
+        replica.stop()
+        publisher.publish("john_doe")
+
+        # Assert
+        assert received == []
+
+    def test_large_publish_split_into_messages(self, hub):
+        """Test that many usernames go out in several NOTIFY-sized messages."""
+        # Arrange
+        publisher, replica = make_bus(hub), make_bus(hub)
+        received = []
+        replica.subscribe(received.append)
+        published = REGISTRY.get_sample_value("cache_invalidations_published_total")
+        usernames = [f"user_{i}" for i in range(250)]
+
+        # Act
+        publisher.publish(*usernames)
+
+        # Assert
+        assert received == usernames
+        assert REGISTRY.get_sample_value("cache_invalidations_published_total") == published + 3
+
+    def test_malformed_payload_ignored(self, hub):
+        """Test that malformed payloads do not reach subscribers."""
+        # Arrange
+        replica = make_bus(hub)
+        received = []
+        replica.subscribe(received.append)
+
+        # Act
+        hub.deliver("not json")
+        hub.deliver('{"usernames": ["john_doe"]}')
+
+        # Assert
+        assert received == []
+
+    def test_write_evicts_cache_in_every_replica(self, test_db, hub):
+        """Test that a committed write evicts the user from all replicas."""
+        # Arrange
+        local_cache = UserCache(max_entries=10, ttl_seconds=60)
+        remote_cache = UserCache(max_entries=10, ttl_seconds=60)
+        local_bus, remote_bus = make_bus(hub), make_bus(hub)
+        remote_bus.subscribe(remote_cache.evict)
+        service = UserService(test_db, cache=local_cache, invalidation_bus=local_bus)
+        service.create_or_update_user("john_doe", date(1990, 5, 15))
+        assert "john_doe" in service.get_birthday_message("john_doe")
+        remote_cache.set("john_doe", date(1990, 5, 15))
+
+        # Act
+        service.create_or_update_user("john_doe", date.today())
+
+        # Assert
+        assert local_cache.get("john_doe") is None
+        assert remote_cache.get("john_doe") is None
+        assert service.get_birthday_message("john_doe") == "Hello, john_doe! Happy birthday!"
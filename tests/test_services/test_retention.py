@@ -0,0 +1,93 @@
+"""Tests for deletes and the retention purge."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.user import User
+from app.services.birthday_calendar import BirthdayCalendar
+from app.services.birthday_stats import get_birthday_counts
+from app.services.retention import purge_inactive_users, retention_cutoff
+from app.services.user_cache import UserCache
+from app.services.user_service import UserService
+from app.services.username_search import UsernamePrefixIndex
+
+
+def age_users(db, usernames, days):
+    """Move the last update of usernames days into the past."""
+    updated_at = datetime.now(timezone.utc) - timedelta(days=days)
+    db.query(User).filter(User.username.in_(usernames)).update(
+        {User.updated_at: updated_at}, synchronize_session=False
+    )
+    db.commit()
+
+
+class TestDeleteUser:
+    """Test cases for UserService.delete_user."""
+
+    def test_delete_propagates_to_helpers(self, test_db):
+        """Test that a delete reaches the counters, cache, calendar and prefix index."""
+        # Arrange
+        today = date.today()
+        cache = UserCache(max_entries=10, ttl_seconds=60)
+        calendar = BirthdayCalendar()
+        calendar.rebuild(test_db, today)
+        prefix_index = UsernamePrefixIndex()
+        service = UserService(test_db, cache=cache, calendar=calendar, prefix_index=prefix_index)
+        service.create_user("alice", today.replace(year=1992))
+        service.get_date_of_birth("alice")
+
+        # Act
+        service.delete_user("alice")
+
+        # Assert
+        assert test_db.query(User).count() == 0
+        assert get_birthday_counts(test_db) == {}
+        assert cache.get("alice") is None
+        assert not calendar.has_birthday("alice", today)
+        assert prefix_index.search("al", 10) == []
+
+    def test_delete_unknown_user(self, test_db):
+        """Test deleting a user that does not exist."""
+        # Act & Assert
+        with pytest.raises(ValueError, match="User not found"):
+            UserService(test_db).delete_user("nobody")
+
+
+class TestRetentionPurge:
+    """Test cases for the retention purge."""
+
+    def test_purges_only_inactive_users_in_batches(self, test_db):
+        """Test that inactive users are deleted batch by batch and active ones kept."""
+        # Arrange
+        service = UserService(test_db)
+        inactive = [f"old_{i}" for i in range(7)]
+        for username in inactive + ["recent"]:
+            service.create_user(username, date(1990, 5, 15))
+        age_users(test_db, inactive, days=400)
+
+        # Act
+        purged = purge_inactive_users(service, retention_cutoff(365), batch_size=3, pause_seconds=0)
+
+        # Assert
+        assert purged == 7
+        assert [user.username for user in test_db.query(User).all()] == ["recent"]
+        assert get_birthday_counts(test_db) == {(5, 15): 1}
+
+    def test_max_batches_bounds_one_run(self, test_db):
+        """Test that a run stops after max_batches and the next one continues."""
+        # Arrange
+        service = UserService(test_db)
+        inactive = [f"old_{i}" for i in range(5)]
+        for username in inactive:
+            service.create_user(username, date(1990, 5, 15))
+        age_users(test_db, inactive, days=400)
+        cutoff = retention_cutoff(365)
+
+        # Act
+        first_run = purge_inactive_users(service, cutoff, batch_size=2, pause_seconds=0, max_batches=1)
+        second_run = purge_inactive_users(service, cutoff, batch_size=2, pause_seconds=0)
+
+        # Assert
+        assert first_run == 2
+        assert second_run == 3
+        assert test_db.query(User).count() == 0
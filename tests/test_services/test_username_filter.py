@@ -0,0 +1,140 @@
+"""Tests for the username filter."""
+import pytest
+from datetime import date
+from pydantic import ValidationError
+from sqlalchemy import event
+
+from app.core.config import Settings
+from app.services.user_service import UserService
+from app.services.username_filter import CountingBloomFilter, UsernameFilter
+
+
+class TestCountingBloomFilter:
+    """Test cases for CountingBloomFilter."""
+
+    def test_added_items_are_found(self):
+        """Test that added items are always reported as present."""
+        # Arrange
+        bloom = CountingBloomFilter(capacity=1000, error_rate=0.01)
+        usernames = [f"user_{i}" for i in range(500)]
+
+        # Act
+        for username in usernames:
+            bloom.add(username)
+
+        # Assert
+        assert all(username in bloom for username in usernames)
+        assert len(bloom) == 500
+
+    def test_false_positive_rate_is_bounded(self):
+        """Test that the observed false positive rate stays near the target."""
+        # Arrange
+        bloom = CountingBloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"user_{i}")
+
+        # Act
+        false_positives = sum(f"other_{i}" in bloom for i in range(10000))
+
+        # Assert
+        assert false_positives / 10000 < 0.03
+        assert bloom.estimated_false_positive_rate() < 0.02
+
+    def test_remove_item(self):
+        """Test that removed items are no longer reported."""
+        # Arrange
+        bloom = CountingBloomFilter(capacity=100)
+        bloom.add("john_doe")
+        bloom.add("jane_doe")
+
+        # Act
+        bloom.remove("john_doe")
+
+        # Assert
+        assert "john_doe" not in bloom
+        assert "jane_doe" in bloom
+        assert len(bloom) == 1
+
+    def test_invalid_parameters(self):
+        """Test that invalid sizing parameters are rejected."""
+        with pytest.raises(ValueError):
+            CountingBloomFilter(capacity=0)
+        with pytest.raises(ValueError):
+            CountingBloomFilter(capacity=10, error_rate=1.5)
+
+
+class TestUsernameFilter:
+    """Test cases for UsernameFilter and its use in UserService."""
+
+    def test_not_ready_filter_passes_everything(self):
+        """Test that a filter that was never built does not reject lookups."""
+        # Arrange
+        username_filter = UsernameFilter(capacity=100, error_rate=0.01)
+
+        # Act & Assert
+        assert username_filter.might_contain("anyone")
+
+    def test_rebuild_from_table(self, test_db):
+        """Test rebuilding the filter from the users table."""
+        # Arrange
+        service = UserService(test_db)
+        service.create_user("john_doe", date(1990, 5, 15))
+        service.create_user("jane_doe", date(1991, 6, 20))
+        username_filter = UsernameFilter(capacity=100, error_rate=0.01)
+
+        # Act
+        username_filter.rebuild(test_db, chunk_size=1)
+
+        # Assert
+        assert username_filter.ready
+        assert username_filter.might_contain("john_doe")
+        assert username_filter.might_contain("jane_doe")
+        assert not username_filter.might_contain("nobody_here")
+
+    def test_unknown_username_skips_database(self, test_db, test_engine):
+        """Test that definite misses are answered without a query."""
+        # Arrange
+        username_filter = UsernameFilter(capacity=100, error_rate=0.01)
+        username_filter.rebuild(test_db)
+        service = UserService(test_db, username_filter=username_filter)
+        statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", record_statement)
+        try:
+            # Act & Assert
+            with pytest.raises(ValueError, match="User not found"):
+                service.get_birthday_message("nonexistent")
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record_statement)
+
+        assert statements == []
+
+    def test_created_user_is_added(self, test_db):
+        """Test that users created through the service are added to the filter."""
+        # Arrange
+        username_filter = UsernameFilter(capacity=100, error_rate=0.01)
+        username_filter.rebuild(test_db)
+        service = UserService(test_db, username_filter=username_filter)
+
+        # Act
+        service.create_or_update_user("john_doe", date(1990, 5, 15))
+
+        # Assert
+        message = service.get_birthday_message("john_doe")
+        assert "john_doe" in message
+
+
+class TestUsernameFilterSettings:
+    """Test cases for the username filter settings."""
+
+    def test_requires_invalidation_transport(self):
+        """Test that the filter cannot be enabled without a way to learn other replicas' creates."""
+        # Act & Assert
+        with pytest.raises(ValidationError):
+            Settings(_env_file=None, username_filter_enabled=True, cache_invalidation_transport="")
+        assert Settings(
+            _env_file=None, username_filter_enabled=True, cache_invalidation_transport="loopback"
+        ).username_filter_enabled
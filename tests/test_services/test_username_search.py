@@ -0,0 +1,93 @@
+"""Tests for username prefix search."""
+from datetime import date
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+from app.models.user import User
+from app.services.user_service import UserService
+from app.services.username_search import UsernamePrefixIndex, prefix_range, search_usernames
+
+USERNAMES = ["alice", "alicia", "ali_baba", "Alina", "bob", "al", "alz"]
+
+
+def add_users(db, usernames):
+    """Insert users with the given usernames."""
+    for username in usernames:
+        db.add(User(username=username, date_of_birth=date(1990, 1, 1)))
+    db.commit()
+
+
+class TestPrefixRange:
+    """Test cases for prefix_range."""
+
+    def test_increments_last_character(self):
+        """Test the upper bound of a prefix range."""
+        assert prefix_range("ali") == ("ali", "alj")
+        assert prefix_range("a_") == ("a_", "a`")
+
+
+class TestSearchUsernames:
+    """Test cases for the database prefix search."""
+
+    def test_prefix_is_case_sensitive_and_ordered(self, test_db):
+        """Test that matches are bytewise ordered and capped."""
+        # Arrange
+        add_users(test_db, USERNAMES)
+
+        # Act & Assert
+        assert search_usernames(test_db, "ali", 10) == ["ali_baba", "alice", "alicia"]
+        assert search_usernames(test_db, "al", 2) == ["al", "ali_baba"]
+        assert search_usernames(test_db, "Al", 10) == ["Alina"]
+        assert search_usernames(test_db, "x", 10) == []
+
+
+class TestUsernamePrefixIndex:
+    """Test cases for UsernamePrefixIndex."""
+
+    def test_matches_database_search(self, test_db):
+        """Test that the in-memory index answers like the database."""
+        # Arrange
+        add_users(test_db, USERNAMES)
+        index = UsernamePrefixIndex()
+
+        # Act
+        index.load(test_db)
+
+        # Assert
+        assert index.ready
+        for prefix in ("a", "al", "ali", "alic", "Al", "b", "z"):
+            for limit in (1, 2, 10):
+                assert index.search(prefix, limit) == search_usernames(test_db, prefix, limit)
+
+    def test_follows_writes(self, test_db):
+        """Test that created users are added and refresh re-checks the database."""
+        # Arrange
+        index = UsernamePrefixIndex()
+        index.load(test_db)
+        service = UserService(test_db, prefix_index=index)
+
+        # Act
+        service.create_or_update_user("alice", date(1990, 5, 15))
+        service.create_or_update_user("alice", date(1990, 5, 16))
+        index.add("ghost")
+        index.refresh(test_db, "ghost")
+
+        # Assert
+        assert index.search("a", 10) == ["alice"]
+        assert index.search("g", 10) == []
+        assert len(index) == 1
+
+
+class TestUsernameSearchSettings:
+    """Test cases for the username search settings."""
+
+    def test_memory_backend_requires_invalidation_transport(self):
+        """Test that the in-memory index cannot be used without a way to learn other replicas' writes."""
+        # Act & Assert
+        with pytest.raises(ValidationError):
+            Settings(_env_file=None, username_search_backend="memory", cache_invalidation_transport="")
+        assert Settings(
+            _env_file=None, username_search_backend="memory", cache_invalidation_transport="loopback"
+        ).username_search_backend == "memory"
@@ -0,0 +1,145 @@
+"""Tests for the in-memory user store."""
+import pytest
+from datetime import date
+from pydantic import ValidationError
+
+from app.core.config import Settings
+from app.services.user_service import UserService
+from app.storage.memory import InMemoryUserStore
+from app.storage.sql import SQLUserStore
+
+
+class TestInMemoryUserStore:
+    """Test cases for InMemoryUserStore."""
+
+    def test_put_and_get(self):
+        """Test storing and reading dates of birth."""
+        # Arrange
+        store = InMemoryUserStore()
+
+        # Act
+        store.put("john_doe", date(1990, 5, 15))
+        store.put("jane_doe", date(2000, 2, 29))
+
+        # Assert
+        assert store.get_date_of_birth("john_doe") == date(1990, 5, 15)
+        assert store.get_date_of_birth("jane_doe") == date(2000, 2, 29)
+        assert store.get_date_of_birth("nonexistent") is None
+        assert len(store) == 2
+
+    def test_put_overwrites_existing_user(self):
+        """Test that updating a user keeps a single entry."""
+        # Arrange
+        store = InMemoryUserStore()
+        store.put("john_doe", date(1990, 5, 15))
+
+        # Act
+        store.put("john_doe", date(1991, 6, 20))
+
+        # Assert
+        assert store.get_date_of_birth("john_doe") == date(1991, 6, 20)
+        assert len(store) == 1
+
+    def test_delete_and_reinsert(self):
+        """Test deleting a user and creating it again."""
+        # Arrange
+        store = InMemoryUserStore()
+        store.put("john_doe", date(1990, 5, 15))
+
+        # Act
+        store.delete("john_doe")
+
+        # Assert
+        assert store.get_date_of_birth("john_doe") is None
+        assert len(store) == 0
+        store.put("john_doe", date(1992, 1, 1))
+        assert store.get_date_of_birth("john_doe") == date(1992, 1, 1)
+        assert len(store) == 1
+
+    def test_table_grows(self):
+        """Test that many inserts resize the table without losing users."""
+        # Arrange
+        store = InMemoryUserStore()
+
+        # Act
+        for i in range(5000):
+            store.put(f"user_{i}", date.fromordinal(700000 + i))
+
+        # Assert
+        assert len(store) == 5000
+        assert all(store.get_date_of_birth(f"user_{i}") == date.fromordinal(700000 + i) for i in range(5000))
+
+    def test_non_ascii_usernames(self):
+        """Test that usernames are compared as encoded bytes."""
+        # Arrange
+        store = InMemoryUserStore()
+
+        # Act
+        store.put("żółw", date(1990, 5, 15))
+
+        # Assert
+        assert store.get_date_of_birth("żółw") == date(1990, 5, 15)
+        assert store.get_date_of_birth("zolw") is None
+
+    def test_load_from_database(self, test_db):
+        """Test loading the store from the users table."""
+        # Arrange
+        service = UserService(test_db)
+        service.create_user("john_doe", date(1990, 5, 15))
+        service.create_user("jane_doe", date(1991, 6, 20))
+        store = InMemoryUserStore()
+
+        # Act
+        store.load(test_db, chunk_size=1)
+
+        # Assert
+        assert store.ready
+        assert len(store) == 2
+        assert store.get_date_of_birth("jane_doe") == date(1991, 6, 20)
+
+
+class TestUserServiceWithStore:
+    """Test cases for UserService backed by a user store."""
+
+    def test_writes_go_through_to_sql_and_store(self, test_db):
+        """Test that writes reach both the database and the in-memory store."""
+        # Arrange
+        store = InMemoryUserStore()
+        service = UserService(test_db, store=store)
+
+        # Act
+        service.create_or_update_user("john_doe", date(1990, 5, 15))
+        service.create_or_update_user("john_doe", date(1991, 6, 20))
+
+        # Assert
+        assert store.get_date_of_birth("john_doe") == date(1991, 6, 20)
+        assert SQLUserStore(test_db).get_date_of_birth("john_doe") == date(1991, 6, 20)
+
+    def test_birthday_message_from_store(self, test_db):
+        """Test that messages are served from the store."""
+        # Arrange
+        store = InMemoryUserStore()
+        store.put("john_doe", date.today())
+        service = UserService(test_db, store=store)
+
+        # Act
+        message = service.get_birthday_message("john_doe")
+
+        # Assert
+        assert message == "Hello, john_doe! Happy birthday!"
+        with pytest.raises(ValueError, match="User not found"):
+            service.get_birthday_message("nonexistent")
+
+
+class TestLocalStoreSettings:
+    """Test cases for the local user store settings."""
+
+    def test_requires_invalidation_transport(self):
+        """Test that process-local stores cannot be enabled without cross-replica invalidation."""
+        # Act & Assert
+        for backend in ("memory", "snapshot"):
+            with pytest.raises(ValidationError):
+                Settings(_env_file=None, user_store_backend=backend, cache_invalidation_transport="")
+            assert Settings(
+                _env_file=None, user_store_backend=backend, cache_invalidation_transport="postgres"
+            ).user_store_backend == backend
@@ -0,0 +1,237 @@
+"""Tests for the shared Redis cache tier."""
+import time
+from datetime import date
+from unittest.mock import patch
+
+import fakeredis
+from prometheus_client import REGISTRY
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from app.services.user_service import UserService
+from app.storage.memory import InMemoryUserStore
+from app.storage.shared_cache import SharedCacheUserStore, seconds_until_midnight
+from app.storage.sql import SQLUserStore
+
+
+class CountingStore(InMemoryUserStore):
+    """In-memory store standing in for the database, counting lookups."""
+
+    def __init__(self):
+        """Initialize an empty store."""
+        super().__init__()
+        self.lookups = 0
+
+    def get_date_of_birth(self, username):
+        """Count and serve a lookup."""
+        self.lookups += 1
+        return self.peek(username)
+
+    def peek(self, username):
+        """Serve a lookup without counting it."""
+        return super().get_date_of_birth(username)
+
+    def get_dates_of_birth(self, usernames):
+        """Count and serve a batch lookup."""
+        self.lookups += 1
+        found = {}
+        for username in usernames:
+            date_of_birth = self.peek(username)
+            if date_of_birth is not None:
+                found[username] = date_of_birth
+        return found
+
+
+class BrokenRedis:
+    """Client whose every command fails, counting the attempts."""
+
+    def __init__(self):
+        """Initialize the call counter."""
+        self.calls = 0
+
+    def get(self, key):
+        """Fail a GET."""
+        self.calls += 1
+        raise RedisConnectionError("connection refused")
+
+    def pipeline(self, transaction=True):
+        """Fail a pipeline."""
+        self.calls += 1
+        raise RedisConnectionError("connection refused")
+
+
+def make_breaker():
+    """Create a breaker that tolerates slow test machines."""
+    return CircuitBreaker("test_shared_cache", failure_threshold=3, reset_seconds=60, slow_call_seconds=5)
+
+
+def sample_count(result):
+    """Return shared_cache_requests_total for one result."""
+    return REGISTRY.get_sample_value("shared_cache_requests_total", {"result": result}) or 0
+
+
+def make_cache(store, client=None, breaker=None):
+    """Create a shared cache over store with a private fake Redis."""
+    return SharedCacheUserStore(
+        store,
+        client if client is not None else fakeredis.FakeRedis(server=fakeredis.FakeServer()),
+        breaker if breaker is not None else make_breaker(),
+    )
+
+
+class TestSharedCacheUserStore:
+    """Test cases for SharedCacheUserStore."""
+
+    def test_miss_fills_cache(self):
+        """Test that a miss reads the store once and later lookups hit the cache."""
+        # Arrange
+        store = CountingStore()
+        store.put("alice", date(1990, 5, 15))
+        cache = make_cache(store)
+
+        # Act
+        first = cache.get_date_of_birth("alice")
+        second = cache.get_date_of_birth("alice")
+
+        # Assert
+        assert first == second == date(1990, 5, 15)
+        assert store.lookups == 1
+
+    def test_batch_lookup(self):
+        """Test that a batch reads only cache misses from the store, in one lookup."""
+        # Arrange
+        store = CountingStore()
+        store.put("alice", date(1990, 5, 15))
+        store.put("bob", date(1985, 1, 1))
+        cache = make_cache(store)
+        cache.get_date_of_birth("alice")
+        store.lookups = 0
+
+        # Act
+        found = cache.get_dates_of_birth(["alice", "bob", "nobody", "alice"])
+
+        # Assert
+        assert found == {"alice": date(1990, 5, 15), "bob": date(1985, 1, 1)}
+        assert store.lookups == 1
+        assert cache.get_dates_of_birth(["alice", "bob"]) == found
+        assert store.lookups == 1
+
+    def test_replicas_share_writes(self):
+        """Test that a write on one replica is served by another replica's cache."""
+        # Arrange
+        client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        writer = make_cache(CountingStore(), client)
+        reader_store = CountingStore()
+        reader = make_cache(reader_store, client)
+
+        # Act
+        writer.put("alice", date(1990, 5, 15))
+        found = reader.get_date_of_birth("alice")
+        writer.delete("alice")
+
+        # Assert
+        assert found == date(1990, 5, 15)
+        assert reader.get_date_of_birth("alice") is None
+        assert reader_store.lookups == 0
+
+    def test_fill_does_not_overwrite_newer_write(self):
+        """Test that a reader filling an older value loses to a concurrent write."""
+        # Arrange
+        client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        cache = make_cache(CountingStore(), client)
+        cache.put("alice", date(1991, 1, 1))
+
+        # Act
+        cache._fill({"alice": date(1990, 5, 15)})
+
+        # Assert
+        assert cache.get_date_of_birth("alice") == date(1991, 1, 1)
+
+    def test_entries_expire_after_midnight(self):
+        """Test that entries expire at the next UTC midnight plus jitter."""
+        # Arrange
+        client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        cache = make_cache(CountingStore(), client)
+
+        # Act
+        with patch("app.storage.shared_cache.random.randint", return_value=60):
+            cache.put("alice", date(1990, 5, 15))
+
+        # Assert
+        expected = seconds_until_midnight(time.time()) + 60
+        assert expected - 2 <= client.ttl("dob:alice") <= expected
+        assert seconds_until_midnight(1_700_000_000) == 86400 - 1_700_000_000 % 86400
+
+    def test_falls_back_and_opens_breaker(self):
+        """Test that failures fall back to the store and then stop calling Redis."""
+        # Arrange
+        store = CountingStore()
+        store.put("alice", date(1990, 5, 15))
+        client = BrokenRedis()
+        breaker = make_breaker()
+        cache = make_cache(store, client, breaker)
+
+        # Act
+        results = [cache.get_date_of_birth("alice") for _ in range(5)]
+        batch = cache.get_dates_of_birth(["alice"])
+
+        # Assert
+        assert results == [date(1990, 5, 15)] * 5
+        assert batch == {"alice": date(1990, 5, 15)}
+        assert breaker.state == OPEN
+        assert client.calls == 3
+
+    def test_user_service_writes_through(self, test_db):
+        """Test that writes through UserService update the shared cache."""
+        # Arrange
+        client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        service = UserService(test_db, store=make_cache(SQLUserStore(test_db), client))
+
+        # Act
+        service.create_or_update_user("alice", date(1990, 5, 15))
+        service.create_or_update_user("alice", date(1991, 1, 1))
+
+        # Assert
+        assert client.get("dob:alice") == b"1991-01-01"
+        assert service.get_date_of_birth("alice") == date(1991, 1, 1)
+
+    def test_failed_write_leaves_breaker_alone(self):
+        """Test that ungated writes neither open nor close the breaker."""
+        # Arrange
+        breaker = make_breaker()
+        client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        cache = make_cache(CountingStore(), client, breaker)
+
+        # Act
+        with patch.object(client, "set", side_effect=RedisConnectionError("connection refused")):
+            for _ in range(5):
+                cache.put("alice", date(1990, 5, 15))
+        failed_writes_state = breaker.state
+        for _ in range(3):
+            breaker.record(0.001, failed=True)
+        cache.put("alice", date(1990, 5, 15))
+
+        # Assert
+        assert failed_writes_state == CLOSED
+        assert breaker.state == OPEN
+
+    def test_tombstones_counted_separately(self):
+        """Test that cached deletes are not reported as hits."""
+        # Arrange
+        store = CountingStore()
+        cache = make_cache(store)
+        cache.put("alice", date(1990, 5, 15))
+        cache.put("bob", date(1985, 1, 1))
+        cache.delete("bob")
+        before = {result: sample_count(result) for result in ("hit", "tombstone")}
+
+        # Act
+        single = cache.get_date_of_birth("bob")
+        batch = cache.get_dates_of_birth(["alice", "bob"])
+
+        # Assert
+        assert single is None
+        assert batch == {"alice": date(1990, 5, 15)}
+        assert sample_count("hit") - before["hit"] == 1
+        assert sample_count("tombstone") - before["tombstone"] == 2
+        assert store.lookups == 0
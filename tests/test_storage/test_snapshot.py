@@ -0,0 +1,148 @@
+"""Tests for the memory-mapped user snapshot."""
+import os
+import pytest
+from datetime import date, datetime, timedelta
+
+from app.models.user import User
+from app.services.user_service import UserService
+from app.storage.snapshot import SnapshotUserStore, UserSnapshot, build_snapshot, write_snapshot
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """Path for a snapshot file."""
+    return str(tmp_path / "users.snap")
+
+
+class TestUserSnapshot:
+    """Test cases for snapshot files."""
+
+    def test_write_and_read(self, snapshot_path):
+        """Test that every written user can be looked up."""
+        # Arrange
+        rows = [(f"user_{i}", date.fromordinal(700000 + i)) for i in range(1000)]
+
+        # Act
+        count = write_snapshot(snapshot_path, reversed(rows))
+        snapshot = UserSnapshot(snapshot_path)
+
+        # Assert
+        assert count == 1000
+        assert len(snapshot) == 1000
+        assert all(snapshot.get_ordinal(username) == dob.toordinal() for username, dob in rows)
+        assert snapshot.get_ordinal("nonexistent") is None
+        assert snapshot.watermark is None
+        snapshot.close()
+
+    def test_empty_snapshot(self, snapshot_path):
+        """Test that an empty snapshot answers every lookup with a miss."""
+        # Arrange
+        write_snapshot(snapshot_path, [])
+
+        # Act
+        snapshot = UserSnapshot(snapshot_path)
+
+        # Assert
+        assert len(snapshot) == 0
+        assert snapshot.get_ordinal("john_doe") is None
+        snapshot.close()
+
+    def test_duplicate_usernames_rejected(self, snapshot_path):
+        """Test that duplicate usernames are rejected."""
+        rows = [("john_doe", date(1990, 5, 15)), ("john_doe", date(1991, 6, 20))]
+        with pytest.raises(ValueError, match="Duplicate"):
+            write_snapshot(snapshot_path, rows)
+        assert not os.path.exists(snapshot_path)
+
+    def test_truncated_file_rejected(self, snapshot_path):
+        """Test that a truncated snapshot is not mapped."""
+        # Arrange
+        write_snapshot(snapshot_path, [("john_doe", date(1990, 5, 15))])
+        with open(snapshot_path, "r+b") as snapshot_file:
+            snapshot_file.truncate(os.path.getsize(snapshot_path) - 1)
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="truncated"):
+            UserSnapshot(snapshot_path)
+
+
+class TestSnapshotUserStore:
+    """Test cases for SnapshotUserStore."""
+
+    def test_build_from_table(self, test_db, snapshot_path):
+        """Test building a snapshot from the users table."""
+        # Arrange
+        service = UserService(test_db)
+        service.create_user("john_doe", date(1990, 5, 15))
+        service.create_user("jane_doe", date(1991, 6, 20))
+
+        # Act
+        build_snapshot(test_db, snapshot_path)
+        store = SnapshotUserStore(UserSnapshot(snapshot_path))
+
+        # Assert
+        assert store.get_date_of_birth("john_doe") == date(1990, 5, 15)
+        assert store.get_date_of_birth("jane_doe") == date(1991, 6, 20)
+        assert store.snapshot.watermark is not None
+
+    def test_overlay_takes_precedence(self, snapshot_path):
+        """Test that writes after the snapshot shadow snapshot contents."""
+        # Arrange
+        write_snapshot(snapshot_path, [("john_doe", date(1990, 5, 15)), ("jane_doe", date(1991, 6, 20))])
+        store = SnapshotUserStore(UserSnapshot(snapshot_path))
+
+        # Act
+        store.put("john_doe", date(1992, 1, 1))
+        store.put("new_user", date(2000, 2, 29))
+        store.delete("jane_doe")
+
+        # Assert
+        assert store.get_date_of_birth("john_doe") == date(1992, 1, 1)
+        assert store.get_date_of_birth("new_user") == date(2000, 2, 29)
+        assert store.get_date_of_birth("jane_doe") is None
+
+    def test_refresh_overlay_picks_up_newer_rows(self, test_db, snapshot_path):
+        """Test that rows updated after the watermark reach the overlay."""
+        # Arrange
+        watermark = datetime(2020, 1, 1)
+        write_snapshot(snapshot_path, [("john_doe", date(1990, 5, 15))], watermark)
+        test_db.add(User(username="john_doe", date_of_birth=date(1991, 6, 20),
+                         updated_at=watermark + timedelta(hours=1)))
+        test_db.add(User(username="old_user", date_of_birth=date(1980, 1, 1),
+                         updated_at=watermark - timedelta(hours=1)))
+        test_db.commit()
+        store = SnapshotUserStore(UserSnapshot(snapshot_path))
+
+        # Act
+        refreshed = store.refresh_overlay(test_db)
+
+        # Assert
+        assert refreshed == 1
+        assert store.overlay_size() == 1
+        assert store.get_date_of_birth("john_doe") == date(1991, 6, 20)
+
+    def test_remaps_rebuilt_snapshot(self, test_db, snapshot_path):
+        """Test that a rebuilt file is mapped and the overlay restarts from its watermark."""
+        # Arrange
+        write_snapshot(snapshot_path, [("john_doe", date(1990, 5, 15)), ("carol", date(1985, 3, 3))])
+        store = SnapshotUserStore(UserSnapshot(snapshot_path))
+        store.put("alice", date(2000, 2, 29))
+        store.delete("carol")
+        store.delete("dave")
+        test_db.add(User(username="carol", date_of_birth=date(1986, 4, 4), updated_at=datetime(2020, 1, 1)))
+        test_db.commit()
+        rebuilt = [("john_doe", date(1990, 5, 15)), ("alice", date(2000, 2, 29)),
+                   ("carol", date(1986, 4, 4)), ("dave", date(1970, 7, 7))]
+        write_snapshot(snapshot_path, rebuilt, datetime(2020, 1, 2))
+
+        # Act
+        remapped = store.remap_if_changed(test_db)
+
+        # Assert
+        assert remapped
+        assert not store.remap_if_changed(test_db)
+        assert len(store.snapshot) == 4
+        assert store.get_date_of_birth("alice") == date(2000, 2, 29)
+        assert store.get_date_of_birth("carol") == date(1986, 4, 4)
+        assert store.get_date_of_birth("dave") is None
+        assert store.overlay_size() == 1